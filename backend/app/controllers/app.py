@@ -1,5 +1,7 @@
+import atexit
 import os
 import pickle
+import tempfile
 
 from dotenv import load_dotenv
 from flask import Flask, jsonify, request
@@ -7,10 +9,20 @@ from flask_cors import CORS
 from backend.ml_model.use_cases.multiple_model_use import EvaluateModelsUseCase
 
 from backend.app.entities import User
-from backend.app.repositories import CsvFileRepo, SqliteDbRepo, UserRepo
+from backend.app.infrastructure.change_notifier import ChangeNotifier
+from backend.app.infrastructure.ingestion_job_manager import IngestionJobManager
+from backend.app.infrastructure.selection_write_buffer import SelectionWriteBuffer
+from backend.app.infrastructure.snapshot_cache import SnapshotCache
+from backend.app.repositories import (
+    CsvFileRepo,
+    IngestionJobRepo,
+    SqliteDbRepo,
+    UserRepo,
+)
 from backend.app.use_cases import (
     ChangePasswordInteractor,
     Generate,
+    GetGroupCounts,
     GetHeaders,
     GetLastLoginData,
     GetValuesUnderHeader,
@@ -29,8 +41,66 @@ user = User("")
 curr_dir = os.path.dirname(__file__)
 file_path = os.path.join(curr_dir, "../../../database/output.csv")
 
-db_repo = SqliteDbRepo(user)
-file_repo = CsvFileRepo(user, file_path)
+upload_batch_size = int(os.getenv("UPLOAD_BATCH_SIZE", "5000"))
+upload_load_data = os.getenv("UPLOAD_LOAD_DATA", "false").lower() == "true"
+upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", "100000"))
+upload_skip_duplicates = (
+    os.getenv("UPLOAD_SKIP_DUPLICATES", "true").lower() == "true"
+)
+upload_dedupe_ids = os.getenv("UPLOAD_DEDUPE_IDS", "false").lower() == "true"
+upload_archive_workers = int(os.getenv("UPLOAD_ARCHIVE_WORKERS", "4"))
+upload_incremental = os.getenv("UPLOAD_INCREMENTAL", "false").lower() == "true"
+upload_rollups = os.getenv("UPLOAD_ROLLUPS", "false").lower() == "true"
+upload_partitioned = os.getenv("UPLOAD_PARTITIONED", "false").lower() == "true"
+
+# Caches and aggregates subscribe here to hear which time range an upload changed
+change_notifier = ChangeNotifier()
+
+# Columnar snapshots of each user's dataset, rebuilt after each upload; a
+# budget of 0 turns them off
+snapshot_cache_bytes = int(os.getenv("SNAPSHOT_CACHE_BYTES", str(1024**3)))
+snapshot_cache = None
+if snapshot_cache_bytes > 0:
+    snapshot_cache = SnapshotCache(
+        os.getenv(
+            "SNAPSHOT_DIR", os.path.join(curr_dir, "../../../database/snapshots")
+        ),
+        snapshot_cache_bytes,
+    )
+    change_notifier.subscribe(snapshot_cache.on_change)
+
+
+def write_selection(table_name: str, selection: dict) -> bool:
+    return SqliteDbRepo(User(table_name)).write_selection(table_name, selection)
+
+
+# Saves users' selections in the background so /api/generate does not wait on them
+selection_writes = SelectionWriteBuffer(
+    write_selection, delay=float(os.getenv("SELECTION_WRITE_DELAY", "0.5"))
+)
+atexit.register(selection_writes.shutdown)
+
+db_repo = SqliteDbRepo(
+    user, selection_buffer=selection_writes, notifier=change_notifier
+)
+file_repo = CsvFileRepo(
+    user,
+    file_path,
+    batch_size=upload_batch_size,
+    use_load_data=upload_load_data,
+    chunk_size=upload_chunk_size,
+    skip_duplicates=upload_skip_duplicates,
+    dedupe_ids=upload_dedupe_ids,
+    archive_workers=upload_archive_workers,
+    notifier=change_notifier,
+    rollups=upload_rollups,
+    partitioned=upload_partitioned,
+)
+
+# Jobs are kept in the database so any server process can report them
+ingestion_jobs = IngestionJobManager(
+    max_workers=int(os.getenv("UPLOAD_WORKERS", "2")), store=IngestionJobRepo()
+)
 
 
 def initialize(curr_user: str) -> None:
@@ -45,7 +115,24 @@ def initialize(curr_user: str) -> None:
 
     file_repo.user = user
     file_repo.table_name = user.table_name
-    file_repo.db_repo = SqliteDbRepo(user)
+    file_repo.db_repo = SqliteDbRepo(user, notifier=change_notifier)
+
+
+def request_repos(curr_user: str) -> tuple[CsvFileRepo, SqliteDbRepo]:
+    """Repositories of a request's own, unlike the shared ones initialize updates.
+
+    Generate hands the data to the model in memory, so with these, requests
+    for different users can run side by side.
+    """
+    request_user = User(curr_user)
+    return (
+        CsvFileRepo(
+            request_user, file_path, snapshots=snapshot_cache, rollups=upload_rollups
+        ),
+        SqliteDbRepo(
+            request_user, selection_buffer=selection_writes, notifier=change_notifier
+        ),
+    )
 
 
 @app.route("/api/headers", methods=["POST"])
@@ -116,7 +203,9 @@ def generate():
 
         print("Generating data for: ", demographics, choices, time)
 
-        data_points = Generate(file_repo, db_repo).execute(demographics, choices, time)
+        data_points = Generate(*request_repos(curr_user)).execute(
+            demographics, choices, time
+        )
 
         data_points_dict = [
             {
@@ -135,6 +224,22 @@ def generate():
     return jsonify({"error": "Missing required data."}), 400
 
 
+@app.route("/api/group-counts", methods=["POST"])
+def group_counts():
+    """Count the rows matching a selection per group, from the rollups if kept."""
+    data = request.get_json()
+    curr_user = data.get("curr_user")
+    demographics = [dem for dem in data.get("demographics") or [] if dem]
+    choices = data.get("choices") or {}
+    time = data.get("time", None)
+
+    if not curr_user or not demographics:
+        return jsonify({"error": "Missing required data."}), 400
+
+    file_repo, _ = request_repos(curr_user)
+    return jsonify(GetGroupCounts(file_repo).execute(demographics, choices, time))
+
+
 @app.route("/api/get-prev-data", methods=["POST"])
 def get_prev_data():
     data = request.get_json()
@@ -177,21 +282,99 @@ def get_prev_data():
 
 @app.route("/api/upload-data", methods=["POST"])
 def upload_data():
-    """Upload data to the database."""
+    """Upload data to the database.
+
+    With async_job=true in the form, the upload is queued as a background
+    job and its id is returned right away for polling /api/upload-status.
+    With incremental=true, only rows newer than the last upload are added.
+    """
     csv_to_read = request.files.get("csv_to_read")
     curr_user = request.form.get("curr_user")
+    async_job = request.form.get("async_job", "false").lower() == "true"
+    incremental = (
+        request.form.get("incremental", str(upload_incremental)).lower() == "true"
+    )
 
     initialize(curr_user)
 
     if not user.table_name or not csv_to_read:
         return jsonify({"error": "Missing required data."}), 400
 
-    if UploadData(file_repo).execute(csv_to_read):
-        return jsonify({"message": "Data uploaded successfully."}), 200
+    if async_job:
+        job = submit_upload_job(curr_user, csv_to_read, incremental)
+        return jsonify(job.to_dict()), 202
+
+    # The request's own repository, so concurrent uploads keep their own options
+    request_repo = upload_repo(curr_user, incremental)
+    if UploadData(request_repo).execute(csv_to_read):
+        return (
+            jsonify(
+                {
+                    "message": "Data uploaded successfully.",
+                    **request_repo.last_import_stats,
+                }
+            ),
+            200,
+        )
     else:
         return jsonify({"error": "Error uploading data."}), 500
 
 
+@app.route("/api/upload-status/<job_id>", methods=["GET"])
+def upload_status(job_id):
+    """Report the progress of a background upload."""
+    job = ingestion_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({"error": "Upload job not found."}), 404
+
+    return jsonify(job.to_dict()), 200
+
+
+def upload_repo(
+    curr_user: str, incremental: bool = False, on_progress=None
+) -> CsvFileRepo:
+    """A repository of its own for one upload, with the configured upload options."""
+    return CsvFileRepo(
+        User(curr_user),
+        file_path,
+        batch_size=upload_batch_size,
+        use_load_data=upload_load_data,
+        chunk_size=upload_chunk_size,
+        on_progress=on_progress,
+        skip_duplicates=upload_skip_duplicates,
+        dedupe_ids=upload_dedupe_ids,
+        archive_workers=upload_archive_workers,
+        incremental=incremental,
+        notifier=change_notifier,
+        rollups=upload_rollups,
+        partitioned=upload_partitioned,
+    )
+
+
+def submit_upload_job(curr_user: str, upload, incremental: bool = False):
+    """
+    Spool the upload to a temporary file and ingest it on a worker thread.
+    The request's file stream is closed once the request ends, so the worker
+    reads the spooled copy instead.
+    """
+    _, extension = os.path.splitext(upload.filename or "")
+    if (upload.filename or "").lower().endswith(".tar.gz"):
+        extension = ".tgz"
+    fd, spooled_path = tempfile.mkstemp(suffix=extension.lower() or ".csv")
+    os.close(fd)
+    upload.save(spooled_path)
+
+    def work(job):
+        try:
+            job_repo = upload_repo(curr_user, incremental, on_progress=job.add_rows)
+            return UploadData(job_repo).execute(spooled_path)
+        finally:
+            os.remove(spooled_path)
+
+    return ingestion_jobs.submit(curr_user, work)
+
+
 UPLOAD_FOLDER = "uploads/"  # Directory to save uploaded models
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -253,7 +436,9 @@ def generate_for_all_models():
             models[i] = os.path.join(UPLOAD_FOLDER, curr_user, models[i])
         print("Multiple Models Paths:", models)
 
-        new_file_repo = CsvFileRepo(User("SECRET_KEY"), file_path)
+        new_file_repo = CsvFileRepo(
+            User("SECRET_KEY"), file_path, snapshots=snapshot_cache
+        )
 
         evaluator = EvaluateModelsUseCase(new_file_repo, models)
         output = evaluator.execute()
@@ -551,7 +736,9 @@ def share(encoded_data):
         }
         time = data.get("timeframe")
 
-        data_points = Generate(file_repo, db_repo).execute(demographics, choices, time)
+        data_points = Generate(*request_repos(data.get("currUser"))).execute(
+            demographics, choices, time
+        )
 
         data_points_dict = [
             {
@@ -1 +1,2 @@
+from .ingestion_job import IngestionJob
 from .user import User
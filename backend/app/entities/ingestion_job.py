@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+
+class IngestionJob:
+    """
+    A class used to represent a background data upload and its progress.
+
+    Attributes
+    ----------
+    job_id : str
+        The unique id returned to the client for polling.
+    table_name : str
+        The email of the user the data is being uploaded for.
+    status : str
+        One of "queued", "running", "succeeded" or "failed".
+    rows_processed : int
+        The number of rows written to the database so far.
+    error : Optional[str]
+        The reason the job failed, if it did.
+    on_change : Optional[Callable[[IngestionJob], None]]
+        Called with the job after it starts, makes progress or finishes.
+
+    Methods
+    -------
+    from_row(row: tuple) -> IngestionJob
+        Rebuilds a job from a stored ingestion_jobs row.
+    start() -> None
+        Marks the job as running.
+    add_rows(rows: int) -> None
+        Adds to the number of rows processed.
+    finish(success: bool, error: Optional[str] = None) -> None
+        Marks the job as succeeded or failed.
+    throughput() -> float
+        Returns the rows processed per second since the job started.
+    to_dict() -> dict
+        Returns the job as a JSON-serializable dictionary.
+    """
+
+    def __init__(self, table_name: str):
+        self.job_id = uuid.uuid4().hex
+        self.table_name = table_name
+        self.status = "queued"
+        self.rows_processed = 0
+        self.error: Optional[str] = None
+
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self.on_change: Optional[Callable[["IngestionJob"], None]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "IngestionJob":
+        """Rebuild a job from a stored ingestion_jobs row."""
+        (
+            job_id,
+            table_name,
+            status,
+            rows_processed,
+            error,
+            created_at,
+            started_at,
+            finished_at,
+        ) = row
+
+        job = cls(table_name)
+        job.job_id = job_id
+        job.status = status
+        job.rows_processed = rows_processed
+        job.error = error
+        job.created_at = created_at
+        job.started_at = started_at
+        job.finished_at = finished_at
+        return job
+
+    def start(self) -> None:
+        """Mark the job as running."""
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+        self._changed()
+
+    def add_rows(self, rows: int) -> None:
+        """Add to the number of rows processed."""
+        with self._lock:
+            self.rows_processed += rows
+        self._changed()
+
+    def finish(self, success: bool, error: Optional[str] = None) -> None:
+        """Mark the job as succeeded or failed."""
+        with self._lock:
+            self.status = "succeeded" if success else "failed"
+            self.error = error
+            self.finished_at = time.time()
+        self._changed()
+
+    def _changed(self) -> None:
+        # Listeners may do I/O, so they run outside the lock
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def is_finished(self) -> bool:
+        """Return True once the job has succeeded or failed."""
+        return self.finished_at is not None
+
+    def throughput(self) -> float:
+        """Return the rows processed per second since the job started."""
+        with self._lock:
+            if self.started_at is None:
+                return 0.0
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            return self.rows_processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """Return the job as a JSON-serializable dictionary."""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "rows_per_sec": round(self.throughput(), 1),
+            "error": self.error,
+        }
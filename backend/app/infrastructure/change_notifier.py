@@ -0,0 +1,52 @@
+# app/infrastructure/change_notifier.py
+import threading
+from datetime import datetime
+from typing import Callable
+
+ChangeListener = Callable[[str, datetime, datetime], None]
+
+
+class ChangeNotifier:
+    """
+    Tells caches and aggregates which time range of a user's data has changed.
+
+    Methods:
+        subscribe(listener: ChangeListener) -> None:
+            Register a listener called with (table_name, start, end) after each change.
+
+        unsubscribe(listener: ChangeListener) -> None:
+            Remove a listener, if it was registered.
+
+        publish(table_name: str, start: datetime, end: datetime) -> None:
+            Tell every listener that rows between start and end were written or deleted.
+    """
+
+    def __init__(self):
+        self._listeners: list[ChangeListener] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """Register a listener called with (table_name, start, end) after each change."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ChangeListener) -> None:
+        """Remove a listener, if it was registered."""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish(self, table_name: str, start: datetime, end: datetime) -> None:
+        """Tell every listener that rows between start and end were written or deleted.
+
+        A failing listener is reported and skipped so it cannot fail the upload
+        or stop the others from hearing about the change.
+        """
+        with self._lock:
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(table_name, start, end)
+            except Exception as e:
+                print(f"Change listener failed: {e}")
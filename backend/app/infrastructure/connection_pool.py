@@ -0,0 +1,219 @@
+# app/infrastructure/connection_pool.py
+import threading
+import time
+from typing import Callable, Optional
+
+from mysql.connector import Error
+
+
+class PooledConnection:
+    """
+    A connection checked out of a ConnectionPool.
+
+    It behaves like the underlying connection, except that close() checks it
+    back into the pool instead of closing it. It can also be used as a context
+    manager. A PooledConnection that is garbage collected without being closed
+    is counted as leaked, and its connection is closed rather than reused.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw):
+        self._pool = pool
+        self._raw = raw
+        self._closed = False
+
+    @property
+    def raw(self):
+        """The underlying database connection."""
+        return self._raw
+
+    def close(self) -> None:
+        """Check the connection back into the pool. Closing twice does nothing."""
+        if not self._closed:
+            self._closed = True
+            self._pool.release(self._raw)
+
+    def __getattr__(self, name):
+        # Only called for names not set on the proxy itself
+        if self.__dict__.get("_closed", True):
+            raise Error("Connection was already returned to the pool.")
+        return getattr(self.__dict__["_raw"], name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            if not self._closed:
+                self._closed = True
+                self._pool.discard(self._raw, leaked=True)
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    A fixed-size pool of database connections.
+
+    Attributes:
+        size (int): The most connections open at the same time.
+        wait_timeout (float): Seconds acquire() waits for a free connection.
+        idle_timeout (float): Seconds an unused connection is kept before it is closed.
+
+    Methods:
+        acquire() -> Optional[PooledConnection]:
+            Check out a connection, opening one if there is room.
+
+        release(raw) -> None:
+            Check a connection back in, rolling back anything left uncommitted.
+
+        discard(raw, leaked: bool = False) -> None:
+            Close a checked out connection and free its place in the pool.
+
+        stats() -> dict:
+            Return the pool's counters.
+
+        close_all() -> None:
+            Close every idle connection.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        size: int = 10,
+        wait_timeout: float = 5.0,
+        idle_timeout: float = 300.0,
+    ):
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+
+        self._factory = factory
+        self._idle: list[tuple[object, float]] = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+        self._counters = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "leaked": 0,
+            "evicted": 0,
+        }
+
+    def acquire(self) -> Optional[PooledConnection]:
+        """Check out a connection, opening one if there is room.
+
+        Returns None if no connection frees up within wait_timeout or the new
+        connection is not usable. Errors from opening a connection are raised.
+        """
+        with self._condition:
+            self._evict_idle()
+
+            if not self._idle and self._in_use >= self.size:
+                self._counters["waits"] += 1
+                deadline = time.monotonic() + self.wait_timeout
+                while not self._idle and self._in_use >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        print("Timed out waiting for a database connection.")
+                        return None
+                    self._condition.wait(remaining)
+
+            self._in_use += 1
+            self._counters["checkouts"] += 1
+            # Most recently used first, so rarely needed connections age out
+            raw = self._idle.pop()[0] if self._idle else None
+
+        if raw is not None and not self._is_usable(raw):
+            self._close_quietly(raw)
+            raw = None
+            with self._condition:
+                self._counters["evicted"] += 1
+
+        if raw is None:
+            try:
+                raw = self._factory()
+            except Exception:
+                self._free_slot()
+                raise
+
+            if raw is None:
+                self._free_slot()
+                return None
+
+            with self._condition:
+                self._counters["created"] += 1
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw) -> None:
+        """Check a connection back in, rolling back anything left uncommitted."""
+        try:
+            if getattr(raw, "in_transaction", False):
+                raw.rollback()
+        except Error:
+            self.discard(raw)
+            return
+
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append((raw, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, raw, leaked: bool = False) -> None:
+        """Close a checked out connection and free its place in the pool."""
+        self._close_quietly(raw)
+        with self._condition:
+            if leaked:
+                self._counters["leaked"] += 1
+        self._free_slot()
+
+    def stats(self) -> dict:
+        """Return the pool's counters."""
+        with self._condition:
+            return {
+                **self._counters,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "size": self.size,
+            }
+
+    def close_all(self) -> None:
+        """Close every idle connection."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def _evict_idle(self) -> None:
+        """Close connections that have been idle for longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        # The list is ordered by check-in time, oldest first
+        while self._idle and self._idle[0][1] < cutoff:
+            raw, _ = self._idle.pop(0)
+            self._counters["evicted"] += 1
+            self._close_quietly(raw)
+
+    def _free_slot(self) -> None:
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _is_usable(raw) -> bool:
+        try:
+            return bool(raw.is_connected())
+        except Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
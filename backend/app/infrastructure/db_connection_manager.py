@@ -1,29 +1,215 @@
 # app/infrastructure/db_connection_manager.py
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
 
 import mysql.connector
 from dotenv import load_dotenv
 from mysql.connector import Error
 
+from backend.app.infrastructure.connection_pool import ConnectionPool
+from backend.app.infrastructure.sql_dialect import SqlDialect, get_dialect
+from backend.app.infrastructure.sqlite_connection import SqliteConnection
+
 load_dotenv()
 
+DEFAULT_SQLITE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "../../../database/app.sqlite3"
+)
+
 
 class DbConnectionManager:
+    """
+    Hands out database connections from a pool shared by every repository.
+
+    DB_BACKEND picks the database: "mysql" (the default) connects to the
+    server in the DB_* variables, "sqlite" opens the embedded database file
+    at SQLITE_PATH in-process. Both kinds of connection take the same MySQL
+    statements; see SqlDialect.
+
+    The pool is configured with DB_POOL_SIZE (0 turns pooling off),
+    DB_POOL_TIMEOUT (seconds to wait for a free connection) and
+    DB_POOL_IDLE_SECONDS (how long an unused connection is kept open).
+    Connections opened with different options get separate pools.
+
+    Read-only work can go to a replica: DB_REPLICA_HOST (with optional
+    DB_REPLICA_PORT, DB_REPLICA_USER, DB_REPLICA_PASSWORD and
+    DB_REPLICA_DATABASE, defaulting to the primary's) on MySQL, or the file at
+    SQLITE_REPLICA_PATH on SQLite. Without one, reads use the primary. After a
+    write, pin_to_primary keeps a user's reads on the primary for
+    DB_REPLICA_PIN_SECONDS, so they see the write before the replica has it.
+    Pins live in this process only: with several worker processes, a read
+    served by another worker can still go to a lagging replica.
+    """
+
+    _pools: dict[tuple, ConnectionPool] = {}
+    _lock = threading.Lock()
+
+    # Keys whose reads stay on the primary, with when that ends (time.monotonic)
+    _pins: dict[str, float] = {}
+
     @staticmethod
-    def get_connection():
-        """Establish and return a connection to the MySQL database."""
+    def get_connection(
+        readonly: bool = False, pin_key: Optional[str] = None, **options
+    ):
+        """Establish and return a connection to the configured database.
+
+        With readonly=True the connection comes from the replica, if one is
+        configured and pin_key is not pinned to the primary. Extra keyword
+        options (e.g. allow_local_infile=True) are passed through to
+        mysql.connector.connect; SQLite ignores them. Calling close() on the
+        returned connection checks it back into the pool.
+        """
         try:
-            DB_CONFIG = {
-                "host": os.getenv("DB_HOST"),
-                "port": os.getenv("DB_PORT"),
-                "user": os.getenv("DB_USER"),
-                "password": os.getenv("DB_PASSWORD"),
-                "database": os.getenv("DB_DATABASE"),
-                "ssl_disabled": True,  # Change to True if you want to disable SSL
-            }
-            connection = mysql.connector.connect(**DB_CONFIG)
-            if connection.is_connected():
-                return connection
+            DB_CONFIG = None
+            if readonly and not DbConnectionManager._is_pinned(pin_key):
+                DB_CONFIG = DbConnectionManager._replica_config()
+            if DB_CONFIG is None:
+                DB_CONFIG = DbConnectionManager._primary_config()
+            DB_CONFIG.update(options)
+
+            pool_size = int(os.getenv("DB_POOL_SIZE", "10"))
+            if pool_size <= 0:
+                return DbConnectionManager._open(DB_CONFIG)
+
+            return DbConnectionManager._get_pool(DB_CONFIG, pool_size).acquire()
         except Error as e:
             print(f"Error connecting to the database: {e}")
         return None
+
+    @staticmethod
+    def pin_to_primary(key: str, seconds: Optional[float] = None) -> None:
+        """Send key's read-only work to the primary for a while after a write.
+
+        Without seconds, DB_REPLICA_PIN_SECONDS is used (10 by default). The
+        pin only holds for reads made by this process.
+        """
+        if seconds is None:
+            seconds = float(os.getenv("DB_REPLICA_PIN_SECONDS", "10"))
+
+        now = time.monotonic()
+        with DbConnectionManager._lock:
+            pins = DbConnectionManager._pins
+            # Forget the pins that have run out
+            for expired in [k for k, until in pins.items() if until <= now]:
+                del pins[expired]
+
+            if seconds > 0:
+                pins[key] = max(now + seconds, pins.get(key, 0))
+
+    @staticmethod
+    def dialect() -> SqlDialect:
+        """Return the SQL dialect of the configured backend."""
+        return get_dialect(os.getenv("DB_BACKEND", "mysql"))
+
+    @staticmethod
+    @contextmanager
+    def connection(**options):
+        """Check out a connection for the length of a with block.
+
+        Yields None if no connection is available.
+        """
+        connection = DbConnectionManager.get_connection(**options)
+        try:
+            yield connection
+        finally:
+            if connection is not None:
+                connection.close()
+
+    @staticmethod
+    def pool_stats() -> dict:
+        """Return the counters of every pool, added together."""
+        with DbConnectionManager._lock:
+            pools = list(DbConnectionManager._pools.values())
+
+        totals = {}
+        for pool in pools:
+            for name, value in pool.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    @staticmethod
+    def close_all() -> None:
+        """Close every idle connection and forget the pools and pins."""
+        with DbConnectionManager._lock:
+            pools = list(DbConnectionManager._pools.values())
+            DbConnectionManager._pools.clear()
+            DbConnectionManager._pins.clear()
+
+        for pool in pools:
+            pool.close_all()
+
+    @staticmethod
+    def _primary_config() -> dict:
+        if DbConnectionManager.dialect().name == "sqlite":
+            return {
+                "backend": "sqlite",
+                "database": os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH),
+            }
+
+        return {
+            "host": os.getenv("DB_HOST"),
+            "port": os.getenv("DB_PORT"),
+            "user": os.getenv("DB_USER"),
+            "password": os.getenv("DB_PASSWORD"),
+            "database": os.getenv("DB_DATABASE"),
+            "ssl_disabled": True,  # Change to True if you want to disable SSL
+        }
+
+    @staticmethod
+    def _replica_config() -> Optional[dict]:
+        """Return the replica's connection settings, or None without a replica."""
+        if DbConnectionManager.dialect().name == "sqlite":
+            path = os.getenv("SQLITE_REPLICA_PATH")
+            if not path:
+                return None
+            return {"backend": "sqlite", "database": path, "readonly": True}
+
+        host = os.getenv("DB_REPLICA_HOST")
+        if not host:
+            return None
+
+        config = DbConnectionManager._primary_config()
+        config["host"] = host
+        for name in ("port", "user", "password", "database"):
+            value = os.getenv(f"DB_REPLICA_{name.upper()}")
+            if value:
+                config[name] = value
+        return config
+
+    @staticmethod
+    def _is_pinned(key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with DbConnectionManager._lock:
+            return DbConnectionManager._pins.get(key, 0) > time.monotonic()
+
+    @staticmethod
+    def _get_pool(config: dict, size: int) -> ConnectionPool:
+        key = tuple(sorted(config.items()))
+
+        with DbConnectionManager._lock:
+            pool = DbConnectionManager._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    lambda: DbConnectionManager._open(config),
+                    size=size,
+                    wait_timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+                    idle_timeout=float(os.getenv("DB_POOL_IDLE_SECONDS", "300")),
+                )
+                DbConnectionManager._pools[key] = pool
+            return pool
+
+    @staticmethod
+    def _open(config: dict):
+        if config.get("backend") == "sqlite":
+            return SqliteConnection(
+                config["database"], readonly=config.get("readonly", False)
+            )
+
+        connection = mysql.connector.connect(**config)
+        if connection.is_connected():
+            return connection
+        return None
@@ -0,0 +1,5 @@
+# app/infrastructure/file_formats.py
+
+# Arrow IPC (Feather) files, which are memory-mapped rather than parsed, both
+# when uploaded and when the models read a dataset
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
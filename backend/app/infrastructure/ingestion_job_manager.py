@@ -0,0 +1,121 @@
+# app/infrastructure/ingestion_job_manager.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Optional
+
+from backend.app.entities.ingestion_job import IngestionJob
+
+if TYPE_CHECKING:
+    from backend.app.repositories.ingestion_job_repo import IngestionJobRepo
+
+
+class IngestionJobManager:
+    """
+    Runs data uploads on a pool of worker threads so requests can return right away.
+
+    Jobs run in the process that accepted them. When a store is given, every
+    change to a job is saved to it, so a status request handled by another
+    server process can still find the job.
+
+    Attributes:
+        max_workers (int): The number of uploads that can run at the same time.
+        job_ttl (int): Seconds a finished job is kept around for polling.
+        store (Optional[IngestionJobRepo]): Where jobs are shared between processes.
+
+    Methods:
+        submit(table_name: str, work: Callable[[IngestionJob], bool]) -> IngestionJob:
+            Queue work for a user and return its job.
+
+        get(job_id: str) -> Optional[IngestionJob]:
+            Return the job with the given id from this process or the store.
+
+        shutdown(wait: bool = True) -> None:
+            Stop accepting jobs and optionally wait for running ones.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        job_ttl: int = 3600,
+        store: Optional["IngestionJobRepo"] = None,
+    ):
+        self.max_workers = max_workers
+        self.job_ttl = job_ttl
+        self.store = store
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ingest"
+        )
+        self._jobs: dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, table_name: str, work: Callable[[IngestionJob], bool]
+    ) -> IngestionJob:
+        """Queue work for a user and return its job.
+
+        The work callable receives the job so it can report progress with
+        job.add_rows, and returns True on success.
+        """
+        job = IngestionJob(table_name)
+
+        with self._lock:
+            self._prune_finished()
+            self._jobs[job.job_id] = job
+
+        if self.store is not None:
+            job.on_change = self._save
+            self._save(job)
+            try:
+                self.store.delete_finished_before(time.time() - self.job_ttl)
+            except Exception as e:
+                print(f"Error: {e}")
+
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Return the job with the given id, if it is still known."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        # Another server process may have accepted the upload
+        if job is None and self.store is not None:
+            try:
+                job = self.store.get(job_id)
+            except Exception as e:
+                print(f"Error: {e}")
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: IngestionJob, work: Callable[[IngestionJob], bool]) -> None:
+        job.start()
+        try:
+            if work(job):
+                job.finish(True)
+            else:
+                job.finish(False, "Error uploading data.")
+        except Exception as e:
+            print(f"Ingestion job {job.job_id} failed: {e}")
+            job.finish(False, str(e))
+
+    def _save(self, job: IngestionJob) -> None:
+        # A failed save must not fail the upload itself
+        try:
+            self.store.save(job)
+        except Exception as e:
+            print(f"Error: {e}")
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.is_finished() and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
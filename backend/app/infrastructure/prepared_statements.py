@@ -0,0 +1,96 @@
+# app/infrastructure/prepared_statements.py
+import threading
+import weakref
+
+from mysql.connector import Error
+
+
+class PreparedStatements:
+    """
+    Server-side prepared statements, kept with the connection they were prepared on.
+
+    A statement is prepared the first time it runs on a connection. The pool
+    hands the same connections out again, so later runs send only the
+    parameters, in a single round trip. mysql.connector only reuses a prepared
+    statement for the identical string object, so queries should be module
+    level constants. SQLite cursors ignore the prepared option; sqlite3 keeps
+    its own per-connection cache of compiled statements.
+
+    Methods:
+        fetch_one(connection, query: str, params: tuple, dictionary: bool = False):
+            Run a prepared query and return its first row, or None.
+
+        execute(connection, query: str, params: tuple) -> int:
+            Run a prepared statement and return the number of rows it changed.
+
+        clear() -> None:
+            Forget every cached statement.
+    """
+
+    # Cursors by underlying connection, then by query and row type. The
+    # entries go when the connection is garbage collected.
+    _cursors: "weakref.WeakKeyDictionary[object, dict]" = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def fetch_one(connection, query: str, params: tuple, dictionary: bool = False):
+        """Run a prepared query and return its first row, or None."""
+        cursor = PreparedStatements._cursor(connection, query, dictionary)
+        try:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            # The statement can only run again once its result is read to the end
+            cursor.fetchall()
+            return row
+        except Error:
+            PreparedStatements._forget(connection, query, dictionary)
+            raise
+
+    @staticmethod
+    def execute(connection, query: str, params: tuple) -> int:
+        """Run a prepared statement and return the number of rows it changed."""
+        cursor = PreparedStatements._cursor(connection, query, False)
+        try:
+            cursor.execute(query, params)
+            return cursor.rowcount
+        except Error:
+            PreparedStatements._forget(connection, query, False)
+            raise
+
+    @staticmethod
+    def clear() -> None:
+        """Forget every cached statement."""
+        with PreparedStatements._lock:
+            PreparedStatements._cursors.clear()
+
+    @staticmethod
+    def _cursor(connection, query: str, dictionary: bool):
+        # Pooled connections are keyed by the connection they wrap, which
+        # outlives each checkout
+        raw = getattr(connection, "raw", connection)
+        key = (query, dictionary)
+
+        with PreparedStatements._lock:
+            cursors = PreparedStatements._cursors.setdefault(raw, {})
+            cursor = cursors.get(key)
+
+        if cursor is None:
+            cursor = connection.cursor(prepared=True, dictionary=dictionary)
+            with PreparedStatements._lock:
+                cursors[key] = cursor
+        return cursor
+
+    @staticmethod
+    def _forget(connection, query: str, dictionary: bool) -> None:
+        """Drop a cursor left in an unknown state by an error."""
+        raw = getattr(connection, "raw", connection)
+        with PreparedStatements._lock:
+            cursor = PreparedStatements._cursors.get(raw, {}).pop(
+                (query, dictionary), None
+            )
+
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
@@ -0,0 +1,84 @@
+# app/infrastructure/range_filter.py
+import re
+from typing import Optional, Union
+
+import numpy as np
+
+Number = Union[int, float]
+
+# "min-max", where either end may be negative or have decimals
+_RANGE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def parse_range(text: str) -> Optional[tuple[Number, Number]]:
+    """Parse a "min-max" range string, or return None if it is not one."""
+
+    match = _RANGE.match(str(text))
+    if match is None:
+        return None
+    low, high = (_number(end) for end in match.groups())
+    return (low, high) if low <= high else None
+
+
+def is_range_choice(choices: list[str]) -> bool:
+    """Return whether every choice is a "min-max" range, as numeric columns use."""
+
+    return bool(choices) and all(parse_range(choice) for choice in choices)
+
+
+def parse_ranges(range_strings: list[str]) -> list[tuple[Number, Number]]:
+    """Parse "min-max" range strings into merged ranges, skipping invalid ones."""
+
+    ranges = []
+    for range_str in range_strings:
+        parsed = parse_range(range_str)
+        if parsed is None:
+            print(f"Invalid range format: {range_str}")
+            continue
+        ranges.append(parsed)
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges: list[tuple[Number, Number]]) -> list[tuple[Number, Number]]:
+    """
+    Sort inclusive (low, high) ranges and merge the ones that overlap or touch.
+
+    The result matches the same values as the input with fewer, disjoint
+    ranges. Ranges with a gap between them, like 18-26 and 27-35, stay apart
+    so a value such as 26.5 still matches neither.
+    """
+
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def in_ranges(values: np.ndarray, ranges: list[tuple[Number, Number]]) -> np.ndarray:
+    """
+    Return a mask of the values that fall in one of the inclusive ranges.
+
+    The ranges are merged first, then each value is looked up with one binary
+    search over the range starts, so there is no loop over the ranges. NaN
+    never matches.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    ranges = merge_ranges(ranges)
+    if not ranges:
+        return np.zeros(len(values), dtype=bool)
+
+    lows = np.array([low for low, _ in ranges], dtype=np.float64)
+    highs = np.array([high for _, high in ranges], dtype=np.float64)
+
+    # The last range starting at or below each value is the only one it can be in
+    index = np.searchsorted(lows, values, side="right") - 1
+    inside = index >= 0
+    return inside & (values <= highs[np.maximum(index, 0)])
+
+
+def _number(text: str) -> Number:
+    return float(text) if "." in text else int(text)
@@ -0,0 +1,158 @@
+# app/infrastructure/selection_write_buffer.py
+import threading
+from typing import Callable, Optional
+
+# A user's saved selection, as users table columns and their new values
+Selection = dict[str, Optional[str]]
+
+
+class SelectionWriteBuffer:
+    """
+    Saves users' selections in the background, so requests do not wait on the write.
+
+    Selections for the same user that arrive before the write are merged into
+    one UPDATE, and a selection that matches one still queued is not queued
+    again. Once written, the same selection is queued as usual, since another
+    server process may have changed the row since.
+
+    Attributes:
+        delay (float): Seconds to wait for more selections before writing.
+        max_attempts (int): Times a failing write is tried before it is dropped.
+
+    Methods:
+        submit(table_name: str, selection: Selection) -> bool:
+            Queue a selection for a user and return whether it needs writing.
+
+        flush(table_name: Optional[str] = None) -> int:
+            Write the queued selections now, for one user or all, and return how many.
+
+        shutdown() -> None:
+            Stop the background writer after writing what is queued.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str, Selection], bool],
+        delay: float = 0.5,
+        max_attempts: int = 3,
+    ):
+        self.delay = delay
+        self.max_attempts = max_attempts
+
+        self._write = write
+        self._pending: dict[str, Selection] = {}
+        self._attempts: dict[str, int] = {}
+        # Users whose selection is being written right now
+        self._writing: set[str] = set()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def submit(self, table_name: str, selection: Selection) -> bool:
+        """Queue a selection for a user and return whether it needs writing."""
+        with self._condition:
+            pending = self._pending.get(table_name)
+            if pending is not None and all(
+                column in pending and pending[column] == value
+                for column, value in selection.items()
+            ):
+                return False
+
+            if pending is None:
+                self._pending[table_name] = dict(selection)
+            else:
+                pending.update(selection)
+
+            stopped = self._stopped
+            if not stopped and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="selection-writer", daemon=True
+                )
+                self._thread.start()
+            elif not stopped:
+                self._condition.notify_all()
+
+        # Once shut down there is no writer left, so write it here
+        if stopped:
+            self.flush(table_name)
+        return True
+
+    def flush(self, table_name: Optional[str] = None) -> int:
+        """Write the queued selections now, for one user or all, and return how many."""
+        with self._condition:
+            # A write already under way for this user has to land first
+            while table_name in self._writing or (
+                table_name is None and self._writing
+            ):
+                self._condition.wait()
+
+            if table_name is None:
+                names = list(self._pending)
+            else:
+                names = [table_name] if table_name in self._pending else []
+            batch = self._take(names)
+
+        self._write_batch(batch)
+        return len(batch)
+
+    def shutdown(self) -> None:
+        """Stop the background writer after writing what is queued."""
+        with self._condition:
+            self._stopped = True
+            thread = self._thread
+            self._condition.notify()
+
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+
+            # Let a burst of selections settle into one write per user
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped, timeout=self.delay)
+                if self._stopped:
+                    return
+                batch = self._take(list(self._pending))
+
+            self._write_batch(batch)
+
+    def _take(self, names: list[str]) -> dict[str, Selection]:
+        """Move users' pending selections to the writing set. Caller holds the lock."""
+        batch = {name: self._pending.pop(name) for name in names}
+        self._writing.update(batch)
+        return batch
+
+    def _write_batch(self, batch: dict[str, Selection]) -> None:
+        for table_name, selection in batch.items():
+            try:
+                written = self._write(table_name, selection)
+            except Exception as e:
+                print(f"Error: {e}")
+                written = False
+
+            with self._condition:
+                self._writing.discard(table_name)
+
+                if written:
+                    self._attempts.pop(table_name, None)
+                else:
+                    attempts = self._attempts.get(table_name, 0) + 1
+                    if attempts < self.max_attempts and not self._stopped:
+                        self._attempts[table_name] = attempts
+                        # Newer selections win over the one that failed
+                        self._pending[table_name] = {
+                            **selection,
+                            **self._pending.get(table_name, {}),
+                        }
+                    else:
+                        self._attempts.pop(table_name, None)
+                        print(f"Dropped the selection update for {table_name}.")
+
+                self._condition.notify_all()
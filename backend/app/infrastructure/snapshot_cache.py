@@ -0,0 +1,199 @@
+# app/infrastructure/snapshot_cache.py
+import glob
+import hashlib
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+SNAPSHOT_EXTENSION = ".feather"
+VERSION_EXTENSION = ".version"
+
+# The version of a dataset no upload has changed yet
+INITIAL_VERSION = "0"
+
+
+class SnapshotCache:
+    """
+    Keeps a columnar snapshot of each user's dataset on disk between uploads.
+
+    Snapshots are uncompressed Feather (Arrow IPC) files named by the dataset
+    version they hold. Uploads bump the version, so a snapshot is never served
+    after its data changed; reads memory-map the file, so repeat requests need
+    neither the database nor a copy of the data. The least recently read
+    snapshots are deleted once the files take more than max_bytes. Versions
+    are kept in the directory too, so processes sharing it agree on them.
+
+    Attributes:
+        directory (str): Where the snapshots and versions are stored.
+        max_bytes (int): The disk budget for all snapshots together.
+
+    Methods:
+        version(table_name: str) -> str:
+            Return the current version of a user's dataset.
+
+        bump(table_name: str) -> str:
+            Give a user's dataset a new version, so its snapshot is rebuilt.
+
+        on_change(table_name: str, start: datetime, end: datetime) -> None:
+            ChangeNotifier listener that bumps the version of the changed dataset.
+
+        get(table_name: str, version: str) -> Optional[pa.Table]:
+            Return the memory-mapped snapshot of a version, if there is one.
+
+        put(table_name: str, version: str, table: pa.Table) -> pa.Table:
+            Store a snapshot of a version and return it memory-mapped.
+
+        stats() -> dict:
+            Return counters of hits, misses, snapshots written and evictions.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "written": 0, "evicted": 0}
+
+    def version(self, table_name: str) -> str:
+        """Return the current version of a user's dataset."""
+        try:
+            with open(self._version_path(table_name)) as file:
+                return file.read().strip() or INITIAL_VERSION
+        except FileNotFoundError:
+            return INITIAL_VERSION
+
+    def bump(self, table_name: str) -> str:
+        """Give a user's dataset a new version, so its snapshot is rebuilt.
+
+        Versions are unique rather than counted, so two processes bumping at
+        once cannot both land on the same number.
+        """
+        version = uuid.uuid4().hex
+        self._write_atomically(
+            self._version_path(table_name), lambda path: _write_text(path, version)
+        )
+        self._remove_snapshots(table_name, keep=None)
+        return version
+
+    def on_change(self, table_name: str, start: datetime, end: datetime) -> None:
+        """ChangeNotifier listener that bumps the version of the changed dataset."""
+        self.bump(table_name)
+
+    def get(self, table_name: str, version: str) -> Optional[pa.Table]:
+        """Return the memory-mapped snapshot of a version, if there is one."""
+        path = self._snapshot_path(table_name, version)
+        try:
+            table = feather.read_table(path, memory_map=True)
+            # The modification time doubles as the last read, for eviction
+            os.utime(path)
+        except (FileNotFoundError, pa.ArrowInvalid, OSError):
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return table
+
+    def put(self, table_name: str, version: str, table: pa.Table) -> pa.Table:
+        """Store a snapshot of a version and return it memory-mapped.
+
+        A dataset bigger than the whole budget is returned as it is, uncached.
+        """
+        if table.nbytes > self.max_bytes:
+            return table
+
+        path = self._snapshot_path(table_name, version)
+        self._write_atomically(
+            path,
+            lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"),
+        )
+        self._count("written")
+
+        # The dataset may have changed while the snapshot was being built
+        if self.version(table_name) != version:
+            self._remove(path)
+            return table
+
+        self._remove_snapshots(table_name, keep=path)
+        self._evict(keep=path)
+        return feather.read_table(path, memory_map=True)
+
+    def stats(self) -> dict:
+        """Return counters of hits, misses, snapshots written and evictions."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _evict(self, keep: str) -> None:
+        """Delete the least recently read snapshots until they fit the budget."""
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, f"*{SNAPSHOT_EXTENSION}")):
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshots.append((info.st_mtime, info.st_size, path))
+
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, path in sorted(snapshots):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
+            self._count("evicted")
+
+    def _remove_snapshots(self, table_name: str, keep: Optional[str]) -> None:
+        """Delete a user's snapshots of versions other than keep."""
+        pattern = os.path.join(
+            self.directory, f"{self._key(table_name)}-*{SNAPSHOT_EXTENSION}"
+        )
+        for path in glob.glob(pattern):
+            if path != keep:
+                self._remove(path)
+
+    def _write_atomically(self, path: str, write) -> None:
+        # Readers in any process see the old file or the new one, never part of one
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.{time.time_ns()}.tmp"
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            self._remove(tmp)
+
+    def _snapshot_path(self, table_name: str, version: str) -> str:
+        return os.path.join(
+            self.directory, f"{self._key(table_name)}-{version}{SNAPSHOT_EXTENSION}"
+        )
+
+    def _version_path(self, table_name: str) -> str:
+        return os.path.join(
+            self.directory, f"{self._key(table_name)}{VERSION_EXTENSION}"
+        )
+
+    @staticmethod
+    def _key(table_name: str) -> str:
+        # Table names are emails; hashing keeps them out of the file system
+        return hashlib.sha256(table_name.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w") as file:
+        file.write(text)
@@ -0,0 +1,147 @@
+# app/infrastructure/sql_dialect.py
+import re
+from functools import lru_cache
+
+# String literals are matched first so nothing inside quotes is rewritten
+_PLACEHOLDER = re.compile(r"('(?:[^']|'')*')|%s")
+
+_ENUM = re.compile(r"\bENUM\s*\((?:\s*'(?:[^']|'')*'\s*,?)*\s*\)", re.IGNORECASE)
+
+_AUTO_INCREMENT = re.compile(
+    r"\bINT(?:EGER)?\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE
+)
+
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+
+_VALUES_REFERENCE = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+_GREATEST = re.compile(r"\bGREATEST\s*\(", re.IGNORECASE)
+
+_LEAST = re.compile(r"\bLEAST\s*\(", re.IGNORECASE)
+
+_CREATE_TABLE = re.compile(
+    r"^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(`[^`]+`|\w+)", re.IGNORECASE
+)
+
+_INLINE_INDEX = re.compile(r",\s*INDEX\s+(`[^`]+`|\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+
+_SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES\s*$", re.IGNORECASE)
+
+_COLUMN_TYPES = re.compile(
+    r"SELECT\s+COLUMN_NAME\s*,\s*COLUMN_TYPE\s+FROM\s+INFORMATION_SCHEMA\.COLUMNS\s+"
+    r"WHERE\s+TABLE_SCHEMA\s*=\s*DATABASE\(\)\s+AND\s+TABLE_NAME\s*=\s*\?"
+    r"(?:\s+ORDER\s+BY\s+ORDINAL_POSITION)?",
+    re.IGNORECASE,
+)
+
+
+class SqlDialect:
+    """
+    The SQL differences between the supported database backends.
+
+    The repositories write MySQL. Other backends translate each statement
+    before it runs and tell the repositories which MySQL features they lack.
+
+    Attributes:
+        name (str): The backend's name, as set in DB_BACKEND.
+        supports_enum (bool): Whether ENUM columns can be declared and altered.
+        supports_load_data (bool): Whether LOAD DATA LOCAL INFILE is available.
+        supports_partitions (bool): Whether tables can be partitioned by range.
+
+    Methods:
+        translate(query: str) -> str:
+            Rewrite a MySQL statement for this backend.
+
+        statements(query: str) -> list[str]:
+            Rewrite a MySQL statement as the statements this backend runs for it.
+    """
+
+    name = "mysql"
+    supports_enum = True
+    supports_load_data = True
+    supports_partitions = True
+
+    def translate(self, query: str) -> str:
+        """Rewrite a MySQL statement for this backend."""
+        return query
+
+    def statements(self, query: str) -> list[str]:
+        """Rewrite a MySQL statement as the statements this backend runs for it.
+
+        Only the first statement takes the query's parameters.
+        """
+        return [self.translate(query)]
+
+
+class SqliteDialect(SqlDialect):
+    """MySQL statements rewritten for SQLite."""
+
+    name = "sqlite"
+    supports_enum = False
+    supports_load_data = False
+    supports_partitions = False
+
+    def translate(self, query: str) -> str:
+        """Rewrite a MySQL statement for SQLite."""
+        return _translate_for_sqlite(query)
+
+    def statements(self, query: str) -> list[str]:
+        """Rewrite a MySQL statement for SQLite, moving inline indexes out of
+        CREATE TABLE into CREATE INDEX statements of their own."""
+        return list(_sqlite_statements(query))
+
+
+@lru_cache(maxsize=128)
+def _sqlite_statements(query: str) -> tuple[str, ...]:
+    table = _CREATE_TABLE.match(query)
+    indexes = _INLINE_INDEX.findall(query) if table else []
+    if not indexes:
+        return (_translate_for_sqlite(query),)
+
+    # IF NOT EXISTS also adds indexes missing from a table that already exists
+    return (
+        _translate_for_sqlite(_INLINE_INDEX.sub("", query)),
+        *(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table.group(1)} ({columns})"
+            for name, columns in indexes
+        ),
+    )
+
+
+@lru_cache(maxsize=512)
+def _translate_for_sqlite(query: str) -> str:
+    if _SHOW_TABLES.match(query):
+        return (
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+
+    # ENUM value lists are dropped before placeholders are rewritten
+    query = _ENUM.sub("TEXT", query)
+    query = _PLACEHOLDER.sub(lambda match: match.group(1) or "?", query)
+
+    query = _COLUMN_TYPES.sub(
+        "SELECT name, type FROM pragma_table_info(?) ORDER BY cid", query
+    )
+    query = _AUTO_INCREMENT.sub("INTEGER PRIMARY KEY", query)
+    query = _INSERT_IGNORE.sub("INSERT OR IGNORE", query)
+    query = _GREATEST.sub("MAX(", query)
+    query = _LEAST.sub("MIN(", query)
+
+    upsert = _ON_DUPLICATE_KEY.search(query)
+    if upsert:
+        # VALUES(col) in the update list becomes the row that failed to insert
+        update = _VALUES_REFERENCE.sub(r"excluded.\1", query[upsert.end() :])
+        query = f"{query[: upsert.start()]}ON CONFLICT DO UPDATE SET{update}"
+
+    return query
+
+
+DIALECTS = {dialect.name: dialect for dialect in (SqlDialect(), SqliteDialect())}
+
+
+def get_dialect(backend: str) -> SqlDialect:
+    """Return the dialect for a DB_BACKEND value, defaulting to MySQL."""
+    return DIALECTS.get((backend or "mysql").lower(), DIALECTS["mysql"])
@@ -0,0 +1,244 @@
+# app/infrastructure/sqlite_connection.py
+import sqlite3
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+from mysql.connector import Error
+
+from backend.app.infrastructure.sql_dialect import SqliteDialect
+
+# Tuned for a read-heavy dashboard on a single node: WAL lets readers run
+# alongside the one writer, and NORMAL sync is durable under WAL except for
+# the last transactions before a power loss
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,  # 64 MB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+BUSY_TIMEOUT = 30.0
+
+# The tables (and indexes) MySQL deployments create by hand
+BOOTSTRAP_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        firstname VARCHAR(255),
+        lastname VARCHAR(255),
+        email VARCHAR(255) NOT NULL,
+        password VARCHAR(255),
+        demographic_1 VARCHAR(255),
+        choice_1_demographic_1 VARCHAR(255),
+        choice_2_demographic_1 VARCHAR(255),
+        choice_3_demographic_1 VARCHAR(255),
+        choice_4_demographic_1 VARCHAR(255),
+        demographic_2 VARCHAR(255),
+        choice_1_demographic_2 VARCHAR(255),
+        choice_2_demographic_2 VARCHAR(255),
+        choice_3_demographic_2 VARCHAR(255),
+        choice_4_demographic_2 VARCHAR(255),
+        time VARCHAR(255)
+    )
+    """,
+    # Logins and saved selections look users up by email
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_email ON users (email)",
+]
+
+
+def _convert_datetime(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+# Columns declared DATETIME(...) or DATE come back as Python objects, like MySQL
+sqlite3.register_converter("DATETIME", _convert_datetime)
+sqlite3.register_converter("DATE", _convert_date)
+
+
+def _to_sqlite(value):
+    """Convert a parameter to a type SQLite stores; timestamps sort as text."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class SqliteCursor:
+    """
+    A cursor over a SqliteConnection with the mysql.connector cursor interface.
+
+    Statements are written for MySQL and translated by the SQLite dialect.
+    Errors are raised as mysql.connector.Error, so repositories handle both
+    backends the same way.
+    """
+
+    def __init__(
+        self, cursor: sqlite3.Cursor, dialect: SqliteDialect, dictionary: bool
+    ):
+        self._cursor = cursor
+        self._dialect = dialect
+        self._dictionary = dictionary
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    def execute(self, query: str, params=()) -> None:
+        statement, *extra_statements = self._dialect.statements(query)
+        try:
+            self._cursor.execute(
+                statement, tuple(_to_sqlite(value) for value in params or ())
+            )
+            for extra_statement in extra_statements:
+                self._cursor.execute(extra_statement)
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def executemany(self, query: str, seq_params) -> None:
+        try:
+            self._cursor.executemany(
+                self._dialect.translate(query),
+                (tuple(_to_sqlite(value) for value in params) for params in seq_params),
+            )
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        return self._as_dict(row) if self._dictionary and row is not None else row
+
+    def fetchmany(self, size: int = 1) -> list:
+        return self._rows(self._fetch(lambda: self._cursor.fetchmany(size)))
+
+    def fetchall(self) -> list:
+        return self._rows(self._fetch(self._cursor.fetchall))
+
+    def close(self) -> None:
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @staticmethod
+    def _fetch(fetch):
+        try:
+            return fetch()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def _rows(self, rows: list) -> list:
+        return [self._as_dict(row) for row in rows] if self._dictionary else rows
+
+    def _as_dict(self, row: tuple) -> dict:
+        return {desc[0]: value for desc, value in zip(self._cursor.description, row)}
+
+
+class SqliteConnection:
+    """
+    An embedded SQLite database behind the subset of the mysql.connector
+    connection interface the repositories use.
+
+    Attributes:
+        path (str): The database file.
+        readonly (bool): Whether writes are refused, as on a replica.
+
+    Methods:
+        cursor(dictionary: bool = False, **options) -> SqliteCursor:
+            Return a cursor whose statements are translated from MySQL.
+
+        commit() -> None:
+            Commit the current transaction.
+
+        rollback() -> None:
+            Roll back the current transaction.
+
+        is_connected() -> bool:
+            Whether the connection is still open.
+
+        close() -> None:
+            Close the connection.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self._dialect = SqliteDialect()
+
+        try:
+            # Pooled connections move between threads, but only one uses them at a time
+            self._connection = sqlite3.connect(
+                path,
+                timeout=BUSY_TIMEOUT,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                check_same_thread=False,
+            )
+            for name, value in PRAGMAS.items():
+                self._connection.execute(f"PRAGMA {name} = {value}")
+            for statement in BOOTSTRAP_TABLES:
+                self._connection.execute(statement)
+            if readonly:
+                # A replica only serves reads; a write sent here is a routing bug
+                self._connection.execute("PRAGMA query_only = ON")
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+        self._open = True
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._open and self._connection.in_transaction
+
+    def cursor(self, dictionary: bool = False, **options) -> SqliteCursor:
+        self._check_open()
+        return SqliteCursor(self._connection.cursor(), self._dialect, dictionary)
+
+    def commit(self) -> None:
+        self._check_open()
+        try:
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def rollback(self) -> None:
+        self._check_open()
+        try:
+            self._connection.rollback()
+        except sqlite3.Error as e:
+            raise Error(str(e)) from e
+
+    def is_connected(self) -> bool:
+        return self._open
+
+    def close(self) -> None:
+        if self._open:
+            self._open = False
+            self._connection.close()
+
+    def _check_open(self) -> None:
+        if not self._open:
+            raise Error("SQLite connection is closed.")
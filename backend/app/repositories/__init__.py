@@ -1,5 +1,6 @@
 # /app/repositories/__init__.py
 
 from .csv_file_repo import CsvFileRepo
+from .ingestion_job_repo import IngestionJobRepo
 from .sqlite_db_repo import SqliteDbRepo
 from .user_repo import UserRepo
@@ -1,15 +1,49 @@
 import csv
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from itertools import chain, combinations, islice
+from typing import Callable, Iterator, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from mysql.connector import Error
 from werkzeug.datastructures import FileStorage
 
 from backend.app.entities.user import User
+from backend.app.infrastructure.change_notifier import ChangeNotifier
 from backend.app.infrastructure.db_connection_manager import DbConnectionManager
-from backend.app.repositories.sqlite_db_repo import SqliteDbRepo
+from backend.app.infrastructure.file_formats import ARROW_EXTENSIONS
+from backend.app.infrastructure.range_filter import (
+    in_ranges,
+    is_range_choice,
+    parse_ranges,
+)
+from backend.app.infrastructure.snapshot_cache import SnapshotCache
+from backend.app.repositories.sqlite_db_repo import (
+    DEMOGRAPHIC_COLUMNS,
+    DISTINCT_VALUE_COLUMNS,
+    ROLLUP_COLUMNS,
+    ROLLUP_DEMOGRAPHICS,
+    SqliteDbRepo,
+)
 from backend.app.use_cases.FileRepositoryInterface import FileRepositoryInterface
 
+DEFAULT_BATCH_SIZE = 5000
+HASH_BLOCK_SIZE = 1024 * 1024
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+SHARD_EXTENSIONS = (".csv",) + PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
 
 class CsvFileRepo(FileRepositoryInterface):
     """
@@ -18,19 +52,34 @@ class CsvFileRepo(FileRepositoryInterface):
     Attributes:
         user (User): The user associated with the repository.
         file_path (str): The file path for the CSV file.
-        connection: The database connection object.
         table_name (str): The name of the table associated with the user.
         db_repo (SqliteDbRepo): The database repository instance.
+        batch_size (int): The number of rows sent per multi-row INSERT.
+        use_load_data (bool): Whether to try the LOAD DATA LOCAL INFILE fast path first.
+        chunk_size (Optional[int]): If set, uploads are parsed and written this many rows at a time.
+        on_progress (Optional[Callable[[int], None]]): Called with the row count of each chunk written.
+        skip_duplicates (bool): Whether uploads whose content hash is already in the ingest ledger are skipped.
+        dedupe_ids (bool): Whether rows whose id is already in the table are ignored.
+        archive_workers (int): The number of shards of a zip/tar upload loaded at the same time.
+        incremental (bool): Whether only rows newer than the user's high-water mark are ingested.
+        notifier (Optional[ChangeNotifier]): Told which time range changed after each import.
+        rollups (bool): Whether daily demographic rollup counts are updated with each import and read by get_group_counts; off with dedupe_ids.
+        partitioned (bool): Whether the table is kept partitioned by month, where the database supports it; off with dedupe_ids.
+        snapshots (Optional[SnapshotCache]): If set, datasets are read from versioned snapshots instead of the database.
+        last_import_stats (dict): Row count, duration and throughput of the last import.
 
     Methods:
-        __init__(user: User, file_path: str):
-            Initialize the file path and database connection.
+        __init__(user: User, file_path: str, batch_size=DEFAULT_BATCH_SIZE, use_load_data=False,
+                 chunk_size=None, on_progress=None, skip_duplicates=False, dedupe_ids=False,
+                 archive_workers=4, incremental=False, notifier=None, rollups=False,
+                 partitioned=False, snapshots=None):
+            Initialize the file path, database connection and ingestion options.
 
-        connect():
-            Establish a database connection.
+        connect(readonly: bool = False):
+            Check out a connection for a with block, from a replica for read-only work.
 
         import_csv_to_db(csv_file: FileStorage) -> bool:
-            Read the CSV file and import relevant data into the database.
+            Read the uploaded CSV, Parquet, Arrow IPC or zip/tar file and import relevant data into the database.
 
         save_data_to_csv() -> None:
             Save data from the specified table to a CSV file, including headers.
@@ -41,28 +90,86 @@ class CsvFileRepo(FileRepositoryInterface):
         get_headers() -> list[str]:
             Get the headers of the table.
 
+        get_distinct_values(header: str) -> list[str]:
+            Get the distinct values under a header of the table.
+
         get_data_for_time(time: str) -> None:
             Get the data for the specified time period.
 
         update_comparison_csv(demographics: list[str], choices: dict[str, list[str]], time: str) -> None:
             Update the comparison CSV file with the user's selections.
+
+        get_data() -> pd.DataFrame:
+            Read the whole table into a DataFrame, without a CSV file in between.
+
+        get_comparison_data(demographics: list[str], choices: dict[str, list[str]], time: str) -> pd.DataFrame:
+            Read the rows and columns matching the user's selections into a DataFrame.
+
+        get_group_counts(demographics: list[str], choices: dict[str, list[str]], time: str) -> pd.DataFrame:
+            Count the rows matching the user's selections per group, from the rollups when they are kept.
+
+        The two get_ methods read the table's snapshot when there is a snapshot
+        cache, so repeat requests between uploads do not query the database.
     """
-    def __init__(self, user: User, file_path: str):
+    def __init__(
+        self,
+        user: User,
+        file_path: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        use_load_data: bool = False,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        skip_duplicates: bool = False,
+        dedupe_ids: bool = False,
+        archive_workers: int = 4,
+        incremental: bool = False,
+        notifier: Optional[ChangeNotifier] = None,
+        rollups: bool = False,
+        partitioned: bool = False,
+        snapshots: Optional[SnapshotCache] = None,
+    ):
         """Initialize the file path and database connection."""
-        self.connection = None
         self.file_path = file_path
 
         self.user = user
         self.table_name = user.table_name
-        self.db_repo = SqliteDbRepo(user)
-
-    def connect(self):
-        self.connection = DbConnectionManager.get_connection()
+        self.db_repo = SqliteDbRepo(user, notifier=notifier)
+
+        self.batch_size = batch_size
+        self.use_load_data = use_load_data
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.skip_duplicates = skip_duplicates
+        self.dedupe_ids = dedupe_ids
+        self.archive_workers = archive_workers
+        self.incremental = incremental
+        self.notifier = notifier
+        # Rows dropped by INSERT IGNORE would still be counted in the rollups
+        if rollups and dedupe_ids:
+            print("Rollups are not kept when duplicate ids are ignored.")
+        self.rollups = rollups and not dedupe_ids
+        # A partitioned table's (id, timestamp) key lets INSERT IGNORE keep repeated ids
+        if partitioned and dedupe_ids:
+            print("Tables are not partitioned when duplicate ids are ignored.")
+        self.partitioned = partitioned and not dedupe_ids
+        self.snapshots = snapshots
+        self.last_import_stats = {}
+
+    def connect(self, readonly: bool = False):
+        """Check out a connection for a with block; it goes back to the pool after.
+
+        Reads may go to a replica, unless the user just uploaded.
+        """
+        if readonly:
+            return DbConnectionManager.connection(
+                readonly=True, pin_key=self.table_name
+            )
+        if self.use_load_data:
+            return DbConnectionManager.connection(allow_local_infile=True)
+        return DbConnectionManager.connection()
 
     def import_csv_to_db(self, csv_file: FileStorage) -> bool:
-        """Read the CSV file and import relevant data into the database."""
-
-        self.connect()
+        """Read the uploaded CSV, Parquet, Arrow IPC or zip/tar file and import relevant data into the database."""
 
         required_columns = [
             "gender",
@@ -74,66 +181,761 @@ class CsvFileRepo(FileRepositoryInterface):
         ]
         critical_columns = ["timestamp", "action_status"]
 
-        df = pd.read_csv(csv_file)
+        if self.dedupe_ids or self.incremental:
+            required_columns = ["id"] + required_columns
+
+        content_hash = None
+        if self.skip_duplicates:
+            content_hash = self._content_hash(csv_file)
+            if self.db_repo.has_ingested(content_hash):
+                print("This upload was already ingested. Skipping.")
+                self.last_import_stats = {
+                    "rows": 0,
+                    "seconds": 0.0,
+                    "rows_per_sec": 0.0,
+                    "duplicate": True,
+                }
+                return True
+
+        watermark = self.db_repo.get_watermark() if self.incremental else (None, None)
+
+        if self._upload_format(csv_file) == "archive":
+            return self._import_archive(
+                csv_file, required_columns, critical_columns, content_hash, watermark
+            )
 
-        df.columns = df.columns.str.lower()
+        chunks = self._read_upload(csv_file, required_columns)
+        first_chunk = next(chunks)
 
-        if not all(col in df.columns for col in critical_columns):
+        # Resolve the lower-cased column names once; later chunks reuse the mapping
+        lowered = {col.lower(): col for col in first_chunk.columns}
+
+        if not all(col in lowered for col in critical_columns):
             print("Critical columns missing. Operation aborted.")
             return False
 
-        available_columns = [col for col in required_columns if col in df.columns]
-        filtered_df = df[available_columns]
+        available_columns = [col for col in required_columns if col in lowered]
+        source_columns = [lowered[col] for col in available_columns]
 
-        try:
-            if self.connection is None:
-                print("No database connection available.")
-                return False
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("No database connection available.")
+                    return False
+
+                print(connection)
+                print(connection.is_connected())
+                if connection.is_connected():
+                    cursor = connection.cursor()
 
-            print(self.connection)
-            print(self.connection.is_connected())
-            if self.connection.is_connected():
-                cursor = self.connection.cursor()
-                self.db_repo.create_table()
-
-                for _, row in filtered_df.iterrows():
-                    # Prepare values for only the columns present in the CSV
-                    values = tuple(row[col] for col in available_columns)
-                    columns_str = ", ".join(available_columns)
-                    placeholders = ", ".join(["%s"] * len(available_columns))
-
-                    cursor.execute(
-                        f"INSERT INTO `{self.table_name}` ({columns_str}) VALUES ({placeholders})",
-                        values,
+                    frames = (
+                        chunk[source_columns].set_axis(available_columns, axis=1)
+                        for chunk in chain([first_chunk], chunks)
                     )
+                    first_df = next(frames)
+
+                    # Dictionary-coded demographics need their values declared up front
+                    demographic_columns = [
+                        col for col in DEMOGRAPHIC_COLUMNS if col in available_columns
+                    ]
+                    known_categories = {col: set() for col in demographic_columns}
+                    first_categories = self._new_categories(
+                        first_df[demographic_columns], known_categories
+                    )
+
+                    self.db_repo.create_table(first_categories)
+                    self.db_repo.migrate_table()
+                    if first_categories:
+                        # The table may already exist from an earlier upload
+                        self.db_repo.ensure_categories(first_categories)
+                    if self.rollups:
+                        self.db_repo.create_rollup_table()
+                    self.db_repo.create_distinct_values_table()
+
+                    value_columns = [
+                        col
+                        for col in DISTINCT_VALUE_COLUMNS
+                        if col in available_columns
+                    ]
+                    known_values = {col: set() for col in value_columns}
+
+                    start = time.perf_counter()
+
+                    rows = 0
+                    changes = (None, None, None)
+                    use_load_data = self.use_load_data
+                    for filtered_df in chain([first_df], frames):
+                        filtered_df, chunk_changes = self._prepare_chunk(
+                            filtered_df, watermark
+                        )
+                        changes = self._combine_changes(changes, chunk_changes)
+                        columns = list(filtered_df.columns)
+
+                        new_categories = self._new_categories(
+                            filtered_df[demographic_columns], known_categories
+                        )
+                        if new_categories:
+                            # Commit first so the ALTER is not blocked by our own open inserts
+                            connection.commit()
+                            self.db_repo.ensure_categories(new_categories)
+
+                        written = None
+                        if use_load_data:
+                            written = self._load_data_infile(
+                                cursor, filtered_df, columns
+                            )
+                            use_load_data = written is not None
+                        if written is None:
+                            written = self._bulk_insert(cursor, filtered_df, columns)
+                        rows += written
+
+                        # Same cursor, so the catalog commits together with the rows
+                        self.db_repo.add_distinct_values(
+                            cursor,
+                            self._new_categories(
+                                filtered_df[value_columns], known_values
+                            ),
+                        )
+
+                        if self.rollups:
+                            # Same cursor, so the counts commit together with the rows
+                            self.db_repo.write_rollups(
+                                cursor, self._rollup_counts(filtered_df)
+                            )
+
+                        if self.on_progress:
+                            self.on_progress(written)
+
+                    connection.commit()
+                    self._report_import(rows, time.perf_counter() - start)
+                    cursor.close()
+
+                    self._finish_import(content_hash, rows, changes)
+                    return True
 
-                self.connection.commit()
-                print("Data imported successfully.")
                 cursor.close()
-                return True
+                return False
+
+            except Exception as e:
+                print(f"General Error: {e}")
+                return False
+
+    def _import_archive(
+        self,
+        archive: FileStorage,
+        required_columns: list[str],
+        critical_columns: list[str],
+        content_hash: Optional[str],
+        watermark: tuple,
+    ) -> bool:
+        """
+        Load every shard of a zip/tar upload in parallel, then publish them together.
+
+        Each worker loads its shard into a shared staging table over its own
+        connection. The staging rows are copied into the user's table in a single
+        transaction, so the dataset is never visible half loaded.
+        """
+
+        with tempfile.TemporaryDirectory() as shard_dir:
+            shards = self._extract_shards(archive, shard_dir)
+            if not shards:
+                print("No CSV, Parquet or Arrow files found in the archive.")
+                return False
 
+            staging_table = self.db_repo.create_staging_table()
+            if staging_table is None:
+                return False
+
+            start = time.perf_counter()
+
+            # SQLite allows one writer at a time, so parallel shards only wait
+            # on each other until one fails with "database is locked"
+            workers = min(self.archive_workers, len(shards))
+            if DbConnectionManager.dialect().name == "sqlite":
+                workers = 1
+
+            try:
+                with ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="shard",
+                ) as executor:
+                    loaded = list(
+                        executor.map(
+                            lambda shard: self._load_shard(
+                                shard,
+                                staging_table,
+                                required_columns,
+                                critical_columns,
+                                watermark,
+                            ),
+                            shards,
+                        )
+                    )
+            except Exception as e:
+                print(f"General Error: {e}")
+                loaded = [None]
+
+            if any(result is None for result in loaded):
+                self.db_repo.drop_staging_table(staging_table)
+                return False
+
+            rollups = None
+            if self.rollups:
+                self.db_repo.create_rollup_table()
+                rollups = self._combine_rollups(
+                    [shard_rollups for _, _, shard_rollups in loaded]
+                )
+
+            if (
+                self.db_repo.publish_staging_table(
+                    staging_table, include_ids=self.dedupe_ids, rollups=rollups
+                )
+                is None
+            ):
+                return False
+
+        rows = sum(shard_rows for shard_rows, _, _ in loaded)
+        self._report_import(rows, time.perf_counter() - start)
+
+        changes = (None, None, None)
+        for _, shard_changes, _ in loaded:
+            changes = self._combine_changes(changes, shard_changes)
+
+        self._finish_import(content_hash, rows, changes)
+        return True
+
+    @staticmethod
+    def _extract_shards(archive: FileStorage, shard_dir: str) -> list[str]:
+        """Copy the data files in a zip/tar upload into shard_dir and return their paths."""
+
+        shards = []
+
+        def add_shard(name: str, member) -> None:
+            base_name = os.path.basename(name)
+            if base_name.startswith(".") or not base_name.lower().endswith(
+                SHARD_EXTENSIONS
+            ):
+                return
+
+            # Only the base name is kept, so members cannot be written outside shard_dir
+            path = os.path.join(shard_dir, f"{len(shards)}_{base_name}")
+            with open(path, "wb") as file:
+                shutil.copyfileobj(member, file)
+            shards.append(path)
+
+        is_path = isinstance(archive, (str, os.PathLike))
+        source = archive if is_path else getattr(archive, "stream", archive)
+        name = str(getattr(archive, "filename", archive) or "").lower()
+
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(source) as zip_file:
+                for info in zip_file.infolist():
+                    if not info.is_dir():
+                        with zip_file.open(info) as member:
+                            add_shard(info.filename, member)
+        else:
+            with tarfile.open(
+                name=source if is_path else None,
+                fileobj=None if is_path else source,
+                mode="r:*",
+            ) as tar_file:
+                for info in tar_file:
+                    # Links and devices are skipped; only regular files are read
+                    if info.isfile():
+                        add_shard(info.name, tar_file.extractfile(info))
+
+        return shards
+
+    def _load_shard(
+        self,
+        shard: str,
+        staging_table: str,
+        required_columns: list[str],
+        critical_columns: list[str],
+        watermark: tuple,
+    ) -> Optional[tuple[int, tuple, Optional[pd.DataFrame]]]:
+        """Load one shard into the staging table over its own connection.
+
+        Returns the number of rows loaded, the range they cover and their rollup
+        counts, or None on failure.
+        """
+
+        connection = DbConnectionManager.get_connection()
+        if connection is None:
+            print("No database connection available.")
+            return None
+
+        try:
+            cursor = connection.cursor()
+
+            rows = 0
+            changes = (None, None, None)
+            rollups = []
+            for chunk in self._read_upload(shard, required_columns):
+                lowered = {col.lower(): col for col in chunk.columns}
+
+                if not all(col in lowered for col in critical_columns):
+                    print(
+                        f"Critical columns missing in {os.path.basename(shard)}. "
+                        "Operation aborted."
+                    )
+                    return None
+
+                columns = [col for col in required_columns if col in lowered]
+                filtered_df = chunk[[lowered[col] for col in columns]].set_axis(
+                    columns, axis=1
+                )
+                filtered_df, chunk_changes = self._prepare_chunk(
+                    filtered_df, watermark
+                )
+                changes = self._combine_changes(changes, chunk_changes)
+
+                written = self._bulk_insert(
+                    cursor,
+                    filtered_df,
+                    list(filtered_df.columns),
+                    table_name=staging_table,
+                )
+                rows += written
+
+                if self.rollups:
+                    rollups.append(self._rollup_counts(filtered_df))
+
+                if self.on_progress:
+                    self.on_progress(written)
+
+            connection.commit()
             cursor.close()
-            return False
+            return (
+                rows,
+                changes,
+                self._combine_rollups(rollups) if self.rollups else None,
+            )
+
+        finally:
+            connection.close()
+
+    def _prepare_chunk(
+        self, df: pd.DataFrame, watermark: tuple
+    ) -> tuple[pd.DataFrame, tuple]:
+        """
+        Drop repeated ids and, in incremental mode, rows at or below the watermark.
+
+        Demographics are turned into the text their ENUM lists. For a
+        partitioned table, rows without a valid timestamp are dropped too.
+        Returns the rows to write and the (start, end, max_id) range they cover.
+        The range is only worked out when it is needed for the watermark, the
+        rollups or the notifier.
+        """
+
+        if "id" in df.columns and self.dedupe_ids:
+            df = df.drop_duplicates(subset="id")
+
+        # MySQL reads an integer sent to an ENUM as a member position, not a value
+        demographics = [col for col in DEMOGRAPHIC_COLUMNS if col in df.columns]
+        if demographics:
+            df = df.assign(
+                **{col: self._category_text(df[col]) for col in demographics}
+            )
+
+        if not (
+            self.incremental
+            or self.rollups
+            or self.partitioned
+            or self.notifier is not None
+        ):
+            return df, (None, None, None)
+
+        # Parse once so the watermark and the changed range compare real times
+        df = df.assign(timestamp=self._parse_timestamps(df["timestamp"]))
+        ids = (
+            pd.to_numeric(df["id"], errors="coerce")
+            if "id" in df.columns
+            else None
+        )
+
+        if self.partitioned:
+            # The timestamp is part of a partitioned table's key, so it cannot be NULL
+            missing = df["timestamp"].isna()
+            if missing.any():
+                print(f"Skipped {missing.sum()} rows without a valid timestamp.")
+                df = df[~missing]
+                ids = ids[~missing] if ids is not None else None
+
+        if self.incremental:
+            max_timestamp, max_id = watermark
+            if max_id is not None and ids is not None:
+                newer = ids > max_id
+            elif max_timestamp is not None:
+                newer = df["timestamp"] > pd.Timestamp(max_timestamp)
+            else:
+                newer = None
+
+            if newer is not None:
+                df = df[newer]
+                ids = ids[newer] if ids is not None else None
+
+        if not self.dedupe_ids and "id" in df.columns:
+            # The id was only read to compare against the watermark
+            df = df.drop(columns="id")
+
+        changes = (
+            df["timestamp"].min(),
+            df["timestamp"].max(),
+            ids.max() if ids is not None else None,
+        )
+        return df, tuple(None if pd.isna(value) else value for value in changes)
+
+    @staticmethod
+    def _rollup_counts(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Count rows per demographic value (and pair of values), day and action status.
+
+        Rows missing the grouped values, timestamp or action status are left out.
+        """
+
+        demographics = [col for col in ROLLUP_DEMOGRAPHICS if col in df.columns]
+        base = df.assign(
+            day=df["timestamp"].dt.date,
+            action_status=pd.to_numeric(df["action_status"], errors="coerce"),
+        )
+
+        frames = []
+        for combo in chain(
+            ((col,) for col in demographics), combinations(demographics, 2)
+        ):
+            counts = (
+                base.groupby([*combo, "day", "action_status"])
+                .size()
+                .reset_index(name="row_count")
+            )
+            if counts.empty:
+                continue
+
+            second = combo[1] if len(combo) > 1 else None
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "demographic_1": combo[0],
+                        "value_1": CsvFileRepo._rollup_values(counts[combo[0]]),
+                        "demographic_2": second or "",
+                        "value_2": (
+                            CsvFileRepo._rollup_values(counts[second]) if second else ""
+                        ),
+                        "day": counts["day"],
+                        "action_status": counts["action_status"].astype(int),
+                        "row_count": counts["row_count"],
+                    }
+                )
+            )
+
+        if not frames:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _rollup_values(values: pd.Series) -> pd.Series:
+        """Turn grouped values into strings, writing whole floats like 25.0 as 25."""
+
+        if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+            values = values.astype("int64")
+        return values.astype(str)
+
+    @staticmethod
+    def _category_text(values: pd.Series) -> pd.Series:
+        """Write a demographic's values as the text its ENUM lists, keeping NULLs."""
+
+        return CsvFileRepo._rollup_values(values.dropna()).reindex(values.index)
+
+    @staticmethod
+    def _combine_rollups(rollups: list[pd.DataFrame]) -> pd.DataFrame:
+        """Add up rollup counts computed for separate chunks or shards."""
+
+        rollups = [frame for frame in rollups if frame is not None and not frame.empty]
+        if not rollups:
+            return pd.DataFrame(columns=ROLLUP_COLUMNS)
+
+        keys = [col for col in ROLLUP_COLUMNS if col != "row_count"]
+        return (
+            pd.concat(rollups, ignore_index=True)
+            .groupby(keys, as_index=False)["row_count"]
+            .sum()
+        )
+
+    @staticmethod
+    def _parse_timestamps(values: pd.Series) -> pd.Series:
+        """Parse timestamps, unparseable ones as NaT.
+
+        Pandas infers one format from the first value, so values in another
+        format (e.g. with fractional seconds) are parsed again one by one.
+        """
+
+        parsed = pd.to_datetime(values, errors="coerce")
+        missed = parsed.isna() & values.notna()
+        if missed.any():
+            parsed[missed] = pd.to_datetime(
+                values[missed], errors="coerce", format="mixed"
+            )
+        return parsed
+
+    @staticmethod
+    def _combine_changes(first: tuple, second: tuple) -> tuple:
+        """Combine two (start, end, max_id) ranges, ignoring missing values."""
+
+        def pick(a, b, choose):
+            if a is None:
+                return b
+            if b is None:
+                return a
+            return choose(a, b)
+
+        return (
+            pick(first[0], second[0], min),
+            pick(first[1], second[1], max),
+            pick(first[2], second[2], max),
+        )
+
+    def _finish_import(self, content_hash: Optional[str], rows: int, changes: tuple) -> None:
+        """Record the upload in the ledger, move the watermark and announce the change."""
+
+        if content_hash:
+            self.db_repo.record_ingest(content_hash, rows)
+
+        if rows:
+            # Read the new rows from the primary until the replicas have them
+            DbConnectionManager.pin_to_primary(self.table_name)
+
+        if self.partitioned and rows:
+            # New months are split off after the load, so the INSERTs stay plain
+            self.db_repo.partition_table()
+
+        start, end, max_id = changes
+        if not rows or end is None:
+            return
+
+        if self.incremental:
+            self.db_repo.update_watermark(
+                end.to_pydatetime(), int(max_id) if max_id is not None else None
+            )
+
+        if self.notifier is not None:
+            self.notifier.publish(
+                self.table_name, start.to_pydatetime(), end.to_pydatetime()
+            )
+
+    def _read_upload(
+        self, csv_file: FileStorage, columns: list[str]
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the upload as dataframes of at most chunk_size rows, or whole if unset.
+
+        Only the given columns (matched case-insensitively) are read. Parquet and
+        Arrow IPC files are read natively by column, without any CSV parsing.
+        """
+
+        wanted = set(columns)
+        upload_format = self._upload_format(csv_file)
+
+        if upload_format == "parquet":
+            parquet_file = pq.ParquetFile(self._arrow_source(csv_file))
+            names = [n for n in parquet_file.schema_arrow.names if n.lower() in wanted]
+
+            if self.chunk_size:
+                for batch in parquet_file.iter_batches(
+                    batch_size=self.chunk_size, columns=names
+                ):
+                    yield batch.to_pandas()
+            else:
+                yield parquet_file.read(columns=names).to_pandas()
+
+        elif upload_format == "arrow":
+            source = self._arrow_source(csv_file)
+            try:
+                reader = pa.ipc.open_file(source)
+                batches = (
+                    reader.get_batch(i) for i in range(reader.num_record_batches)
+                )
+            except pa.ArrowInvalid:
+                # Not the IPC file format, so read it as an IPC stream instead
+                source.seek(0)
+                batches = pa.ipc.open_stream(source)
+
+            for batch in batches:
+                table = pa.Table.from_batches([batch])
+                names = [n for n in table.column_names if n.lower() in wanted]
+                yield table.select(names).to_pandas()
+
+        elif self.chunk_size:
+            with pd.read_csv(
+                csv_file,
+                chunksize=self.chunk_size,
+                usecols=lambda col: col.lower() in wanted,
+            ) as reader:
+                yield from reader
+        else:
+            yield pd.read_csv(csv_file, usecols=lambda col: col.lower() in wanted)
+
+    @staticmethod
+    def _new_categories(
+        df: pd.DataFrame, known: dict[str, set]
+    ) -> dict[str, list[str]]:
+        """Return the column values in df not seen before, adding them to known."""
+
+        new_categories = {}
+        for column in df.columns:
+            values = [
+                value
+                for value in CsvFileRepo._rollup_values(
+                    pd.Series(df[column].dropna().unique())
+                )
+                if value not in known[column]
+            ]
+            if values:
+                known[column].update(values)
+                new_categories[column] = values
+        return new_categories
 
-        except Exception as e:
-            print(f"General Error: {e}")
-            return False
+    @staticmethod
+    def _content_hash(csv_file: FileStorage) -> str:
+        """Return the SHA-256 of the upload's bytes, leaving the stream where it was."""
+
+        digest = hashlib.sha256()
+
+        if isinstance(csv_file, (str, os.PathLike)):
+            with open(csv_file, "rb") as file:
+                for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+        else:
+            stream = getattr(csv_file, "stream", csv_file)
+            position = stream.tell()
+            for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+            stream.seek(position)
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _upload_format(csv_file: FileStorage) -> str:
+        """Work out the upload format ("csv", "parquet", "arrow" or "archive") from its file name."""
+
+        name = getattr(csv_file, "filename", csv_file)
+        name = str(name).lower() if isinstance(name, (str, os.PathLike)) else ""
+
+        if name.endswith(ARCHIVE_EXTENSIONS):
+            return "archive"
+        if name.endswith(PARQUET_EXTENSIONS):
+            return "parquet"
+        if name.endswith(ARROW_EXTENSIONS):
+            return "arrow"
+        return "csv"
+
+    @staticmethod
+    def _arrow_source(csv_file: FileStorage):
+        """Return something pyarrow can read: a memory map for paths, else the stream."""
+
+        if isinstance(csv_file, (str, os.PathLike)):
+            return pa.memory_map(str(csv_file))
+        return getattr(csv_file, "stream", csv_file)
+
+    def _bulk_insert(
+        self,
+        cursor,
+        df: pd.DataFrame,
+        columns: list[str],
+        table_name: Optional[str] = None,
+    ) -> int:
+        """Insert the rows of the dataframe in batches of multi-row INSERTs."""
+
+        table_name = table_name or self.table_name
+        columns_str = ", ".join(columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        insert = "INSERT IGNORE" if self.dedupe_ids else "INSERT"
+        query = f"{insert} INTO `{table_name}` ({columns_str}) VALUES ({placeholders})"
+
+        # Convert to plain Python values once, with NaN mapped to NULL
+        datetime_columns = df.select_dtypes(include=["datetime", "datetimetz"]).columns
+        if len(datetime_columns):
+            df = df.assign(
+                **{
+                    col: df[col].dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+                    for col in datetime_columns
+                }
+            )
+        values = df.astype(object).where(df.notna(), None)
+        rows = values.itertuples(index=False, name=None)
+
+        total = 0
+        batch = list(islice(rows, self.batch_size))
+        while batch:
+            cursor.executemany(query, batch)
+            total += len(batch)
+            batch = list(islice(rows, self.batch_size))
+
+        return total
+
+    def _load_data_infile(self, cursor, df: pd.DataFrame, columns: list[str]):
+        """
+        Bulk load the dataframe with LOAD DATA LOCAL INFILE.
+
+        Returns the number of rows loaded, or None if the server refused the
+        statement and the caller should fall back to batched inserts.
+        """
+
+        if not DbConnectionManager.dialect().supports_load_data:
+            return None
+
+        columns_str = ", ".join(columns)
+        fd, temp_path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+
+        try:
+            df.to_csv(temp_path, index=False, na_rep="\\N")
+            cursor.execute(
+                f"""
+                LOAD DATA LOCAL INFILE %s {"IGNORE" if self.dedupe_ids else ""}
+                INTO TABLE `{self.table_name}`
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '\\n'
+                IGNORE 1 LINES ({columns_str})
+                """,
+                (temp_path,),
+            )
+            return len(df)
+
+        except Error as e:
+            print(f"LOAD DATA unavailable, falling back to batched inserts: {e}")
+            return None
+
+        finally:
+            os.remove(temp_path)
+
+    def _report_import(self, rows: int, seconds: float) -> None:
+        """Record and print the throughput of the last import."""
+
+        rows_per_sec = rows / seconds if seconds > 0 else float(rows)
+        self.last_import_stats = {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows_per_sec, 1),
+        }
+        print(
+            f"Data imported successfully: {rows} rows in {seconds:.2f}s "
+            f"({rows_per_sec:.0f} rows/sec)."
+        )
 
     def save_data_to_csv(self) -> None:
         """Save data from the specified table to a CSV file, including headers."""
 
-        self.connect()
-
         try:
-            if self.connection is None:
-                print("No database connection available.")
+            # Streamed a chunk at a time on a connection of its own, so memory
+            # does not grow with the table
+            headers, chunks = self.db_repo.iter_data()
+            if not headers:
+                print("No data available to save.")
                 return
 
             self.delete_csv_data()
 
-            cursor = self.connection.cursor()
-            headers, data = self.db_repo.fetch_data()  # Fetch headers and data
-
             csv_file_path = self.file_path
 
             # Open the CSV file for writing
@@ -142,12 +944,11 @@ class CsvFileRepo(FileRepositoryInterface):
                 # Write the headers first
                 writer.writerow(headers)
                 # Write the data rows
-                writer.writerows(data)
+                for rows in chunks:
+                    writer.writerows(rows)
 
             print(f"Data saved to {csv_file_path}")
 
-            cursor.close()  # Close the cursor
-
         except Exception as e:
             print(f"General Error: {e}")
             raise
@@ -155,8 +956,6 @@ class CsvFileRepo(FileRepositoryInterface):
     def delete_csv_data(self) -> None:
         """Delete all data from the specified CSV file."""
 
-        self.connect()
-
         try:
             with open(self.file_path, mode="w", newline="") as file:
                 # Optionally, you can write the header again if needed
@@ -168,46 +967,53 @@ class CsvFileRepo(FileRepositoryInterface):
             print(f"Error deleting data from {self.file_path}: {e}")
 
     def get_headers(self) -> list[str]:
-        """Get the headers of the table."""
+        """Get the headers of the table.
 
-        self.connect()
+        The column names come from the database catalog (cached until the
+        schema changes), so this does not read the table itself.
+        """
 
-        try:
-            if self.connection is None:
-                print("No database connection available.")
-                return []
+        with self.connect(readonly=True) as connection:
+            try:
+                if connection is None:
+                    print("No database connection available.")
+                    return []
 
-            cursor = self.connection.cursor()
-            cursor.execute(f"SELECT * FROM `{self.table_name}`")
+                cursor = connection.cursor()
+                columns = self.db_repo.get_columns(cursor)
+                cursor.close()
 
-            critical_columns = ["timestamp", "action_status"]
-            headers = [
-                desc[0]
-                for desc in cursor.description
-                if desc[0] not in critical_columns + ["id"]
-            ]
+                critical_columns = ["timestamp", "action_status"]
+                headers = [
+                    column
+                    for column in columns
+                    if column not in critical_columns + ["id"]
+                ]
 
-            print(headers)
+                print(headers)
+
+                if len(headers) < 2:
+                    print("Less than 2 demographics in dataset.")
+                    return []
+                else:
+                    return headers
 
-            if len(headers) < 2:
-                print("Less than 2 demographics in dataset.")
+            except Error as e:
+                print(f"MySQL Error: {e}")
                 return []
-            else:
-                return headers
 
-        except Error as e:
-            print(f"MySQL Error: {e}")
-            return []
+            except Exception as e:
+                print(f"General Error: {e}")
+                return []
 
-        except Exception as e:
-            print(f"General Error: {e}")
-            return []
+    def get_distinct_values(self, header: str) -> list[str]:
+        """Get the distinct values under a header of the table, as strings."""
+
+        return self.db_repo.get_distinct_values(header)
 
     def get_data_for_time(self, time: str) -> None:
         """Get the data for the specified time period."""
 
-        self.connect()
-
         self.delete_csv_data()
         self.save_data_to_csv()
 
@@ -217,14 +1023,7 @@ class CsvFileRepo(FileRepositoryInterface):
 
         latest_timestamp = df["timestamp"].max()
 
-        if time == "day":
-            days = 1
-        elif time == "week":
-            days = 7
-        elif time == "month":
-            days = 30
-        else:
-            days = 365
+        days = self._window_days(time)
 
         cutoff_date = latest_timestamp - timedelta(days=days)
 
@@ -238,47 +1037,331 @@ class CsvFileRepo(FileRepositoryInterface):
         choices: dict[str, list[str]],
         time: str,
     ) -> None:
-        """Update the comparison CSV file with the user's selections."""
+        """Update the comparison CSV file with the user's selections.
 
-        self.connect()
+        The column projection, the time window and the demographic filters run
+        in the database, so only the matching rows and columns are exported.
+        """
 
         self.delete_csv_data()
 
-        if time:
-            self.get_data_for_time(time)
-        else:
-            self.save_data_to_csv()
+        columns, values, ranges, days = self._comparison_filters(
+            demographics, choices, time
+        )
+        headers, chunks = self.db_repo.iter_filtered_data(
+            columns, values=values, ranges=ranges, days=days
+        )
 
-        df = pd.read_csv(self.file_path)
+        with open(self.file_path, mode="w", newline="") as file:
+            pd.DataFrame(columns=headers).to_csv(file, index=False)
+            for rows in chunks:
+                pd.DataFrame.from_records(rows, columns=headers).to_csv(
+                    file, header=False, index=False
+                )
+
+    def get_data(self) -> pd.DataFrame:
+        """Read the whole table into a DataFrame, without a CSV file in between."""
+
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return snapshot.to_pandas()
+
+        headers, chunks = self.db_repo.iter_data()
+        return self._to_frame(headers, chunks)
+
+    def get_comparison_data(
+        self,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+        time: str,
+    ) -> pd.DataFrame:
+        """Read the rows and columns matching the user's selections into a DataFrame.
+
+        Filters like update_comparison_csv, but hands the rows over in memory, so
+        requests for different users do not share (or wait on) a scratch file.
+        With a snapshot cache the same filters run on the snapshot instead.
+        """
+
+        columns, values, ranges, days = self._comparison_filters(
+            demographics, choices, time
+        )
+
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._filter_snapshot(
+                snapshot, columns, values, ranges, days
+            ).to_pandas()
+
+        headers, chunks = self.db_repo.iter_filtered_data(
+            columns, values=values, ranges=ranges, days=days
+        )
+        return self._to_frame(headers, chunks)
+
+    def get_group_counts(
+        self,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+        time: str,
+    ) -> pd.DataFrame:
+        """Count the rows matching the user's selections per group and action status.
+
+        Returns the selected demographics, action_status and row_count. With
+        rollups kept, one demographic or a pair of them is counted from the
+        daily rollups instead of the table. Either way the time window counts
+        whole days back from the newest day, so both give the same counts.
+        """
+
+        counts = self._rollup_daily_counts(demographics) if self.rollups else None
+        if counts is None:
+            counts = self._table_daily_counts(demographics)
+
+        newest = counts["day"].max() if not counts.empty else None
+        counts = self._filter_counts(counts, demographics, choices)
+        if time and newest is not None:
+            window = timedelta(days=self._window_days(time))
+            counts = counts[counts["day"] >= newest - window]
+
+        return counts.groupby([*demographics, "action_status"], as_index=False)[
+            "row_count"
+        ].sum()
+
+    def _rollup_daily_counts(self, demographics: list[str]) -> Optional[pd.DataFrame]:
+        """Read the demographics' daily counts from the rollups, if they cover them."""
+
+        if not 1 <= len(demographics) <= 2 or any(
+            dem not in ROLLUP_DEMOGRAPHICS for dem in demographics
+        ):
+            return None
+
+        rows = self.db_repo.get_rollup_counts(*demographics)
+        # Tables loaded before rollups were turned on have none
+        if not rows:
+            return None
+
+        value_columns = ["value_1", "value_2"]
+        counts = pd.DataFrame(
+            rows, columns=[*value_columns, "day", "action_status", "row_count"]
+        )
+        counts = counts.drop(columns=value_columns[len(demographics) :]).rename(
+            columns=dict(zip(value_columns, demographics))
+        )
+        return counts.assign(day=pd.to_datetime(counts["day"]))
+
+    def _table_daily_counts(self, demographics: list[str]) -> pd.DataFrame:
+        """Count the table's rows per demographic value, day and action status.
+
+        Values are written as the rollups write them, and rows missing any of
+        them are left out, as they are from the rollups.
+        """
+
+        data = self.get_comparison_data(demographics, {}, None)
+        keys = [*demographics, "day", "action_status"]
+        if any(
+            column not in data.columns
+            for column in [*demographics, "timestamp", "action_status"]
+        ):
+            return pd.DataFrame(columns=[*keys, "row_count"])
+
+        base = data.assign(
+            day=self._parse_timestamps(data["timestamp"]).dt.normalize(),
+            action_status=pd.to_numeric(data["action_status"], errors="coerce"),
+        )
+        counts = base.groupby(keys).size().reset_index(name="row_count")
+        return counts.assign(
+            **{dem: self._rollup_values(counts[dem]) for dem in demographics},
+            action_status=counts["action_status"].astype(int),
+        )
+
+    @staticmethod
+    def _filter_counts(
+        counts: pd.DataFrame,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+    ) -> pd.DataFrame:
+        """Keep the counts for the chosen values, as _comparison_filters picks rows."""
+
+        for dem in demographics:
+            if dem not in choices:
+                continue
+            if dem == "age" or is_range_choice(choices[dem]):
+                numbers = pd.to_numeric(counts[dem], errors="coerce").to_numpy()
+                mask = in_ranges(numbers, parse_ranges(choices[dem]))
+            else:
+                mask = counts[dem].isin([str(value) for value in choices[dem]])
+            counts = counts[mask]
+        return counts
+
+    def _comparison_filters(
+        self,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+        time: str,
+    ) -> tuple[list[str], dict, dict, Optional[int]]:
+        """Turn the user's selections into the columns, values, ranges and days to filter by."""
 
         critical_columns = ["id", "timestamp", "action_status"]
-        valid_columns = [
-            col for col in demographics + critical_columns if col in df.columns
-        ]
-        filtered_df = df[valid_columns]
 
+        values = {}
+        ranges = {}
         for dem in demographics:
             if dem in choices:
-                if dem == "age":
-                    # For age, parse range strings and filter based on ranges
-                    age_ranges = []
-                    for range_str in choices[dem]:
-                        try:
-                            min_age, max_age = map(int, range_str.split("-"))
-                            age_ranges.append((min_age, max_age))
-                        except ValueError:
-                            print(f"Invalid range format: {range_str}")
-                            continue
-
-                    # Apply age range filtering
-                    age_filter = filtered_df["age"].apply(
-                        lambda age: any(
-                            min_age <= age <= max_age for min_age, max_age in age_ranges
-                        )
-                    )
-                    filtered_df = filtered_df[age_filter]
+                if dem == "age" or is_range_choice(choices[dem]):
+                    # Numeric demographics are chosen as "min-max" ranges
+                    ranges[dem] = parse_ranges(choices[dem])
                 else:
-                    # For other demographics, use simple filtering
-                    filtered_df = filtered_df[filtered_df[dem].isin(choices[dem])]
+                    values[dem] = list(choices[dem])
+
+        return (
+            demographics + critical_columns,
+            values,
+            ranges,
+            self._window_days(time) if time else None,
+        )
+
+    def _snapshot(self) -> Optional[pa.Table]:
+        """Return the current snapshot of the table, building it if needed.
+
+        None without a snapshot cache, or if the table is missing or empty;
+        callers then read the database as before.
+        """
+
+        if self.snapshots is None:
+            return None
+
+        version = self.snapshots.version(self.table_name)
+        snapshot = self.snapshots.get(self.table_name, version)
+        if snapshot is not None:
+            return snapshot
+
+        # A replica may not have the rows this version stands for yet
+        headers, chunks = self.db_repo.iter_data(readonly=False)
+        tables = [
+            pa.Table.from_batches([batch])
+            for batch in SqliteDbRepo.record_batches(headers, chunks)
+        ]
+        if not tables:
+            return None
+
+        table = pa.concat_tables(tables, promote_options="default")
+        return self.snapshots.put(self.table_name, version, table)
+
+    @staticmethod
+    def _filter_snapshot(
+        table: pa.Table,
+        columns: list[str],
+        values: dict[str, list],
+        ranges: dict[str, list[tuple]],
+        days: Optional[int],
+    ) -> pa.Table:
+        """Apply the iter_filtered_data filters to a snapshot, with Arrow compute.
+
+        Matches the SQL: missing columns are ignored, an empty list matches no
+        rows, NULLs never match, and days counts back from the newest timestamp.
+        """
+
+        available = table.column_names
+        selected = [column for column in columns if column in available]
+        if not selected:
+            return pa.table({})
+
+        conditions = []
+
+        for column, column_values in values.items():
+            if column not in available:
+                continue
+            # Compared as text, like MySQL compares a column with string values
+            conditions.append(
+                pc.is_in(
+                    pc.cast(table[column], pa.string()),
+                    value_set=pa.array(
+                        [str(value) for value in column_values], type=pa.string()
+                    ),
+                )
+            )
+
+        for column, column_ranges in ranges.items():
+            if column not in available:
+                continue
+            column_type = table.schema.field(column).type
+            if pa.types.is_integer(column_type) or pa.types.is_floating(column_type):
+                # NULLs come out as NaN, which no range matches
+                numbers = table[column].to_numpy(zero_copy_only=False)
+                conditions.append(pa.array(in_ranges(numbers, column_ranges)))
+            else:
+                # Text never falls between numbers, as in SQLite
+                conditions.append(pa.array([False] * table.num_rows))
+
+        if days is not None and "timestamp" in available:
+            timestamps = CsvFileRepo._snapshot_timestamps(table["timestamp"])
+            latest = pc.max(timestamps).as_py()
+            if latest is not None:
+                conditions.append(
+                    pc.greater_equal(
+                        timestamps,
+                        pa.scalar(latest - timedelta(days=days), type=timestamps.type),
+                    )
+                )
+
+        if conditions:
+            mask = conditions[0]
+            for condition in conditions[1:]:
+                mask = pc.and_(mask, condition)
+            # Rows where the mask is NULL are dropped, as WHERE does
+            table = table.filter(mask)
+        return table.select(selected)
+
+    @staticmethod
+    def _snapshot_timestamps(column: pa.ChunkedArray) -> pa.ChunkedArray:
+        """Return a snapshot's timestamp column as Arrow timestamps.
+
+        Tables not yet migrated to the typed schema hold text; values that are
+        not timestamps become NULL, so the time window never keeps them.
+        """
+
+        if pa.types.is_timestamp(column.type):
+            return column
+        try:
+            return pc.cast(column, pa.timestamp("us"))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return pa.chunked_array(
+                [
+                    pa.array(
+                        [
+                            SqliteDbRepo._parse_timestamp(value)
+                            for value in column.to_pylist()
+                        ],
+                        type=pa.timestamp("us"),
+                    )
+                ]
+            )
 
-        filtered_df.to_csv(self.file_path, index=False)
+    @staticmethod
+    def _to_frame(headers: list[str], chunks: Iterator[list[tuple]]) -> pd.DataFrame:
+        """Collect streamed rows into a DataFrame by way of Arrow.
+
+        Nullable integer columns become floats with NaN, as they would coming
+        back from a CSV file, so the model code sees the same dtypes.
+        """
+
+        tables = [
+            pa.Table.from_batches([batch])
+            for batch in SqliteDbRepo.record_batches(headers, chunks)
+        ]
+        if not tables:
+            return pd.DataFrame(columns=headers)
+
+        # Columns that were all NULL in the first chunks take the later type
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    @staticmethod
+    def _window_days(time: str) -> int:
+        """Return the number of days in a day/week/month/year time window."""
+
+        if time == "day":
+            return 1
+        elif time == "week":
+            return 7
+        elif time == "month":
+            return 30
+        else:
+            return 365
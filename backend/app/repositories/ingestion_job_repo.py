@@ -0,0 +1,143 @@
+# app/repositories/ingestion_job_repo.py
+from typing import Optional
+
+from mysql.connector import Error
+
+from backend.app.entities.ingestion_job import IngestionJob
+from backend.app.infrastructure.db_connection_manager import DbConnectionManager
+
+
+class IngestionJobRepo:
+    """IngestionJobRepo keeps background upload jobs in the ingestion_jobs table.
+
+    Any server process can report a job this way, not only the one running it.
+
+    Methods
+    -------
+    connect()
+        Checks out a connection to the primary from DbConnectionManager.
+
+    save(job: IngestionJob) -> None
+        Inserts the job or updates its stored progress.
+
+    get(job_id: str) -> Optional[IngestionJob]
+        Fetches a job by its id.
+
+    delete_finished_before(cutoff: float) -> None
+        Removes jobs that finished before the given epoch time."""
+
+    def connect(self):
+        """Check out a connection to the primary for use in a with block."""
+        return DbConnectionManager.connection()
+
+    def _create_table(self, cursor) -> None:
+        """Create the table of upload jobs if it does not exist."""
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                job_id CHAR(32) NOT NULL PRIMARY KEY,
+                email VARCHAR(255) NOT NULL,
+                status VARCHAR(16) NOT NULL,
+                rows_processed BIGINT NOT NULL,
+                error TEXT,
+                created_at DOUBLE NOT NULL,
+                started_at DOUBLE,
+                finished_at DOUBLE
+            )
+            """
+        )
+
+    def save(self, job: IngestionJob) -> None:
+        """Insert the job or update its stored progress."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_table(cursor)
+
+                cursor.execute(
+                    """
+                    INSERT INTO ingestion_jobs (
+                        job_id, email, status, rows_processed, error,
+                        created_at, started_at, finished_at
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        status = VALUES(status),
+                        rows_processed = VALUES(rows_processed),
+                        error = VALUES(error),
+                        started_at = VALUES(started_at),
+                        finished_at = VALUES(finished_at)
+                    """,
+                    (
+                        job.job_id,
+                        job.table_name,
+                        job.status,
+                        job.rows_processed,
+                        job.error,
+                        job.created_at,
+                        job.started_at,
+                        job.finished_at,
+                    ),
+                )
+                connection.commit()
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Fetch a job by its id."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None
+
+                cursor = connection.cursor()
+                self._create_table(cursor)
+
+                cursor.execute(
+                    """
+                    SELECT job_id, email, status, rows_processed, error,
+                        created_at, started_at, finished_at
+                    FROM ingestion_jobs
+                    WHERE job_id = %s
+                    """,
+                    (job_id,),
+                )
+                row = cursor.fetchone()
+                cursor.close()
+
+                return IngestionJob.from_row(row) if row else None
+
+            except Error as e:
+                print(f"Error: {e}")
+                return None
+
+    def delete_finished_before(self, cutoff: float) -> None:
+        """Remove jobs that finished before the given epoch time."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_table(cursor)
+
+                cursor.execute(
+                    "DELETE FROM ingestion_jobs WHERE finished_at < %s", (cutoff,)
+                )
+                connection.commit()
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
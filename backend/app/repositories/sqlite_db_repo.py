@@ -1,16 +1,79 @@
 # /app/repositories/sqlite_db_repo.py
 
-from typing import Optional
+import hashlib
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, Optional
 
 import mysql.connector
+import pyarrow as pa
 from mysql.connector import Error
 
 from backend.app.entities.user import User
+from backend.app.infrastructure.change_notifier import ChangeNotifier
 from backend.app.infrastructure.db_connection_manager import DbConnectionManager
+from backend.app.infrastructure.prepared_statements import PreparedStatements
+from backend.app.infrastructure.selection_write_buffer import SelectionWriteBuffer
 from backend.app.use_cases.DatabaseRepositoryInterface import (
     DatabaseRepositoryInterface,
 )
 
+# Demographics with a small set of repeated values are stored as ENUMs, which
+# MySQL keeps as 1-2 byte codes into the column's value list
+DEMOGRAPHIC_COLUMNS = ("gender", "race", "state")
+
+TYPED_COLUMNS = {
+    "age": "TINYINT UNSIGNED",
+    "timestamp": "DATETIME(6)",
+    "action_status": "TINYINT",
+}
+
+# Secondary indexes on each user's table: the timestamp for time windows, and
+# each demographic with action_status, so demographic filters and per-group
+# outcome counts can be answered from the index alone
+INDEXED_COLUMNS = {
+    "timestamp": ("timestamp",),
+    "gender_status": ("gender", "action_status"),
+    "age_status": ("age", "action_status"),
+    "race_status": ("race", "action_status"),
+    "state_status": ("state", "action_status"),
+}
+
+# Rows read from the server per round trip when streaming a table
+FETCH_CHUNK_SIZE = 10_000
+
+# The user's saved selections, looked up through the unique index on email.
+# Prepared once per pooled connection; see PreparedStatements
+SELECT_LAST_LOGIN = """
+                SELECT demographic_1, choice_1_demographic_1, choice_2_demographic_1,
+                    choice_3_demographic_1, choice_4_demographic_1,
+                    demographic_2, choice_1_demographic_2, choice_2_demographic_2,
+                    choice_3_demographic_2, choice_4_demographic_2, time
+                FROM users
+                WHERE email = %s
+            """
+
+# Partitioned tables have one partition per month, named pYYYYMM, and this
+# last one for rows newer than the newest month
+FUTURE_PARTITION = "pfuture"
+
+# Demographics counted in the daily rollups, singly and in pairs (in this order)
+ROLLUP_DEMOGRAPHICS = ("gender", "age", "race", "state")
+
+ROLLUP_COLUMNS = [
+    "demographic_1",
+    "value_1",
+    "demographic_2",
+    "value_2",
+    "day",
+    "action_status",
+    "row_count",
+]
+
+# Columns whose distinct values are kept in the catalog for the selection menus
+DISTINCT_VALUE_COLUMNS = ("gender", "age", "race", "state")
+
 
 class SqliteDbRepo(DatabaseRepositoryInterface):
     class SqliteDbRepo:
@@ -18,18 +81,60 @@ class SqliteDbRepo(DatabaseRepositoryInterface):
 
         Attributes:
             user (User): The user object containing user-specific information.
-            connection (sqlite3.Connection): The connection to the SQLite database.
             table_name (str): The name of the table associated with the user.
+            selection_buffer (SelectionWriteBuffer): Saves selections in the background, if set.
+            notifier (Optional[ChangeNotifier]): Told which time range lost rows after a delete.
 
         Methods:
-            connect():
-                Establishes a connection to the SQLite database.
+            connect(readonly: bool = False):
+                Checks out a connection for a with block, from a replica for reads.
 
             see_all_tables() -> None:
                 Retrieves and prints all tables in the database.
 
-            create_table() -> None:
-                Creates a table in the SQLite database with predefined columns.
+            create_table(categories: Optional[dict[str, list[str]]] = None) -> None:
+                Creates a table with typed columns, using the given values for the ENUM demographics.
+
+            migrate_table() -> bool:
+                Converts an existing table from the old VARCHAR schema to the typed schema
+                and adds the secondary indexes it is missing.
+
+            ensure_categories(categories: dict[str, Iterable[str]]) -> None:
+                Appends values that are not yet in the ENUM demographic columns.
+
+            partition_table() -> bool:
+                Partitions the table by month of timestamp, adding partitions for new months.
+
+            drop_data_before(cutoff: date) -> bool:
+                Deletes the rows from before the cutoff day, dropping whole monthly partitions where it can.
+
+            create_staging_table() -> Optional[str]:
+                Creates an empty staging table for parallel loads and returns its name.
+
+            publish_staging_table(staging_table: str, include_ids: bool = False, rollups=None) -> Optional[int]:
+                Copies a staging table into the user's table in one transaction and drops it.
+
+            create_rollup_table() -> None:
+                Creates the table of daily counts per demographic value if it does not exist.
+
+            write_rollups(cursor, counts: pd.DataFrame) -> None:
+                Adds rollup counts on the caller's cursor, so they commit with the rows.
+
+            get_rollup_counts(demographic_1: str, demographic_2: Optional[str] = None,
+                              start: Optional[date] = None, end: Optional[date] = None) -> list[tuple]:
+                Retrieves daily counts per demographic value (or pair of values) and action status.
+
+            drop_staging_table(staging_table: str) -> None:
+                Deletes a staging table.
+
+            create_distinct_values_table() -> None:
+                Creates the catalog of distinct column values, filling it for tables loaded before it existed.
+
+            add_distinct_values(cursor, values: dict[str, Iterable[str]]) -> None:
+                Adds values to the catalog on the caller's cursor, so they commit with the rows.
+
+            get_distinct_values(column: str) -> list[str]:
+                Retrieves the distinct values of a column from the catalog, or with SELECT DISTINCT.
 
             delete_table() -> None:
                 Deletes the table associated with the user from the database.
@@ -37,134 +142,1190 @@ class SqliteDbRepo(DatabaseRepositoryInterface):
             fetch_data(p=False) -> tuple[list[str], tuple[str, ...]]:
                 Fetches all data from the user's table and returns the column headers and data.
 
+            get_columns(cursor) -> list[str]:
+                Returns the column names of the user's table from the catalog.
+
+            iter_data(chunk_size: int = FETCH_CHUNK_SIZE, readonly: bool = True) -> tuple[list[str], Iterator[list[tuple]]]:
+                Streams the user's table as lists of at most chunk_size rows, from the primary if not readonly.
+
+            iter_record_batches(chunk_size: int = FETCH_CHUNK_SIZE) -> Iterator[pa.RecordBatch]:
+                Streams the user's table as Arrow record batches.
+
+            record_batches(headers: list[str], chunks: Iterable[list[tuple]]) -> Iterator[pa.RecordBatch]:
+                Turns streamed row chunks into Arrow record batches.
+
+            iter_filtered_data(columns: list[str], values=None, ranges=None, days=None,
+                               chunk_size: int = FETCH_CHUNK_SIZE) -> tuple[list[str], Iterator[list[tuple]]]:
+                Streams the selected columns of the rows matching IN, BETWEEN and time window filters.
+
             update_db_for_user(demographics: list[str], choices: dict[str, list[str]], time: str) -> None:
-                Updates the user's table with the specified demographics and choices.
+                Saves the user's selected demographics and choices, through the selection buffer if there is one.
+
+            write_selection(table_name: str, selection: dict[str, Optional[str]]) -> bool:
+                Writes a user's selection to the users table.
 
             get_last_login_data() -> tuple[Optional[list[str]], Optional[dict[str, list[str]]], Optional[str]]:
                 Retrieves the last login demographics and choices for the specified user.
-        """
 
-    def __init__(self, user: User):
-        self.connection = None
+            has_ingested(content_hash: str) -> bool:
+                Checks the ingest ledger for an upload with the same content hash.
+
+            record_ingest(content_hash: str, rows: int) -> None:
+                Adds an upload's content hash to the user's ingest ledger.
+
+            get_watermark() -> tuple[Optional[datetime], Optional[int]]:
+                Retrieves the newest timestamp and id ingested for the user.
+
+            update_watermark(max_timestamp: datetime, max_id: Optional[int]) -> None:
+                Moves the user's high-water mark forward.
+        """
 
+    def __init__(
+        self,
+        user: User,
+        selection_buffer: Optional[SelectionWriteBuffer] = None,
+        notifier: Optional[ChangeNotifier] = None,
+    ):
         self.user = user
         self.table_name = user.table_name
+        self.selection_buffer = selection_buffer
+        self.notifier = notifier
 
-    def connect(self):
-        self.connection = DbConnectionManager.get_connection()
+    def connect(self, readonly: bool = False):
+        """Check out a connection for a with block; it goes back to the pool after.
+
+        Reads may go to a replica, unless the user has just written.
+        """
+        if readonly:
+            return DbConnectionManager.connection(
+                readonly=True, pin_key=self.table_name
+            )
+        return DbConnectionManager.connection()
 
     def see_all_tables(self) -> None:
         """See all tables in the database and return them as DatabaseTable objects."""
 
-        self.connect()
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                cursor.execute("SHOW TABLES")
+                tables = cursor.fetchall()
+                print("Tables in the database:")
+
+                for table in tables:
+                    # Assuming DatabaseTable class has a constructor to accept a
+                    # table name
+                    print(table[0])
+
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def create_table(self, categories: Optional[dict[str, list[str]]] = None) -> None:
+        """Create a table in SQLite database"""
+
+        with self.connect() as connection:
+            sanitized_table_name = (
+                f"`{self.table_name}`"  # Backticks allow special characters
+            )
+
+            categories = categories or {}
+
+            # Demographics with no known values yet stay as VARCHAR until migrate_table
+            demographic_types = {
+                column: (
+                    self._enum_type(categories[column])
+                    if categories.get(column)
+                    else "VARCHAR(255)"
+                )
+                for column in DEMOGRAPHIC_COLUMNS
+            }
+
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+
+                indexes = ",\n".join(
+                    f"INDEX `{self._index_name(suffix)}` "
+                    f"({', '.join(f'`{column}`' for column in columns)})"
+                    for suffix, columns in INDEXED_COLUMNS.items()
+                )
+
+                cursor.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {sanitized_table_name} (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        gender {demographic_types["gender"]},
+                        age {TYPED_COLUMNS["age"]},
+                        race {demographic_types["race"]},
+                        state {demographic_types["state"]},
+                        timestamp {TYPED_COLUMNS["timestamp"]},
+                        action_status {TYPED_COLUMNS["action_status"]},
+                        {indexes}
+                    )
+                    """
+                )
+                print("Table created successfully.")
+
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def migrate_table(self) -> bool:
+        """Convert an existing table from the old VARCHAR schema to the typed schema.
+
+        Secondary indexes the table is missing are added in the same ALTER.
+        """
+
+        # Backends without ENUMs or ALTER ... MODIFY keep the schema they were
+        # created with; their missing indexes are added by create_table
+        if not DbConnectionManager.dialect().supports_enum:
+            return True
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return False
+
+                cursor = connection.cursor()
+                column_types = self._get_column_types(cursor)
+
+                if not column_types:
+                    print("Table does not exist.")
+                    cursor.close()
+                    return False
+
+                changes = []
+
+                for column in DEMOGRAPHIC_COLUMNS:
+                    if not column_types.get(column, "").lower().startswith("varchar"):
+                        continue
+
+                    cursor.execute(
+                        f"SELECT DISTINCT `{column}` FROM `{self.table_name}` "
+                        f"WHERE `{column}` IS NOT NULL"
+                    )
+                    values = [row[0] for row in cursor.fetchall()]
+                    if values:
+                        changes.append(f"MODIFY `{column}` {self._enum_type(values)}")
+
+                for column, column_type in TYPED_COLUMNS.items():
+                    current = column_types.get(column)
+                    if current and self._normalize_type(current) != column_type.lower():
+                        changes.append(f"MODIFY `{column}` {column_type}")
+
+                existing_indexes = self._get_index_names(cursor)
+                for suffix, columns in INDEXED_COLUMNS.items():
+                    name = self._index_name(suffix)
+                    if name not in existing_indexes and all(
+                        column in column_types for column in columns
+                    ):
+                        changes.append(
+                            f"ADD INDEX `{name}` "
+                            f"({', '.join(f'`{column}`' for column in columns)})"
+                        )
+
+                if changes:
+                    # A single ALTER so the table is only rebuilt once
+                    cursor.execute(
+                        f"ALTER TABLE `{self.table_name}` {', '.join(changes)}"
+                    )
+                    print("Table migrated to the typed schema.")
+
+                cursor.close()
+                return True
+
+            except Error as e:
+                print(f"Error: {e}")
+                return False
+
+    def ensure_categories(self, categories: dict[str, Iterable[str]]) -> None:
+        """Append values that are not yet in the ENUM demographic columns."""
+
+        if not DbConnectionManager.dialect().supports_enum:
+            return
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                column_types = self._get_column_types(cursor)
+
+                changes = []
+                for column, values in categories.items():
+                    column_type = column_types.get(column, "")
+                    if not column_type.lower().startswith("enum("):
+                        continue
+
+                    existing = self._enum_values(column_type)
+
+                    # ENUM values compare case-insensitively and ignore trailing spaces
+                    known = {value.rstrip().lower() for value in existing}
+                    new_values = []
+                    for value in values:
+                        key = str(value).rstrip().lower()
+                        if key not in known:
+                            known.add(key)
+                            new_values.append(str(value))
+
+                    # Appending keeps the existing codes, so MySQL does not
+                    # rewrite the rows
+                    if new_values:
+                        enum_type = self._enum_type(existing + new_values)
+                        changes.append(f"MODIFY `{column}` {enum_type}")
+
+                if changes:
+                    cursor.execute(
+                        f"ALTER TABLE `{self.table_name}` {', '.join(changes)}"
+                    )
+
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def partition_table(self) -> bool:
+        """
+        Partition the user's table by month of timestamp, adding partitions for new months.
+
+        The first call rebuilds the table with a partition for each month from
+        its oldest row to its newest, and one for anything newer. Later calls
+        split the months that arrived since out of that last partition, so only
+        the newest rows are copied. Time window queries then skip the months
+        they do not cover, and drop_data_before can drop whole months.
+
+        MySQL needs the partitioning column in the primary key, so the key
+        becomes (id, timestamp) and timestamps can no longer be NULL. INSERT
+        IGNORE then only skips rows whose id and timestamp both repeat, which
+        is why CsvFileRepo does not partition when it ignores duplicate ids.
+        Tables whose timestamps are not DATETIME, or that have rows without a
+        timestamp, are left unpartitioned.
+        """
+
+        if not DbConnectionManager.dialect().supports_partitions:
+            return False
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return False
+
+                cursor = connection.cursor()
+                months = self._get_partition_months(cursor)
+
+                if months is None and not self._can_partition(cursor):
+                    cursor.close()
+                    return False
+
+                today = date.today()
+                oldest = self._get_edge_timestamp(cursor, "ASC") or today
+                newest = self._get_edge_timestamp(cursor, "DESC") or today
+                newest_month = self._month_start(newest)
+
+                if months is None:
+                    definitions = self._partition_definitions(
+                        self._month_start(oldest), newest_month
+                    )
+                    cursor.execute(
+                        f"""
+                        ALTER TABLE `{self.table_name}`
+                            MODIFY `timestamp` {TYPED_COLUMNS["timestamp"]} NOT NULL,
+                            DROP PRIMARY KEY,
+                            ADD PRIMARY KEY (`id`, `timestamp`)
+                        PARTITION BY RANGE COLUMNS(`timestamp`) ({definitions})
+                        """
+                    )
+                    print("Table partitioned by month.")
+
+                elif not months or months[-1] < newest_month:
+                    first_month = (
+                        self._next_month(months[-1]) if months else newest_month
+                    )
+                    definitions = self._partition_definitions(first_month, newest_month)
+                    cursor.execute(
+                        f"ALTER TABLE `{self.table_name}` "
+                        f"REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({definitions})"
+                    )
+
+                cursor.close()
+                return True
+
+            except Error as e:
+                print(f"Error: {e}")
+                return False
+
+    def drop_data_before(self, cutoff: date) -> bool:
+        """
+        Delete the user's rows from before the cutoff day.
+
+        On a partitioned table, the months that end by the cutoff are dropped
+        whole, which costs about as much as dropping a table. The older rows
+        of the month the cutoff falls in are deleted through the timestamp
+        index. Rollup counts for the deleted days go too, and the catalog of
+        distinct values is rebuilt from the rows that are left.
+        """
+
+        self.create_rollup_table()
+        self.create_distinct_values_table()
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return False
+
+                cursor = connection.cursor()
+
+                months = []
+                if DbConnectionManager.dialect().supports_partitions:
+                    months = self._get_partition_months(cursor) or []
+
+                expired = [
+                    f"p{month:%Y%m}"
+                    for month in months
+                    if self._next_month(month) <= cutoff
+                ]
+                if expired:
+                    cursor.execute(
+                        f"ALTER TABLE `{self.table_name}` "
+                        f"DROP PARTITION {', '.join(expired)}"
+                    )
+
+                cursor.execute(
+                    f"DELETE FROM `{self.table_name}` WHERE `timestamp` < %s",
+                    (datetime(cutoff.year, cutoff.month, cutoff.day),),
+                )
+                cursor.execute(
+                    "DELETE FROM demographic_rollups WHERE email = %s AND day < %s",
+                    (self.table_name, cutoff),
+                )
+                cursor.execute(
+                    "DELETE FROM distinct_values WHERE email = %s", (self.table_name,)
+                )
+                self._copy_distinct_values(cursor, self.table_name)
+
+                connection.commit()
+                DbConnectionManager.pin_to_primary(self.table_name)
+                cursor.close()
 
+            except Error as e:
+                print(f"Error: {e}")
+                return False
+
+        self._publish_change(
+            datetime.min, datetime(cutoff.year, cutoff.month, cutoff.day)
+        )
+        return True
+
+    def _get_partition_months(self, cursor) -> Optional[list[date]]:
+        """Return the months the user's table is partitioned into, in order.
+
+        Returns None if the table is not partitioned.
+        """
+
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            (self.table_name,),
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+        if not names:
+            return None
+        return [
+            datetime.strptime(name[1:], "%Y%m").date()
+            for name in names
+            if name != FUTURE_PARTITION
+        ]
+
+    def _get_edge_timestamp(self, cursor, order: str) -> Optional[datetime]:
+        """Return the oldest (ASC) or newest (DESC) timestamp, read from the index."""
+
+        cursor.execute(
+            f"SELECT `timestamp` FROM `{self.table_name}` "
+            f"WHERE `timestamp` IS NOT NULL ORDER BY `timestamp` {order} LIMIT 1"
+        )
+        row = cursor.fetchone()
+        return self._parse_timestamp(row[0]) if row else None
+
+    def _can_partition(self, cursor) -> bool:
+        """Return whether the table's timestamps can become its partitioning key."""
+
+        column_type = self._get_column_types(cursor).get("timestamp", "")
+        if not column_type.lower().startswith("datetime"):
+            # Text timestamps would be split by string, not by month
+            print("The timestamp column is not a DATETIME; table not partitioned.")
+            return False
+
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM `{self.table_name}` "
+            "WHERE `timestamp` IS NULL)"
+        )
+        has_nulls = cursor.fetchone()
+        if has_nulls and has_nulls[0]:
+            print("Some rows have no timestamp; table not partitioned.")
+            return False
+        return True
+
+    @classmethod
+    def _partition_definitions(cls, first_month: date, last_month: date) -> str:
+        """Return the partitions for first_month to last_month and the future one."""
+
+        definitions = []
+        month = first_month
+        while month <= last_month:
+            definitions.append(
+                f"PARTITION p{month:%Y%m} "
+                f"VALUES LESS THAN ('{cls._next_month(month):%Y-%m-%d}')"
+            )
+            month = cls._next_month(month)
+
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        return ", ".join(definitions)
+
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[datetime]:
+        """Return a timestamp read from the table as a datetime.
+
+        Tables still on the old VARCHAR schema hand back text. None if the
+        value is missing or not a timestamp.
+        """
+
+        if value is None or isinstance(value, datetime):
+            return value
         try:
-            if self.connection is None:
-                print("Not connected to the database.")
-                return
+            return datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            print(f"Unrecognised timestamp: {value}")
+            return None
+
+    @staticmethod
+    def _month_start(value: date) -> date:
+        return date(value.year, value.month, 1)
+
+    @staticmethod
+    def _next_month(month: date) -> date:
+        if month.month == 12:
+            return date(month.year + 1, 1, 1)
+        return date(month.year, month.month + 1, 1)
+
+    def create_staging_table(self) -> Optional[str]:
+        """Create an empty staging table for parallel loads and return its name."""
+
+        with self.connect() as connection:
+            staging_table = f"staging_{uuid.uuid4().hex}"
+
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None
+
+                cursor = connection.cursor()
+
+                # Demographics are plain strings here; their ENUM values are only
+                # known once every shard is loaded
+                cursor.execute(
+                    f"""
+                    CREATE TABLE `{staging_table}` (
+                        id INT,
+                        gender VARCHAR(255),
+                        age {TYPED_COLUMNS["age"]},
+                        race VARCHAR(255),
+                        state VARCHAR(255),
+                        timestamp {TYPED_COLUMNS["timestamp"]},
+                        action_status {TYPED_COLUMNS["action_status"]}
+                    )
+                    """
+                )
+
+                cursor.close()
+                return staging_table
+
+            except Error as e:
+                print(f"Error: {e}")
+                return None
 
-            cursor = self.connection.cursor()
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-            print("Tables in the database:")
+    def publish_staging_table(
+        self, staging_table: str, include_ids: bool = False, rollups=None
+    ) -> Optional[int]:
+        """Copy a staging table into the user's table in one transaction and drop it.
 
-            for table in tables:
-                # Assuming DatabaseTable class has a constructor to accept a table name
-                print(table[0])
+        Rollup counts for the staged rows, if given, are written in the same transaction.
+        """
+
+        try:
+            with self.connect() as connection:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None
+
+                cursor = connection.cursor()
+
+                categories = {}
+                for column in DEMOGRAPHIC_COLUMNS:
+                    cursor.execute(
+                        f"SELECT DISTINCT `{column}` FROM `{staging_table}` "
+                        f"WHERE `{column}` IS NOT NULL"
+                    )
+                    values = [row[0] for row in cursor.fetchall()]
+                    if values:
+                        categories[column] = values
+
+                cursor.close()
 
-            cursor.close()
+            # Schema changes commit implicitly, so they are done before the copy
+            self.create_table(categories)
+            self.migrate_table()
+            self.ensure_categories(categories)
+            self.create_distinct_values_table()
+
+            with self.connect() as connection:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None
+
+                cursor = connection.cursor()
+
+                columns = list(DEMOGRAPHIC_COLUMNS) + list(TYPED_COLUMNS)
+                if include_ids:
+                    columns = ["id"] + columns
+                columns_str = ", ".join(f"`{column}`" for column in columns)
+                insert = "INSERT IGNORE" if include_ids else "INSERT"
+
+                self._copy_distinct_values(cursor, staging_table)
+                cursor.execute(
+                    f"{insert} INTO `{self.table_name}` ({columns_str}) "
+                    f"SELECT {columns_str} FROM `{staging_table}`"
+                )
+                rows = cursor.rowcount
+
+                if rollups is not None:
+                    self.write_rollups(cursor, rollups)
+
+                connection.commit()
+
+                cursor.close()
+                return rows
 
         except Error as e:
             print(f"Error: {e}")
+            return None
 
-    def create_table(self) -> None:
-        """Create a table in SQLite database"""
+        finally:
+            self.drop_staging_table(staging_table)
+
+    def drop_staging_table(self, staging_table: str) -> None:
+        """Delete a staging table."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                cursor.execute(f"DROP TABLE IF EXISTS `{staging_table}`")
+                cursor.close()
 
-        self.connect()
+            except Error as e:
+                print(f"Error: {e}")
 
-        sanitized_table_name = (
-            f"`{self.table_name}`"  # Backticks allow special characters
+    def _create_rollup_table(self, cursor) -> None:
+        """Create the table of daily counts per demographic value if it does not exist."""
+
+        # Single demographics are stored with an empty second demographic
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS demographic_rollups (
+                email VARCHAR(255) NOT NULL,
+                demographic_1 VARCHAR(64) NOT NULL,
+                value_1 VARCHAR(255) NOT NULL,
+                demographic_2 VARCHAR(64) NOT NULL DEFAULT '',
+                value_2 VARCHAR(255) NOT NULL DEFAULT '',
+                day DATE NOT NULL,
+                action_status TINYINT NOT NULL,
+                row_count BIGINT NOT NULL,
+                PRIMARY KEY (email, demographic_1, demographic_2, day,
+                             value_1, value_2, action_status)
+            )
+            """
         )
 
-        try:
-            if self.connection is None:
-                print("Not connected to the database.")
-                return
+    def create_rollup_table(self) -> None:
+        """Create the table of daily counts per demographic value if it does not exist."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_rollup_table(cursor)
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def write_rollups(self, cursor, counts) -> None:
+        """Add rollup counts on the caller's cursor, so they commit with the rows."""
+
+        if counts is None or counts.empty:
+            return
+
+        cursor.executemany(
+            """
+            INSERT INTO demographic_rollups
+                (email, demographic_1, value_1, demographic_2, value_2,
+                 day, action_status, row_count)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE row_count = row_count + VALUES(row_count)
+            """,
+            [
+                (self.table_name, *row)
+                for row in counts[ROLLUP_COLUMNS]
+                .astype(object)
+                .itertuples(index=False, name=None)
+            ],
+        )
+
+    def get_rollup_counts(
+        self,
+        demographic_1: str,
+        demographic_2: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> list[tuple]:
+        """
+        Retrieve daily counts per demographic value (or pair of values) and action status.
+
+        Returns (value_1, value_2, day, action_status, row_count) rows, with value_2
+        empty when only one demographic is asked for.
+        """
+
+        with self.connect() as connection:
+            swapped = (
+                demographic_2 is not None
+                and ROLLUP_DEMOGRAPHICS.index(demographic_2)
+                < ROLLUP_DEMOGRAPHICS.index(demographic_1)
+            )
+            if swapped:
+                demographic_1, demographic_2 = demographic_2, demographic_1
+
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return []
+
+                cursor = connection.cursor()
 
-            cursor = self.connection.cursor()
+                query = """
+                    SELECT value_1, value_2, day, action_status, row_count
+                    FROM demographic_rollups
+                    WHERE email = %s AND demographic_1 = %s AND demographic_2 = %s
+                """
+                parameters = [self.table_name, demographic_1, demographic_2 or ""]
+
+                if start is not None:
+                    query += " AND day >= %s"
+                    parameters.append(start)
+                if end is not None:
+                    query += " AND day <= %s"
+                    parameters.append(end)
+
+                cursor.execute(query, tuple(parameters))
+                results = cursor.fetchall()
+                cursor.close()
+
+                if swapped:
+                    return [(row[1], row[0], *row[2:]) for row in results]
+                return results
 
+            except Error as e:
+                print(f"Error: {e}")
+                return []
+
+    def _create_distinct_values_table(self, cursor) -> None:
+        """Create the catalog of distinct column values if it does not exist."""
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS distinct_values (
+                email VARCHAR(255) NOT NULL,
+                column_name VARCHAR(64) NOT NULL,
+                value VARCHAR(255) NOT NULL,
+                PRIMARY KEY (email, column_name, value)
+            )
+            """
+        )
+
+    def create_distinct_values_table(self) -> None:
+        """
+        Create the catalog of distinct column values if it does not exist.
+
+        A table loaded before the catalog was kept has no values in it yet, so
+        they are copied from the table's rows once.
+        """
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_distinct_values_table(cursor)
+
+                cursor.execute(
+                    "SELECT 1 FROM distinct_values WHERE email = %s LIMIT 1",
+                    (self.table_name,),
+                )
+                if cursor.fetchone() is None:
+                    self._copy_distinct_values(cursor, self.table_name)
+                    connection.commit()
+
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def add_distinct_values(self, cursor, values: dict[str, Iterable[str]]) -> None:
+        """Add values to the catalog on the caller's cursor, so they commit with the rows."""
+
+        rows = [
+            (self.table_name, column, str(value))
+            for column, column_values in values.items()
+            for value in column_values
+        ]
+        if not rows:
+            return
+
+        cursor.executemany(
+            """
+            INSERT IGNORE INTO distinct_values (email, column_name, value)
+            VALUES (%s, %s, %s)
+            """,
+            rows,
+        )
+
+    def _copy_distinct_values(self, cursor, source_table: str) -> None:
+        """Add the distinct values in source_table to the catalog, without reading them back."""
+
+        for column in DISTINCT_VALUE_COLUMNS:
             cursor.execute(
                 f"""
-                CREATE TABLE IF NOT EXISTS {sanitized_table_name} (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    gender VARCHAR(255),
-                    age INT,
-                    race VARCHAR(255),
-                    state VARCHAR(255),
-                    timestamp VARCHAR(255),
-                    action_status INT
-                )
-                """
+                INSERT IGNORE INTO distinct_values (email, column_name, value)
+                SELECT DISTINCT %s, %s, `{column}` FROM `{source_table}`
+                WHERE `{column}` IS NOT NULL
+                """,
+                (self.table_name, column),
             )
-            print("Table created successfully.")
 
-            cursor.close()
+    def get_distinct_values(self, column: str) -> list[str]:
+        """
+        Retrieve the distinct non-null values of a column of the user's table.
 
-        except Error as e:
-            print(f"Error: {e}")
+        Values come from the catalog kept at ingest. A column the catalog has no
+        values for is read from the table with SELECT DISTINCT instead.
+        """
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return []
+
+                cursor = connection.cursor()
+                self._create_distinct_values_table(cursor)
+
+                cursor.execute(
+                    """
+                    SELECT value FROM distinct_values
+                    WHERE email = %s AND column_name = %s
+                    ORDER BY value
+                    """,
+                    (self.table_name, column),
+                )
+                values = [row[0] for row in cursor.fetchall()]
+
+                if not values and column in self.get_columns(cursor):
+                    cursor.execute(
+                        f"SELECT DISTINCT `{column}` FROM `{self.table_name}` "
+                        f"WHERE `{column}` IS NOT NULL ORDER BY `{column}`"
+                    )
+                    values = [str(row[0]) for row in cursor.fetchall()]
+
+                cursor.close()
+                return values
+
+            except Error as e:
+                print(f"Error: {e}")
+                return []
+
+    def get_columns(self, cursor) -> list[str]:
+        """
+        Return the column names of the user's table in order, on the caller's cursor.
+
+        Names come from the catalog rather than a query on the table, so the
+        lookup does not depend on the table's size. They are read each time, as
+        another server process may have re-created the table since. A missing
+        table has no columns.
+        """
+
+        return list(self._get_column_types(cursor))
+
+    def _get_column_types(self, cursor) -> dict[str, str]:
+        """Return the column types of the user's table, keyed by column name in order."""
+
+        cursor.execute(
+            """
+            SELECT COLUMN_NAME, COLUMN_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+            """,
+            (self.table_name,),
+        )
+        return {name: column_type for name, column_type in cursor.fetchall()}
+
+    def _get_index_names(self, cursor) -> set[str]:
+        """Return the names of the indexes on the user's table."""
+
+        cursor.execute(
+            """
+            SELECT DISTINCT INDEX_NAME FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            """,
+            (self.table_name,),
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def _index_name(self, suffix: str) -> str:
+        """Name one of the user's secondary indexes.
+
+        SQLite index names are shared by the whole database and MySQL ones are
+        limited to 64 characters, so the table name is hashed into the name.
+        """
+
+        digest = hashlib.sha1(self.table_name.encode()).hexdigest()[:12]
+        return f"ix_{digest}_{suffix}"
+
+    @staticmethod
+    def _enum_type(values: Iterable[str]) -> str:
+        """Build an ENUM column type from a list of values.
+
+        ENUM values compare case-insensitively and ignore trailing spaces, so
+        only the first of values that differ in just those ways is kept.
+        """
+
+        seen = set()
+        quoted = []
+        for value in values:
+            key = str(value).rstrip().lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            escaped = str(value).replace("\\", "\\\\").replace("'", "''")
+            quoted.append(f"'{escaped}'")
+        return f"ENUM({', '.join(quoted)})"
+
+    @staticmethod
+    def _enum_values(column_type: str) -> list[str]:
+        """Parse the values out of an ENUM column type."""
+
+        return [
+            value.replace("''", "'").replace("\\\\", "\\")
+            for value in re.findall(r"'((?:[^']|'')*)'", column_type)
+        ]
+
+    @staticmethod
+    def _normalize_type(column_type: str) -> str:
+        """Lower-case a column type and drop integer display widths."""
+
+        return re.sub(r"int\(\d+\)", "int", column_type.lower())
 
     def delete_table(self) -> None:
         """delete a table"""
 
-        self.connect()
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
 
-        try:
-            if self.connection is None:
-                print("Not connected to the database.")
+                cursor = connection.cursor()
+                cursor.execute(f"DROP TABLE IF EXISTS `{self.table_name}`")
+
+                # The catalog would otherwise offer the old values for the next upload
+                self._create_distinct_values_table(cursor)
+                cursor.execute(
+                    "DELETE FROM distinct_values WHERE email = %s", (self.table_name,)
+                )
+                self._create_rollup_table(cursor)
+                cursor.execute(
+                    "DELETE FROM demographic_rollups WHERE email = %s",
+                    (self.table_name,),
+                )
+                # Re-uploading a deleted file must not be skipped as a duplicate
+                self._create_ledger_table(cursor)
+                cursor.execute(
+                    "DELETE FROM ingested_files WHERE email = %s", (self.table_name,)
+                )
+                connection.commit()
+                DbConnectionManager.pin_to_primary(self.table_name)
+                print("Table deleted successfully.")
+
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
                 return
 
-            cursor = self.connection.cursor()
-            cursor.execute(f"DROP TABLE IF EXISTS `{self.table_name}`")
-            print("Table deleted successfully.")
+        self._publish_change(datetime.min, datetime.max)
 
-            cursor.close()
+    def _publish_change(self, start: datetime, end: datetime) -> None:
+        """Tell the notifier, if there is one, which time range lost rows."""
 
-        except Error as e:
-            print(f"Error: {e}")
+        if self.notifier is not None:
+            self.notifier.publish(self.table_name, start, end)
 
     def fetch_data(self, p=False) -> tuple[list[str], tuple[str, ...]]:
         """Get data for the table"""
 
-        self.connect()
+        with self.connect(readonly=True) as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return [], []
 
-        try:
-            if self.connection is None:
-                print("Not connected to the database.")
+                cursor = connection.cursor()
+
+                cursor.execute(f"SELECT * FROM `{self.table_name}`")
+                results = cursor.fetchall()
+
+                # Fetching the column headers
+                headers = [desc[0] for desc in cursor.description]
+
+                if results:
+                    print(f"Data fetched from {self.table_name}:")
+                    print(headers)
+
+                    if p:
+                        for row in results:
+                            print(row)
+                    return headers, results
+                else:
+                    print("No data found.")
+                    return headers, []
+
+            except Error as e:
+                print(f"Error: {e}")
                 return [], []
 
-            cursor = self.connection.cursor()
+    def iter_data(
+        self, chunk_size: int = FETCH_CHUNK_SIZE, readonly: bool = True
+    ) -> tuple[list[str], Iterator[list[tuple]]]:
+        """
+        Stream the user's table in chunks of at most chunk_size rows.
+
+        Returns the column headers and an iterator of row lists. Rows are read
+        from an unbuffered cursor on a connection of its own, so only one chunk
+        is held in memory and other calls on this repository do not interrupt
+        the stream. The connection is returned to the pool once the iterator is
+        exhausted or closed. Errors while reading are raised from the iterator.
+        With readonly=False the rows come from the primary, never a replica.
+        """
 
-            cursor.execute(f"SELECT * FROM `{self.table_name}`")
-            results = cursor.fetchall()
+        return self._stream(
+            lambda cursor: (f"SELECT * FROM `{self.table_name}`", ()),
+            chunk_size,
+            readonly=readonly,
+        )
 
-            # Fetching the column headers
-            headers = [desc[0] for desc in cursor.description]
+    def iter_filtered_data(
+        self,
+        columns: list[str],
+        values: Optional[dict[str, list]] = None,
+        ranges: Optional[dict[str, list[tuple]]] = None,
+        days: Optional[int] = None,
+        chunk_size: int = FETCH_CHUNK_SIZE,
+    ) -> tuple[list[str], Iterator[list[tuple]]]:
+        """
+        Stream the rows matching a selection, filtered in the database.
 
-            if results:
-                print(f"Data fetched from {self.table_name}:")
-                print(headers)
+        Only the given columns that exist in the table are read. values keeps
+        rows whose column is one of the listed values (IN), ranges rows whose
+        column falls in one of the inclusive (low, high) ranges (BETWEEN), and
+        days rows no more than that many days older than the newest timestamp.
+        An empty list of values or ranges matches no rows. Streams like iter_data.
+        """
+
+        return self._stream(
+            lambda cursor: self._filtered_query(cursor, columns, values, ranges, days),
+            chunk_size,
+        )
+
+    def _filtered_query(
+        self,
+        cursor,
+        columns: list[str],
+        values: Optional[dict[str, list]],
+        ranges: Optional[dict[str, list[tuple]]],
+        days: Optional[int],
+    ) -> Optional[tuple[str, tuple]]:
+        """Build the iter_filtered_data query, or None if the table does not exist."""
+
+        available = self.get_columns(cursor)
+        selected = [column for column in columns if column in available]
+        if not selected:
+            print("Table does not exist.")
+            return None
+
+        clauses = []
+        parameters = []
+
+        # Column names come from the table itself, never from the request
+        for column, column_values in (values or {}).items():
+            if column not in available:
+                continue
+            if not column_values:
+                clauses.append("1 = 0")
+                continue
+            placeholders = ", ".join(["%s"] * len(column_values))
+            clauses.append(f"`{column}` IN ({placeholders})")
+            parameters.extend(column_values)
+
+        for column, column_ranges in (ranges or {}).items():
+            if column not in available:
+                continue
+            if not column_ranges:
+                clauses.append("1 = 0")
+                continue
+            between = " OR ".join(
+                [f"`{column}` BETWEEN %s AND %s"] * len(column_ranges)
+            )
+            clauses.append(f"({between})")
+            for low, high in column_ranges:
+                parameters.extend([low, high])
+
+        if days is not None:
+            # Rather than MAX(), so every backend returns a typed timestamp
+            cursor.execute(
+                f"SELECT `timestamp` FROM `{self.table_name}` "
+                "WHERE `timestamp` IS NOT NULL ORDER BY `timestamp` DESC LIMIT 1"
+            )
+            row = cursor.fetchone()
+            # Tables not yet migrated to the typed schema return text
+            latest = self._parse_timestamp(row[0]) if row else None
+            if latest is not None:
+                clauses.append("`timestamp` >= %s")
+                parameters.append(latest - timedelta(days=days))
+
+        query = (
+            f"SELECT {', '.join(f'`{column}`' for column in selected)} "
+            f"FROM `{self.table_name}`"
+        )
+        if clauses:
+            query += f" WHERE {' AND '.join(clauses)}"
+        return query, tuple(parameters)
 
-                if p:
-                    for row in results:
-                        print(row)
-                return headers, results
-            else:
-                print("No data found.")
-                return headers, []
+    def _stream(
+        self,
+        build_query: Callable[[object], Optional[tuple[str, tuple]]],
+        chunk_size: int,
+        readonly: bool = True,
+    ) -> tuple[list[str], Iterator[list[tuple]]]:
+        """Run the query build_query returns on a dedicated connection and stream it."""
+
+        if readonly:
+            connection = DbConnectionManager.get_connection(
+                readonly=True, pin_key=self.table_name
+            )
+        else:
+            connection = DbConnectionManager.get_connection()
+
+        if connection is None:
+            print("Not connected to the database.")
+            return [], iter(())
+
+        try:
+            cursor = connection.cursor(buffered=False)
+            query = build_query(cursor)
+            if query is None:
+                connection.close()
+                return [], iter(())
+
+            cursor.execute(*query)
+            headers = [desc[0] for desc in cursor.description]
 
         except Error as e:
             print(f"Error: {e}")
-            return [], []
+            connection.close()
+            return [], iter(())
+
+        return headers, self._iter_chunks(connection, cursor, chunk_size)
+
+    @staticmethod
+    def _iter_chunks(connection, cursor, chunk_size: int) -> Iterator[list[tuple]]:
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if rows:
+                    yield rows
+                # A short chunk is the last one, which saves a round trip
+                if len(rows) < chunk_size:
+                    break
+
+        finally:
+            try:
+                cursor.close()
+            except Error:
+                # Rows left unread when the stream is closed early; the pool
+                # drops the connection when it cannot roll it back
+                pass
+            connection.close()
+
+    def iter_record_batches(
+        self, chunk_size: int = FETCH_CHUNK_SIZE
+    ) -> Iterator[pa.RecordBatch]:
+        """Stream the user's table as Arrow record batches of up to chunk_size rows."""
+
+        headers, chunks = self.iter_data(chunk_size)
+        return self.record_batches(headers, chunks)
+
+    @staticmethod
+    def record_batches(
+        headers: list[str], chunks: Iterable[list[tuple]]
+    ) -> Iterator[pa.RecordBatch]:
+        """Turn streamed row chunks into Arrow record batches, one per chunk."""
+
+        # A column that is all NULL in one chunk keeps the type seen in earlier ones
+        types = {}
+        for rows in chunks:
+            arrays = []
+            for name, values in zip(headers, zip(*rows)):
+                array = pa.array(values, type=types.get(name))
+                if name not in types and not pa.types.is_null(array.type):
+                    types[name] = array.type
+                arrays.append(array)
+            yield pa.RecordBatch.from_arrays(arrays, names=headers)
 
     def update_db_for_user(
         self,
@@ -172,147 +1333,307 @@ class SqliteDbRepo(DatabaseRepositoryInterface):
         choices: dict[str, list[str]],
         time: str,
     ) -> None:
-        """Update the database for the specified user with the selected demographics and choices."""
+        """Update the database for the specified user with the selected demographics and choices.
 
-        self.connect()
+        With a selection buffer the update is queued and written in the
+        background; otherwise it is written before returning.
+        """
 
-        try:
-            if self.connection is None:
-                print("Not connected to the database.")
-                return
+        selection = self._selection_row(demographics, choices, time)
 
-            cursor = self.connection.cursor()
-
-            if not time:
-                time = "year"
-
-            # Prepare the SQL query and parameters
-            set_clauses = []
-            parameters = []
-
-            # Check if we have at least one demographic to update
-            if len(demographics) > 0:
-                # Update demographic_one and its choices
-                demographic_one = demographics[0]
-                set_clauses.append("demographic_1 = %s")
-                parameters.append(demographic_one)
-
-                for i in range(4):
-                    choice_key = f"choice_{i + 1}_demographic_1"
-                    if len(choices.get(demographic_one, [])) > i:
-                        set_clauses.append(f"{choice_key} = %s")
-                        parameters.append(choices[demographic_one][i])
-                    else:
-                        set_clauses.append(f"{choice_key} = %s")
-                        parameters.append(None)  # Set to NULL if not available
-
-            if len(demographics) > 1:
-                # Update demographic_two and its choices
-                demographic_two = demographics[1]
-                set_clauses.append("demographic_2 = %s")
-                parameters.append(demographic_two)
-
-                for i in range(4):
-                    choice_key = f"choice_{i + 1}_demographic_2"
-                    if len(choices.get(demographic_two, [])) > i:
-                        set_clauses.append(f"{choice_key} = %s")
-                        parameters.append(choices[demographic_two][i])
-                    else:
-                        set_clauses.append(f"{choice_key} = %s")
-                        parameters.append(None)  # Set to NULL if not available
-
-            # Add the time variable
-            set_clauses.append("time = %s")
-            parameters.append(time)
-
-            # Complete the WHERE clause
-            where_clause = "email = %s"
-            parameters.append(self.table_name)
-
-            # Construct the final SQL query
-            sql_query = f"""
-            UPDATE users
-            SET {', '.join(set_clauses)}
-            WHERE {where_clause}
-            """
+        if self.selection_buffer is not None:
+            self.selection_buffer.submit(self.table_name, selection)
+        else:
+            self.write_selection(self.table_name, selection)
+
+    @staticmethod
+    def _selection_row(
+        demographics: list[str], choices: dict[str, list[str]], time: str
+    ) -> dict[str, Optional[str]]:
+        """Map a selection to the users table columns it sets."""
+
+        if not time:
+            time = "year"
+
+        row = {}
+
+        # Each demographic is stored with up to four choices, NULL if not available
+        for position, demographic in enumerate(demographics[:2], start=1):
+            row[f"demographic_{position}"] = demographic
+            for i in range(4):
+                selected = choices.get(demographic, [])
+                row[f"choice_{i + 1}_demographic_{position}"] = (
+                    selected[i] if len(selected) > i else None
+                )
 
-            set(sql_query)
+        row["time"] = time
+        return row
 
-            # Execute the update query
-            cursor.execute(sql_query, tuple(parameters))
-            self.connection.commit()
-            print("User data updated successfully.")
-            cursor.close()
+    def write_selection(
+        self, table_name: str, selection: dict[str, Optional[str]]
+    ) -> bool:
+        """Write a user's selection to the users table and return whether it succeeded."""
 
-        except Error as err:
-            print(f"Error: {err}")
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return False
+
+                cursor = connection.cursor()
+
+                set_clauses = [f"{column} = %s" for column in selection]
+                parameters = list(selection.values())
+
+                # Complete the WHERE clause
+                where_clause = "email = %s"
+                parameters.append(table_name)
+
+                # Construct the final SQL query
+                sql_query = f"""
+                UPDATE users
+                SET {', '.join(set_clauses)}
+                WHERE {where_clause}
+                """
+
+                # Execute the update query
+                cursor.execute(sql_query, tuple(parameters))
+                connection.commit()
+                DbConnectionManager.pin_to_primary(table_name)
+                print("User data updated successfully.")
+                cursor.close()
+                return True
+
+            except Error as err:
+                print(f"Error: {err}")
+                return False
 
     def get_last_login_data(
         self,
     ) -> tuple[Optional[list[str]], Optional[dict[str, list[str]]], Optional[str]]:
         """Retrieve the last login demographics and choices for the specified user."""
 
-        self.connect()
+        # Read back a selection that is still waiting to be written
+        if self.selection_buffer is not None:
+            self.selection_buffer.flush(self.table_name)
 
-        demographics = []
-        choices = {}
-        try:
-            if self.connection is None:
-                print("Not connected to the database.")
+        with self.connect(readonly=True) as connection:
+            demographics = []
+            choices = {}
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None, None, None
+
+                result = PreparedStatements.fetch_one(
+                    connection, SELECT_LAST_LOGIN, (self.table_name,)
+                )
+
+                if result:
+                    # Unpack the result
+                    demographic_one = result[0]
+                    demographic_two = result[5]
+                    time = result[10]
+
+                    if not time:
+                        time = "year"
+
+                    # Add demographics to the list, handling None values
+                    if demographic_one is not None:
+                        demographics.append(demographic_one)
+                        choices[demographic_one] = [
+                            result[1] if result[1] is not None else None,
+                            result[2] if result[2] is not None else None,
+                            result[3] if result[3] is not None else None,
+                            result[4] if result[4] is not None else None,
+                        ]
+
+                    if demographic_two is not None:
+                        demographics.append(demographic_two)
+                        choices[demographic_two] = [
+                            result[6] if result[6] is not None else None,
+                            result[7] if result[7] is not None else None,
+                            result[8] if result[8] is not None else None,
+                            result[9] if result[9] is not None else None,
+                        ]
+
+                    return list(set(demographics)), choices, time
+                else:
+                    print("No data found for the specified user.")
+                    return None, None, None
+
+            except mysql.connector.Error as err:
+                print(f"Error: {err}")
                 return None, None, None
 
-            cursor = self.connection.cursor()
+    def _create_ledger_table(self, cursor) -> None:
+        """Create the ledger of ingested upload hashes if it does not exist."""
 
-            # Prepare the SQL query to fetch the demographics and choices
-            cursor.execute(
-                """
-                SELECT demographic_1, choice_1_demographic_1, choice_2_demographic_1,
-                    choice_3_demographic_1, choice_4_demographic_1,
-                    demographic_2, choice_1_demographic_2, choice_2_demographic_2,
-                    choice_3_demographic_2, choice_4_demographic_2, time
-                FROM users
-                WHERE email = %s
-            """,
-                (self.table_name,),
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                email VARCHAR(255) NOT NULL,
+                content_hash CHAR(64) NOT NULL,
+                row_count BIGINT,
+                ingested_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (email, content_hash)
+            )
+            """
+        )
+
+    def has_ingested(self, content_hash: str) -> bool:
+        """Check whether an upload with this content hash was already ingested for the user."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return False
+
+                cursor = connection.cursor()
+                self._create_ledger_table(cursor)
+
+                cursor.execute(
+                    "SELECT 1 FROM ingested_files "
+                    "WHERE email = %s AND content_hash = %s",
+                    (self.table_name, content_hash),
+                )
+                result = cursor.fetchone()
+
+                if result is not None:
+                    # An entry left behind by a dropped or emptied table is stale
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM `{self.table_name}`)")
+                    has_rows = cursor.fetchone()
+                    if not has_rows or not has_rows[0]:
+                        result = None
+
+                cursor.close()
+                return result is not None
+
+            except Error as e:
+                print(f"Error: {e}")
+                return False
+
+    def record_ingest(self, content_hash: str, rows: int) -> None:
+        """Add an upload's content hash to the user's ingest ledger."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_ledger_table(cursor)
+
+                cursor.execute(
+                    """
+                    INSERT IGNORE INTO ingested_files (email, content_hash, row_count)
+                    VALUES (%s, %s, %s)
+                    """,
+                    (self.table_name, content_hash, rows),
+                )
+                connection.commit()
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
+    def _create_watermark_table(self, cursor) -> None:
+        """Create the table of per-user ingest high-water marks if it does not exist."""
+
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingest_watermarks (
+                email VARCHAR(255) NOT NULL PRIMARY KEY,
+                max_timestamp DATETIME(6),
+                max_id BIGINT
             )
+            """
+        )
+
+    def get_watermark(self) -> tuple[Optional[datetime], Optional[int]]:
+        """Retrieve the newest timestamp and id ingested for the user.
+
+        A table loaded without incremental mode has no mark yet, so its newest
+        timestamp is read from the table itself. Its ids may have been assigned
+        by the table rather than the upload, so no id is returned then.
+        """
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return None, None
 
-            result = cursor.fetchone()
-
-            if result:
-                # Unpack the result
-                demographic_one = result[0]
-                demographic_two = result[5]
-                time = result[10]
-
-                if not time:
-                    time = "year"
-
-                # Add demographics to the list, handling None values
-                if demographic_one is not None:
-                    demographics.append(demographic_one)
-                    choices[demographic_one] = [
-                        result[1] if result[1] is not None else None,
-                        result[2] if result[2] is not None else None,
-                        result[3] if result[3] is not None else None,
-                        result[4] if result[4] is not None else None,
-                    ]
-
-                if demographic_two is not None:
-                    demographics.append(demographic_two)
-                    choices[demographic_two] = [
-                        result[6] if result[6] is not None else None,
-                        result[7] if result[7] is not None else None,
-                        result[8] if result[8] is not None else None,
-                        result[9] if result[9] is not None else None,
-                    ]
+                cursor = connection.cursor()
+                self._create_watermark_table(cursor)
+
+                cursor.execute(
+                    "SELECT max_timestamp, max_id FROM ingest_watermarks "
+                    "WHERE email = %s",
+                    (self.table_name,),
+                )
+                result = cursor.fetchone()
+
+                if result is not None:
+                    # A mark left behind by a dropped or emptied table must not hide new rows
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM `{self.table_name}`)")
+                    has_rows = cursor.fetchone()
+                    if not has_rows or not has_rows[0]:
+                        result = None
+                else:
+                    result = self._get_table_watermark(cursor)
 
                 cursor.close()
-                return list(set(demographics)), choices, time
-            else:
-                print("No data found for the specified user.")
+                return (result[0], result[1]) if result else (None, None)
+
+            except Error as e:
+                print(f"Error: {e}")
+                return None, None
+
+    def _get_table_watermark(self, cursor) -> Optional[tuple]:
+        """Return the newest timestamp in the user's table, if it has rows."""
+
+        if "timestamp" not in self.get_columns(cursor):
+            return None
+
+        cursor.execute(f"SELECT MAX(`timestamp`) FROM `{self.table_name}`")
+        row = cursor.fetchone()
+        # Tables not yet migrated to the typed schema return text
+        latest = self._parse_timestamp(row[0]) if row else None
+        return (latest, None) if latest is not None else None
+
+    def update_watermark(self, max_timestamp: datetime, max_id: Optional[int]) -> None:
+        """Move the user's high-water mark forward; it never moves back."""
+
+        with self.connect() as connection:
+            try:
+                if connection is None:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                self._create_watermark_table(cursor)
+
+                cursor.execute(
+                    """
+                    INSERT INTO ingest_watermarks (email, max_timestamp, max_id)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        max_timestamp = GREATEST(
+                            COALESCE(max_timestamp, VALUES(max_timestamp)),
+                            COALESCE(VALUES(max_timestamp), max_timestamp)
+                        ),
+                        max_id = GREATEST(
+                            COALESCE(max_id, VALUES(max_id)),
+                            COALESCE(VALUES(max_id), max_id)
+                        )
+                    """,
+                    (self.table_name, max_timestamp, max_id),
+                )
+                connection.commit()
                 cursor.close()
-                return None, None, None
 
-        except mysql.connector.Error as err:
-            print(f"Error: {err}")
-            return None, None, None
+            except Error as e:
+                print(f"Error: {e}")
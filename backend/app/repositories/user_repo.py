@@ -1,12 +1,29 @@
 import base64
 import json
+from contextlib import contextmanager
 from typing import Optional
 
 from mysql.connector import Error
 
 from backend.app.infrastructure.db_connection_manager import DbConnectionManager
+from backend.app.infrastructure.prepared_statements import PreparedStatements
 from backend.app.use_cases.UserRepositoryInterface import UserRepositoryInterface
 
+# Prepared once per pooled connection; see PreparedStatements
+SELECT_USER_BY_EMAIL = "SELECT * FROM users WHERE email = %s"
+
+SELECT_USER_BY_EMAIL_AND_PASSWORD = (
+    "SELECT * FROM users WHERE email = %s AND password = %s"
+)
+
+UPDATE_PASSWORD = """
+                UPDATE users
+                SET password = %s
+                WHERE email = %s
+                """
+
+EMAIL_INDEX = "ux_users_email"
+
 
 class UserRepo(UserRepositoryInterface):
     """UserRepo is a repository class that provides methods to interact with the users table in the database.
@@ -16,8 +33,8 @@ class UserRepo(UserRepositoryInterface):
     __init__(table_name: str)
         Initializes the UserRepo with the specified table name.
 
-    connect()
-        Establishes the database connection using DbConnectionManager.
+    connect(readonly: bool = False, pin_key: Optional[str] = None)
+        Checks out a connection from DbConnectionManager for a with block.
 
     get_user_by_email(email: str) -> Optional[dict]
         Fetches a user by their email.
@@ -31,113 +48,152 @@ class UserRepo(UserRepositoryInterface):
     update_password(email: str, new_password: str) -> None
         Updates the password of a user by their email.
 
+    ensure_email_index(connection) -> None
+        Adds a unique index on the users table's email column if it has none.
+
     process_shared_data(encoded_data: str) -> dict"""
 
+    # Whether this process has already checked the users table for its email index
+    _email_index_checked = False
+
     def __init__(self, table_name: str):
-        self.connection = None
         self.table_name = table_name
 
-    def connect(self):
-        """Establishes the database connection using DbConnectionManager."""
-        self.connection = DbConnectionManager.get_connection()
-        if self.connection:
-            print("Connected")
+    @contextmanager
+    def connect(self, readonly: bool = False, pin_key: Optional[str] = None):
+        """Checks out a connection from DbConnectionManager for a with block.
 
-    def get_user_by_email(self, email: str) -> Optional[dict]:
-        """Fetches a user by their email."""
-        self.connect()
+        The connection goes back to the pool when the block ends. Read-only
+        work may go to a replica, unless pin_key (the user's email) has just
+        been written.
+        """
+        with DbConnectionManager.connection(
+            readonly=readonly, pin_key=pin_key
+        ) as connection:
+            if connection:
+                print("Connected")
 
-        try:
-            if not self.connection:
-                print("Not connected to the database.")
-                return None
+                # Only the primary takes schema changes
+                if not readonly and not UserRepo._email_index_checked:
+                    self.ensure_email_index(connection)
 
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-            user = cursor.fetchone()
+            yield connection
 
-            cursor.close()
-            return user
+    def ensure_email_index(self, connection) -> None:
+        """Adds a unique index on the users table's email column if it has none.
 
-        except Error as e:
-            print(f"Error: {e}")
-            return None
+        Every lookup is by email, so without it each login scans the table.
+        The check runs once per process, on the caller's connection.
+        """
+        UserRepo._email_index_checked = True
 
-    def create_user(
-        self, firstname: str, lastname: str, email: str, password: str
-    ) -> None:
-        """Inserts a new user into the users table."""
-        self.connect()
+        # SQLite creates the users table together with the index
+        if DbConnectionManager.dialect().name == "sqlite":
+            return
 
         try:
-            if not self.connection:
-                print("Not connected to the database.")
-                return
-
-            cursor = self.connection.cursor()
+            cursor = connection.cursor()
             cursor.execute(
                 """
-                INSERT INTO users (firstname, lastname, email, password)
-                VALUES (%s, %s, %s, %s)
+                SELECT 1 FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                AND COLUMN_NAME = 'email' AND SEQ_IN_INDEX = 1 AND NON_UNIQUE = 0
+                LIMIT 1
                 """,
-                (firstname, lastname, email, password),
+                (self.table_name,),
             )
-            self.connection.commit()
-            print("User created successfully.")
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f"ALTER TABLE `{self.table_name}` "
+                    f"ADD UNIQUE INDEX `{EMAIL_INDEX}` (email)"
+                )
+                print("Added a unique index on email.")
             cursor.close()
 
         except Error as e:
+            # E.g. duplicate emails; lookups still work, just without the index
             print(f"Error: {e}")
 
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        """Fetches a user by their email."""
+        with self.connect(readonly=True, pin_key=email) as connection:
+            try:
+                if not connection:
+                    print("Not connected to the database.")
+                    return None
+
+                return PreparedStatements.fetch_one(
+                    connection, SELECT_USER_BY_EMAIL, (email,), dictionary=True
+                )
+
+            except Error as e:
+                print(f"Error: {e}")
+                return None
+
+    def create_user(
+        self, firstname: str, lastname: str, email: str, password: str
+    ) -> None:
+        """Inserts a new user into the users table."""
+        with self.connect() as connection:
+            try:
+                if not connection:
+                    print("Not connected to the database.")
+                    return
+
+                cursor = connection.cursor()
+                cursor.execute(
+                    """
+                    INSERT INTO users (firstname, lastname, email, password)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (firstname, lastname, email, password),
+                )
+                connection.commit()
+                DbConnectionManager.pin_to_primary(email)
+                print("User created successfully.")
+                cursor.close()
+
+            except Error as e:
+                print(f"Error: {e}")
+
     def get_user_by_email_and_password(
         self, email: str, password: str
     ) -> Optional[dict]:
         """Fetches a user by their email and password."""
-        self.connect()
-
-        try:
-            if not self.connection:
-                print("Not connected to the database.")
+        with self.connect() as connection:
+            try:
+                if not connection:
+                    print("Not connected to the database.")
+                    return None
+
+                return PreparedStatements.fetch_one(
+                    connection,
+                    SELECT_USER_BY_EMAIL_AND_PASSWORD,
+                    (email, password),
+                    dictionary=True,
+                )
+
+            except Error as e:
+                print(f"Error: {e}")
                 return None
 
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(
-                "SELECT * FROM users WHERE email = %s AND password = %s",
-                (email, password),
-            )
-            user = cursor.fetchone()
-
-            cursor.close()
-            return user
-
-        except Error as e:
-            print(f"Error: {e}")
-            return None
-
     def update_password(self, email: str, new_password: str) -> None:
         """Updates the password of a user by their email."""
-        self.connect()
-
-        try:
-            if not self.connection:
-                print("Not connected to the database.")
-                return
-
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                UPDATE users
-                SET password = %s
-                WHERE email = %s
-                """,
-                (new_password, email),
-            )
-            self.connection.commit()
-            print(f"Password for {email} updated successfully.")
-            cursor.close()
-
-        except Error as e:
-            print(f"Error: {e}")
+        with self.connect() as connection:
+            try:
+                if not connection:
+                    print("Not connected to the database.")
+                    return
+
+                PreparedStatements.execute(
+                    connection, UPDATE_PASSWORD, (new_password, email)
+                )
+                connection.commit()
+                DbConnectionManager.pin_to_primary(email)
+                print(f"Password for {email} updated successfully.")
+
+            except Error as e:
+                print(f"Error: {e}")
 
     def process_shared_data(self, encoded_data: str) -> dict:
         """
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from datetime import date, datetime
+from typing import Iterable, Iterator, Optional
+
+import pyarrow as pa
 
 
 class DatabaseRepositoryInterface(ABC):
@@ -11,8 +14,22 @@ class DatabaseRepositoryInterface(ABC):
     see_all_tables() -> None
         Abstract method to see all tables in the database.
 
-    create_table() -> None
+    create_table(categories: Optional[dict[str, list[str]]] = None) -> None
         Abstract method to create a new table in the database.
+        Parameters:
+            categories (dict[str, list[str]]): Known values of the dictionary-coded demographic columns.
+
+    migrate_table() -> bool
+        Abstract method to convert an existing table to the typed schema and add missing indexes.
+
+    ensure_categories(categories: dict[str, Iterable[str]]) -> None
+        Abstract method to add new values to the dictionary-coded demographic columns.
+
+    partition_table() -> bool
+        Abstract method to partition the table by month, adding partitions for new months.
+
+    drop_data_before(cutoff: date) -> bool
+        Abstract method to delete the rows from before the cutoff day.
 
     delete_table() -> None
         Abstract method to delete a table from the database.
@@ -24,6 +41,27 @@ class DatabaseRepositoryInterface(ABC):
         Returns:
             tuple: A tuple containing a list of strings and a tuple of strings.
 
+    get_columns(cursor) -> list[str]
+        Abstract method to list the table's column names from the catalog, on the caller's cursor.
+
+    iter_data(chunk_size: int, readonly: bool) -> tuple[list[str], Iterator[list[tuple]]]
+        Abstract method to stream the table's rows in fixed-size chunks, from the primary if not readonly.
+        Returns:
+            tuple: The column headers and an iterator of row lists.
+
+    iter_record_batches(chunk_size: int) -> Iterator[pa.RecordBatch]
+        Abstract method to stream the table as Arrow record batches.
+
+    iter_filtered_data(columns: list[str], values: Optional[dict[str, list]] = None,
+                       ranges: Optional[dict[str, list[tuple]]] = None, days: Optional[int] = None,
+                       chunk_size: int) -> tuple[list[str], Iterator[list[tuple]]]
+        Abstract method to stream the rows matching a selection, filtered in the database.
+        Parameters:
+            columns (list[str]): The columns to read.
+            values (dict[str, list]): Allowed values per column.
+            ranges (dict[str, list[tuple]]): Allowed inclusive ranges per column.
+            days (int): How many days before the newest timestamp to keep.
+
     update_db_for_user(demographics: list[str], choices: dict[str, list[str]], time: str) -> None
         Abstract method to update the database for a user.
         Parameters:
@@ -35,6 +73,46 @@ class DatabaseRepositoryInterface(ABC):
         Abstract method to get the last login data.
         Returns:
             tuple: A tuple containing optional list of strings, optional dictionary of user choices, and optional timestamp.
+
+    create_staging_table() -> Optional[str]
+        Abstract method to create an empty staging table and return its name.
+
+    publish_staging_table(staging_table: str, include_ids: bool = False, rollups=None) -> Optional[int]
+        Abstract method to atomically copy a staging table into the user's table.
+
+    drop_staging_table(staging_table: str) -> None
+        Abstract method to delete a staging table.
+
+    create_rollup_table() -> None
+        Abstract method to create the table of daily counts per demographic value.
+
+    write_rollups(cursor, counts) -> None
+        Abstract method to add rollup counts within the caller's transaction.
+
+    get_rollup_counts(demographic_1: str, demographic_2: Optional[str] = None,
+                      start: Optional[date] = None, end: Optional[date] = None) -> list[tuple]
+        Abstract method to get daily counts per demographic value and action status.
+
+    create_distinct_values_table() -> None
+        Abstract method to create the catalog of distinct column values.
+
+    add_distinct_values(cursor, values: dict[str, Iterable[str]]) -> None
+        Abstract method to add values to the catalog within the caller's transaction.
+
+    get_distinct_values(column: str) -> list[str]
+        Abstract method to get the distinct values of a column, from the catalog if it has them.
+
+    has_ingested(content_hash: str) -> bool
+        Abstract method to check whether an upload with this content hash was already ingested.
+
+    record_ingest(content_hash: str, rows: int) -> None
+        Abstract method to record an ingested upload's content hash.
+
+    get_watermark() -> tuple[Optional[datetime], Optional[int]]
+        Abstract method to get the newest timestamp and id ingested for the user.
+
+    update_watermark(max_timestamp: datetime, max_id: Optional[int]) -> None
+        Abstract method to move the user's high-water mark forward.
     """
 
     @abstractmethod
@@ -42,7 +120,23 @@ class DatabaseRepositoryInterface(ABC):
         pass
 
     @abstractmethod
-    def create_table(self) -> None:
+    def create_table(self, categories: Optional[dict[str, list[str]]] = None) -> None:
+        pass
+
+    @abstractmethod
+    def migrate_table(self) -> bool:
+        pass
+
+    @abstractmethod
+    def ensure_categories(self, categories: dict[str, Iterable[str]]) -> None:
+        pass
+
+    @abstractmethod
+    def partition_table(self) -> bool:
+        pass
+
+    @abstractmethod
+    def drop_data_before(self, cutoff: date) -> bool:
         pass
 
     @abstractmethod
@@ -53,6 +147,31 @@ class DatabaseRepositoryInterface(ABC):
     def fetch_data(self, p: bool = False) -> tuple[list[str], tuple[str, ...]]:
         pass
 
+    @abstractmethod
+    def get_columns(self, cursor) -> list[str]:
+        pass
+
+    @abstractmethod
+    def iter_data(
+        self, chunk_size: int, readonly: bool = True
+    ) -> tuple[list[str], Iterator[list[tuple]]]:
+        pass
+
+    @abstractmethod
+    def iter_record_batches(self, chunk_size: int) -> Iterator[pa.RecordBatch]:
+        pass
+
+    @abstractmethod
+    def iter_filtered_data(
+        self,
+        columns: list[str],
+        values: Optional[dict[str, list]] = None,
+        ranges: Optional[dict[str, list[tuple]]] = None,
+        days: Optional[int] = None,
+        chunk_size: int = 10_000,
+    ) -> tuple[list[str], Iterator[list[tuple]]]:
+        pass
+
     @abstractmethod
     def update_db_for_user(
         self,
@@ -67,3 +186,63 @@ class DatabaseRepositoryInterface(ABC):
         self,
     ) -> tuple[Optional[list[str]], Optional[dict[str, list[str]]], Optional[str]]:
         pass
+
+    @abstractmethod
+    def create_staging_table(self) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def publish_staging_table(
+        self, staging_table: str, include_ids: bool = False, rollups=None
+    ) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def drop_staging_table(self, staging_table: str) -> None:
+        pass
+
+    @abstractmethod
+    def create_rollup_table(self) -> None:
+        pass
+
+    @abstractmethod
+    def write_rollups(self, cursor, counts) -> None:
+        pass
+
+    @abstractmethod
+    def get_rollup_counts(
+        self,
+        demographic_1: str,
+        demographic_2: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> list[tuple]:
+        pass
+
+    @abstractmethod
+    def create_distinct_values_table(self) -> None:
+        pass
+
+    @abstractmethod
+    def add_distinct_values(self, cursor, values: dict[str, Iterable[str]]) -> None:
+        pass
+
+    @abstractmethod
+    def get_distinct_values(self, column: str) -> list[str]:
+        pass
+
+    @abstractmethod
+    def has_ingested(self, content_hash: str) -> bool:
+        pass
+
+    @abstractmethod
+    def record_ingest(self, content_hash: str, rows: int) -> None:
+        pass
+
+    @abstractmethod
+    def get_watermark(self) -> tuple[Optional[datetime], Optional[int]]:
+        pass
+
+    @abstractmethod
+    def update_watermark(self, max_timestamp: datetime, max_id: Optional[int]) -> None:
+        pass
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 
+import pandas as pd
 from werkzeug.datastructures import FileStorage
 
 
@@ -20,11 +21,23 @@ class FileRepositoryInterface(ABC):
         get_headers() -> list[str]:
             Abstract method to retrieve the headers from the CSV file.
 
+        get_distinct_values(header: str) -> list[str]:
+            Abstract method to retrieve the distinct values under a header.
+
         update_comparison_csv(demographics: list[str], choices: dict[str, list[str]], time: str) -> None:
             Abstract method to update the comparison CSV file with the given demographics, choices, and time.
 
         get_data_for_time(time: str) -> None:
             Abstract method to retrieve data for a specific time.
+
+        get_data() -> pd.DataFrame:
+            Abstract method to read all of the data into a DataFrame.
+
+        get_comparison_data(demographics: list[str], choices: dict[str, list[str]], time: str) -> pd.DataFrame:
+            Abstract method to read the data matching the given demographics, choices, and time into a DataFrame.
+
+        get_group_counts(demographics: list[str], choices: dict[str, list[str]], time: str) -> pd.DataFrame:
+            Abstract method to count the rows matching the given demographics, choices, and time per group and action status.
     """
 
     @abstractmethod
@@ -43,6 +56,10 @@ class FileRepositoryInterface(ABC):
     def get_headers(self) -> list[str]:
         pass
 
+    @abstractmethod
+    def get_distinct_values(self, header: str) -> list[str]:
+        pass
+
     @abstractmethod
     def update_comparison_csv(
         self,
@@ -55,3 +72,25 @@ class FileRepositoryInterface(ABC):
     @abstractmethod
     def get_data_for_time(self, time: str) -> None:
         pass
+
+    @abstractmethod
+    def get_data(self) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_comparison_data(
+        self,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+        time: str,
+    ) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_group_counts(
+        self,
+        demographics: list[str],
+        choices: dict[str, list[str]],
+        time: str,
+    ) -> pd.DataFrame:
+        pass
@@ -1,5 +1,6 @@
 from .change_password_interactor import ChangePasswordInteractor
 from .generate import Generate
+from .get_group_counts import GetGroupCounts
 from .get_headers import GetHeaders
 from .get_last_login_data import GetLastLoginData
 from .get_values_under_header import GetValuesUnderHeader
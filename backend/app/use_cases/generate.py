@@ -23,8 +23,8 @@ class Generate:
         Initializes the Generate use case with file and database repositories.
 
     execute(demographics: list[str], choices: dict[str, list[str]], time: str) -> None
-        Executes the generate use case by updating the comparison CSV and database,
-        then processes the output from the model and prints the results.
+        Executes the generate use case by reading the selected data and updating
+        the database, then processes the output from the model and prints the results.
     """
 
     def __init__(
@@ -36,10 +36,11 @@ class Generate:
     def execute(
         self, demographics: list[str], choices: dict[str, list[str]], time: str
     ) -> None:
-        self.file_repo.update_comparison_csv(demographics, choices, time)
+        # The selected rows go to the model in memory, not through a shared file
+        data = self.file_repo.get_comparison_data(demographics, choices, time)
         self.db_repo.update_db_for_user(demographics, choices, time)
         print("GENERATE:", demographics, choices, time)
-        model_executer = ModelTrainer()
+        model_executer = ModelTrainer(data=data)
         output = model_executer.train_and_evaluate()
 
         if output is None:
@@ -0,0 +1,51 @@
+from backend.app.use_cases.FileRepositoryInterface import FileRepositoryInterface
+
+
+class GetGroupCounts:
+    """
+    GetGroupCounts is a use case class that summarizes the user's selections as row counts per group.
+
+    Attributes:
+        file_repo (FileRepositoryInterface): An interface for file repository operations.
+
+    Methods:
+        __init__(file_repo: FileRepositoryInterface):
+            Initializes the GetGroupCounts with a file repository interface.
+
+        execute(demographics: list[str], choices: dict[str, list[str]], time: str) -> list[dict]:
+            Counts the rows per chosen demographic value (or pair of values) in the time window.
+            Returns each group's values, its row count, how many rows have a positive action status and their share.
+    """
+
+    def __init__(self, file_repo: FileRepositoryInterface):
+        self.file_repo = file_repo
+
+    def execute(
+        self, demographics: list[str], choices: dict[str, list[str]], time: str
+    ) -> list[dict]:
+        """Count the rows per chosen demographic value (or pair of values)."""
+        try:
+            counts = self.file_repo.get_group_counts(demographics, choices, time)
+
+            groups = []
+            for values, group in counts.groupby(demographics):
+                if not isinstance(values, tuple):
+                    values = (values,)
+
+                rows = int(group["row_count"].sum())
+                positive = group.loc[group["action_status"] == 1, "row_count"]
+                positive = int(positive.sum())
+                groups.append(
+                    {
+                        "group": dict(zip(demographics, values)),
+                        "rows": rows,
+                        "positive": positive,
+                        "positive_rate": round(positive / rows, 4) if rows else 0.0,
+                    }
+                )
+
+            return groups
+
+        except Exception as e:
+            print(f"Error in GetGroupCounts use case: {e}")
+            return []
@@ -1,11 +1,9 @@
-import pandas as pd
-
 from backend.app.use_cases.FileRepositoryInterface import FileRepositoryInterface
 
 
 class GetValuesUnderHeader:
     """
-    GetValuesUnderHeader is a use case class that fetches unique values under a specified header from a CSV file.
+    GetValuesUnderHeader is a use case class that fetches unique values under a specified header of the user's table.
 
     Attributes:
         file_repo (FileRepositoryInterface): An interface for file repository operations.
@@ -15,7 +13,7 @@ class GetValuesUnderHeader:
             Initializes the GetValuesUnderHeader with a file repository interface.
 
         execute(header: str) -> list[str]:
-            Fetches unique values under the specified header from the CSV file.
+            Fetches unique values under the specified header from the repository's catalog of distinct values.
             If the header is "age", it categorizes the values into age ranges.
             Returns a list of unique values or age ranges.
     """
@@ -26,8 +24,6 @@ class GetValuesUnderHeader:
     def execute(self, header: str) -> list[str]:
         """Fetch unique values under the specified header."""
         try:
-            self.file_repo.save_data_to_csv()
-
             # First, get the headers from the repository
             headers = self.file_repo.get_headers()
 
@@ -35,18 +31,16 @@ class GetValuesUnderHeader:
                 print(f"Header '{header}' does not exist in the dataset.")
                 return []
 
-            # Read the data from CSV (file_repo provides the file path)
-            df = pd.read_csv(self.file_repo.file_path)
+            # The repository keeps the distinct values, so the table is not read
+            unique_values = self.file_repo.get_distinct_values(header)
 
-            # Drop any NaN values in the specified column
-            unique_values = df[header].dropna().unique()
-
-            print(f"Unique values under '{header}':", unique_values.tolist())
+            print(f"Unique values under '{header}':", unique_values)
 
             # If it's the "age" column, categorize the values into ranges
             if header == "age":
                 result = set()
-                for value in unique_values.tolist():
+                for value in unique_values:
+                    value = float(value)
                     if value <= 26:
                         result.add("18-26")
                     elif value <= 35:
@@ -65,11 +59,8 @@ class GetValuesUnderHeader:
                 print(f"Age ranges: {list(result)}")
                 return list(result)
 
-            return unique_values.tolist()
+            return unique_values
 
         except Exception as e:
             print(f"Error in GetValuesUnderHeader use case: {e}")
             return []
-
-        finally:
-            self.file_repo.delete_csv_data()
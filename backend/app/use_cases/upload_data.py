@@ -5,7 +5,7 @@ from backend.app.use_cases.FileRepositoryInterface import FileRepositoryInterfac
 
 class UploadData:
     """
-    A use case class responsible for handling the upload of CSV data.
+    A use case class responsible for handling the upload of CSV, Parquet or Arrow IPC data.
 
     Attributes:
         file_repo (FileRepositoryInterface): An interface for file repository operations.
@@ -15,9 +15,9 @@ class UploadData:
             Initializes the UploadData instance with a file repository interface.
 
         execute(csv_file: FileStorage) -> bool:
-            Executes the upload process by importing the CSV file to the database.
+            Executes the upload process by importing the file to the database.
             Args:
-                csv_file (FileStorage): The CSV file to be uploaded.
+                csv_file (FileStorage): The CSV, Parquet or Arrow IPC file to be uploaded.
             Returns:
                 bool: True if the import is successful, False otherwise.
     """
@@ -0,0 +1 @@
+"""Synthetic data and benchmarks for ingestion and export."""
@@ -0,0 +1,172 @@
+"""
+Ingestion and export benchmark for CsvFileRepo.
+
+Generates a synthetic dataset, uploads it with import_csv_to_db and exports it
+again with save_data_to_csv, reporting rows/sec and peak memory for each step.
+It connects through DbConnectionManager, so it runs against whatever database
+the DB_* environment variables point at. Use a local or throwaway database:
+the benchmark user's table is dropped before and after each run.
+
+Example:
+    python -m backend.benchmarks.ingest_benchmark --rows 1000 100000 --format parquet
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+from backend.app.entities.user import User
+from backend.app.repositories.csv_file_repo import DEFAULT_BATCH_SIZE, CsvFileRepo
+from backend.benchmarks.synthetic_data import write_dataset
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+BENCHMARK_USER = "benchmark@example.com"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the process's peak resident memory so far in MB, if the OS reports it."""
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(step: Callable[[], object], rows: int) -> dict:
+    """Run step once and return its duration, throughput and peak traced memory."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = step()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ok": result is not False,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "peak_traced_mb": round(peak / (1024 * 1024), 1),
+    }
+
+
+def run_benchmark(
+    rows: int,
+    seed: int = 0,
+    upload_format: str = "csv",
+    chunk_size: Optional[int] = 100_000,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_load_data: bool = False,
+    work_dir: Optional[str] = None,
+) -> dict:
+    """Benchmark one upload and export of a synthetic dataset with the given size."""
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        extension = ".parquet" if upload_format == "parquet" else ".csv"
+        upload_path = os.path.join(temp_dir, f"upload_{rows}{extension}")
+        export_path = os.path.join(temp_dir, "export.csv")
+
+        generate_start = time.perf_counter()
+        write_dataset(upload_path, rows, seed=seed)
+        generate_seconds = time.perf_counter() - generate_start
+
+        user = User(BENCHMARK_USER)
+        file_repo = CsvFileRepo(
+            user,
+            export_path,
+            batch_size=batch_size,
+            use_load_data=use_load_data,
+            chunk_size=chunk_size,
+        )
+
+        file_repo.db_repo.delete_table()
+        try:
+            ingest = measure(lambda: file_repo.import_csv_to_db(upload_path), rows)
+            export = measure(file_repo.save_data_to_csv, rows)
+        finally:
+            file_repo.db_repo.delete_table()
+
+        return {
+            "rows": rows,
+            "format": upload_format,
+            "upload_mb": round(os.path.getsize(upload_path) / (1024 * 1024), 1),
+            "generate_seconds": round(generate_seconds, 3),
+            "ingest": ingest,
+            "export": export,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def format_report(results: list[dict]) -> str:
+    """Format benchmark results as a plain-text table."""
+
+    lines = [
+        f"{'rows':>12} {'format':>8} {'ingest rows/s':>14} {'ingest MB':>10} "
+        f"{'export rows/s':>14} {'export MB':>10} {'peak RSS MB':>12}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['rows']:>12} {result['format']:>8} "
+            f"{result['ingest']['rows_per_sec'] or 0:>14.0f} "
+            f"{result['ingest']['peak_traced_mb']:>10.1f} "
+            f"{result['export']['rows_per_sec'] or 0:>14.0f} "
+            f"{result['export']['peak_traced_mb']:>10.1f} "
+            f"{result['peak_rss_mb'] or 0:>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=lambda value: int(float(value)),
+        nargs="+",
+        default=[10**3, 10**4, 10**5],
+        help="dataset sizes to run, e.g. 1e3 1e6 (10^3 to 10^8)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--load-data", action="store_true")
+    parser.add_argument("--work-dir", help="where to write the generated files")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = [
+        run_benchmark(
+            rows,
+            seed=args.seed,
+            upload_format=args.format,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            use_load_data=args.load_data,
+            work_dir=args.work_dir,
+        )
+        for rows in args.rows
+    ]
+
+    print(format_report(results))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
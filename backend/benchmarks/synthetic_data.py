@@ -0,0 +1,120 @@
+"""Deterministic synthetic transaction data matching the upload schema."""
+
+import os
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+GENDERS = ["Male", "Female", "Non-binary"]
+GENDER_WEIGHTS = [0.48, 0.48, 0.04]
+
+RACES = ["White", "Black", "Hispanic", "Asian", "Other"]
+RACE_WEIGHTS = [0.58, 0.13, 0.19, 0.06, 0.04]
+
+STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA",
+    "HI", "ID", "IL", "IN", "IA", "KS", "KY", "LA", "ME", "MD",
+    "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ",
+    "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC",
+    "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+]  # fmt: skip
+
+# Small per-group shifts in approval rate, so fairness metrics have something to find
+GENDER_BIAS = np.array([0.03, -0.02, -0.05])
+RACE_BIAS = np.array([0.04, -0.06, -0.03, 0.02, -0.01])
+
+DEFAULT_START = datetime(2024, 1, 1)
+DEFAULT_DAYS = 365
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def generate_transactions(
+    rows: int,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start: datetime = DEFAULT_START,
+    days: int = DEFAULT_DAYS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield rows of synthetic transactions as dataframes of at most chunk_size rows.
+
+    The output depends only on rows, seed, chunk_size, start and days, so two
+    runs with the same arguments produce identical data. Chunks are generated
+    one at a time, so 10^8 rows never need to fit in memory at once.
+
+    Columns: id, gender, age, race, state, timestamp, action_status.
+    """
+
+    start_ns = pd.Timestamp(start).value
+    span_ns = days * 24 * 60 * 60 * 10**9
+    chunk_seeds = np.random.SeedSequence(seed).spawn(-(-rows // chunk_size))
+
+    for index, chunk_seed in enumerate(chunk_seeds):
+        rng = np.random.default_rng(chunk_seed)
+        first_id = index * chunk_size + 1
+        size = min(chunk_size, rows - index * chunk_size)
+
+        gender = rng.choice(len(GENDERS), size=size, p=GENDER_WEIGHTS)
+        race = rng.choice(len(RACES), size=size, p=RACE_WEIGHTS)
+        age = rng.integers(18, 89, size=size, dtype=np.int16)
+
+        # Whole microseconds, matching what a DATETIME(6) column stores
+        offsets = rng.integers(0, span_ns // 1000, size=size) * 1000
+        approval = 0.5 + GENDER_BIAS[gender] + RACE_BIAS[race]
+
+        yield pd.DataFrame(
+            {
+                "id": np.arange(first_id, first_id + size, dtype=np.int64),
+                "gender": pd.Categorical.from_codes(gender, GENDERS),
+                "age": age,
+                "race": pd.Categorical.from_codes(race, RACES),
+                "state": pd.Categorical.from_codes(
+                    rng.integers(0, len(STATES), size=size), STATES
+                ),
+                "timestamp": pd.to_datetime(start_ns + offsets),
+                "action_status": (rng.random(size) < approval).astype(np.int8),
+            }
+        )
+
+
+def write_dataset(
+    path: str,
+    rows: int,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    """
+    Write a synthetic dataset to path as CSV, or Parquet for .parquet/.pq paths.
+
+    Rows are written chunk by chunk, so memory use is bounded by chunk_size.
+    """
+
+    is_parquet = path.lower().endswith((".parquet", ".pq"))
+    writer = None
+
+    try:
+        for index, chunk in enumerate(
+            generate_transactions(rows, seed=seed, chunk_size=chunk_size)
+        ):
+            if is_parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(
+                    path,
+                    mode="w" if index == 0 else "a",
+                    header=index == 0,
+                    index=False,
+                    date_format="%Y-%m-%d %H:%M:%S.%f",
+                )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return os.path.abspath(path)
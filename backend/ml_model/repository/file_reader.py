@@ -1,34 +1,65 @@
 import os
 import sys
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(project_root)
 
+from backend.app.infrastructure.file_formats import ARROW_EXTENSIONS
 from backend.ml_model.use_cases.FileReaderInterface import FileReaderInterface
 
 
+def read_dataset(file_path: str, categorical_columns: list[str]) -> pd.DataFrame:
+    """
+    Reads a dataset file into a dataframe.
+
+    CSV files are parsed as a whole. Arrow IPC and Feather files are
+    memory-mapped and only the categorical columns and `action_status` are
+    read, so the other columns are never loaded and numeric columns are not
+    copied. A file missing some of those columns is read whole instead.
+    """
+    if not str(file_path).lower().endswith(ARROW_EXTENSIONS):
+        return pd.read_csv(file_path)
+
+    # age_groups is binned from age after reading
+    columns = [
+        "age" if column == "age_groups" else column for column in categorical_columns
+    ] + ["action_status"]
+    try:
+        table = feather.read_table(str(file_path), columns=columns, memory_map=True)
+    except pa.ArrowInvalid:
+        table = feather.read_table(str(file_path), memory_map=True)
+        table = table.select([name for name in columns if name in table.column_names])
+    return table.to_pandas()
+
+
 class FileReader(FileReaderInterface):
     """
     A utility class for reading and preprocessing a CSV file for machine learning purposes.
 
-    The class initializes with the path to a CSV file and processes it to:
+    The class initializes with the path to a CSV or Arrow IPC file, or with the data itself
+    as a DataFrame, and processes it to:
     - Drop unnecessary columns like `timestamp` and `id`.
     - Bin the `age` column into groups (if present).
     - Separate the dataframe into inputs and the target column (`action_status`).
     """
 
-    def __init__(self, csv_file_path: str):
+    def __init__(
+        self, csv_file_path: Optional[str] = None, data: Optional[pd.DataFrame] = None
+    ):
         """
         Initialize the FileReader class with file path and categorical columns.
 
-        :param csv_file_path: Path to the CSV file.
-        :param categorical_columns: List of categorical columns.
+        :param csv_file_path: Path to the CSV file, or to an Arrow IPC (.arrow, .feather) file.
+        :param data: The dataset already in memory; read instead of the file if given.
         """
         self.csv_file_path = csv_file_path
+        self.data = data
         self.categorical_columns = ["gender", "age_groups", "race", "state"]
         self.single_column_check = False
 
@@ -40,7 +71,10 @@ class FileReader(FileReaderInterface):
 
         from utility import model_util
 
-        df = pd.read_csv(self.csv_file_path)
+        if self.data is not None:
+            df = self.data
+        else:
+            df = read_dataset(self.csv_file_path, self.categorical_columns)
         df_cleaned = df.drop(["timestamp", "id"], axis=1, errors="ignore")
 
         if (
@@ -1,6 +1,6 @@
 import os
 import sys
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -10,6 +10,7 @@ sys.path.append(project_root)
 
 from utility import model_util
 
+from backend.ml_model.repository.file_reader import read_dataset
 from backend.ml_model.use_cases.FileReaderInterface import FileReaderInterface
 
 
@@ -17,19 +18,24 @@ class FileReaderMultiple(FileReaderInterface):
     """
     A utility class for reading and preprocessing multiple CSV files for machine learning purposes.
 
-    The class initializes with the path to a CSV file and processes it to:
+    The class initializes with the path to a CSV or Arrow IPC file, or with the data itself
+    as a DataFrame, and processes it to:
     - Drop unnecessary columns like `timestamp` and `id`.
     - Bin the `age` column into groups (if present).
     - Separate the dataframe into inputs and the target column (`action_status`).
     """
 
-    def __init__(self, csv_file_path: str):
+    def __init__(
+        self, csv_file_path: Optional[str] = None, data: Optional[pd.DataFrame] = None
+    ):
         """
         Initialize the FileReader class with file path and categorical columns.
 
-        :param csv_file_path: Path to the CSV file.
+        :param csv_file_path: Path to the CSV file, or to an Arrow IPC (.arrow, .feather) file.
+        :param data: The dataset already in memory; read instead of the file if given.
         """
         self.csv_file_path = csv_file_path
+        self.data = data
         self.categorical_columns = ["gender", "age_groups", "race", "state"]
         self.single_column_check = False
 
@@ -38,8 +44,11 @@ class FileReaderMultiple(FileReaderInterface):
         Reads the CSV file, processes it, and returns the cleaned dataframe,
         inputs, and target action_status.
         """
-        # Read the CSV file into a dataframe
-        df = pd.read_csv(self.csv_file_path)
+        # Use the dataframe handed over, or read the file into one
+        if self.data is not None:
+            df = self.data
+        else:
+            df = read_dataset(self.csv_file_path, self.categorical_columns)
 
         # Drop any columns that are not needed, e.g., 'customer_id', 'zip_code', etc.
         columns_to_drop = [
@@ -25,7 +25,7 @@ class MultiModelEvaluator:
     This class handles data preprocessing, model loading, and fairness evaluation
     based on specified sensitive features, producing metrics for each model.
     """
-    def __init__(self, model_files: list):
+    def __init__(self, model_files: list, data: pd.DataFrame = None):
         """
         Initializes the ModelEvaluator with the file path to the CSV and model files.
 
@@ -34,8 +34,12 @@ class MultiModelEvaluator:
 
         model_files : list
             List of file paths to the model pickle files to evaluate.
+
+        data : pd.DataFrame, optional
+            The dataset already in memory, used instead of the CSV file if given.
         """
         self.model_files = model_files
+        self.data = data
 
     def evaluate_models(self) -> dict:
         """
@@ -47,7 +51,7 @@ class MultiModelEvaluator:
             A dictionary containing evaluation results for each model file.
         """
         # Read and preprocess the data
-        file_reader = FileReaderMultiple(csv_file_path)
+        file_reader = FileReaderMultiple(csv_file_path, data=self.data)
         df_dropped, inputs, target = file_reader.read_file()
 
         data_processor = DataProcessorMultiple(inputs)
@@ -34,7 +34,9 @@ class ModelTrainer:
     6. Saves the model and prepares data for visualization.
     """
 
-    def __init__(self, csv_file_path=file_path_csv, test_size=0.2, random_state=48):
+    def __init__(
+        self, csv_file_path=file_path_csv, test_size=0.2, random_state=48, data=None
+    ):
         """
         Initializes the ModelTrainer with necessary parameters.
 
@@ -48,14 +50,19 @@ class ModelTrainer:
 
         random_state : int, optional (default=48)
             The random seed used for reproducibility in train-test splitting.
+
+        data : pd.DataFrame, optional (default=None)
+            The dataset already in memory. When given, it is used instead of
+            the CSV file, so concurrent trainings do not share a file.
         """
         self.csv_file_path = csv_file_path
+        self.data = data
         self.test_size = test_size
         self.random_state = random_state
 
     def load_and_preprocess_data(self):
         """
-        Loads the data from a CSV file, processes it by dropping irrelevant columns,
+        Loads the data (from the CSV file unless it was handed over), processes it by dropping irrelevant columns,
         and encodes categorical variables.
 
         Returns:
@@ -66,7 +73,7 @@ class ModelTrainer:
             - target : Series with the target variable
             - file_reader: FileReader object
         """
-        file_reader = FileReader(self.csv_file_path)
+        file_reader = FileReader(self.csv_file_path, data=self.data)
         return (file_reader.read_file(), file_reader)
 
     def encode_data(self, inputs):
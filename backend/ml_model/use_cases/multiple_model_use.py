@@ -33,9 +33,9 @@ class EvaluateModelsUseCase:
             dict: A dictionary containing model file names and their respective MetricFrame objects.
         """
 
-        self.file_repo.save_data_to_csv()
-        output = MultiModelEvaluator(self.model_files)
+        # Handed over in memory, so evaluations do not share a scratch file
+        data = self.file_repo.get_data()
+        output = MultiModelEvaluator(self.model_files, data=data)
         result = output.evaluate_models()
-        self.file_repo.delete_csv_data()
 
         return result
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+from backend.benchmarks.ingest_benchmark import format_report, main, run_benchmark
+
+
+@patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.delete_table")
+@patch("backend.app.repositories.csv_file_repo.CsvFileRepo.save_data_to_csv")
+@patch("backend.app.repositories.csv_file_repo.CsvFileRepo.import_csv_to_db")
+def test_run_benchmark_reports_each_step(mock_import, mock_export, mock_delete_table):
+    mock_import.return_value = True
+
+    result = run_benchmark(1000, upload_format="parquet")
+
+    uploaded = mock_import.call_args[0][0]
+    assert uploaded.endswith("upload_1000.parquet")
+    mock_export.assert_called_once()
+    # The benchmark table is dropped before and after the run
+    assert mock_delete_table.call_count == 2
+
+    assert result["rows"] == 1000
+    assert result["ingest"]["ok"] is True
+    assert result["ingest"]["rows_per_sec"] > 0
+    assert result["export"]["peak_traced_mb"] >= 0
+    assert "1000" in format_report([result])
+
+
+@patch("backend.benchmarks.ingest_benchmark.run_benchmark")
+def test_main_parses_sizes(mock_run_benchmark, tmp_path):
+    mock_run_benchmark.side_effect = lambda rows, **kwargs: {
+        "rows": rows,
+        "format": kwargs["upload_format"],
+        "ingest": {"rows_per_sec": 1.0, "peak_traced_mb": 1.0},
+        "export": {"rows_per_sec": 1.0, "peak_traced_mb": 1.0},
+        "peak_rss_mb": None,
+    }
+
+    results = main(["--rows", "1e3", "2000", "--json", str(tmp_path / "out.json")])
+
+    assert [result["rows"] for result in results] == [1000, 2000]
+    assert (tmp_path / "out.json").exists()
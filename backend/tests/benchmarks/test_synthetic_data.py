@@ -0,0 +1,59 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from backend.benchmarks.synthetic_data import (
+    GENDERS,
+    RACES,
+    STATES,
+    generate_transactions,
+    write_dataset,
+)
+
+
+def test_generate_transactions_matches_schema():
+    chunk = next(generate_transactions(1000, seed=1))
+
+    assert list(chunk.columns) == [
+        "id",
+        "gender",
+        "age",
+        "race",
+        "state",
+        "timestamp",
+        "action_status",
+    ]
+    assert set(chunk["gender"]) <= set(GENDERS)
+    assert set(chunk["race"]) <= set(RACES)
+    assert set(chunk["state"]) <= set(STATES)
+    assert chunk["age"].between(18, 88).all()
+    assert set(chunk["action_status"]) <= {0, 1}
+    assert pd.api.types.is_datetime64_any_dtype(chunk["timestamp"])
+
+
+def test_generate_transactions_is_deterministic():
+    first = pd.concat(generate_transactions(2500, seed=7, chunk_size=1000))
+    second = pd.concat(generate_transactions(2500, seed=7, chunk_size=1000))
+    other = pd.concat(generate_transactions(2500, seed=8, chunk_size=1000))
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(other)
+
+
+def test_generate_transactions_chunks_rows():
+    chunks = list(generate_transactions(2500, chunk_size=1000))
+
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+    ids = pd.concat(chunk["id"] for chunk in chunks)
+    assert ids.tolist() == list(range(1, 2501))
+
+
+def test_write_dataset_csv_and_parquet(tmp_path):
+    csv_path = write_dataset(str(tmp_path / "data.csv"), 1500, chunk_size=1000)
+    parquet_path = write_dataset(str(tmp_path / "data.parquet"), 1500, chunk_size=1000)
+
+    from_csv = pd.read_csv(csv_path, parse_dates=["timestamp"])
+    from_parquet = pq.read_table(parquet_path).to_pandas()
+
+    assert len(from_csv) == len(from_parquet) == 1500
+    assert from_csv["id"].tolist() == from_parquet["id"].tolist()
+    assert (from_csv["timestamp"] == from_parquet["timestamp"]).all()
@@ -4,7 +4,25 @@ import os
 import pytest
 
 from backend.app.entities import User
-from backend.app.repositories import CsvFileRepo, SqliteDbRepo
+from backend.app.infrastructure.db_connection_manager import DbConnectionManager
+from backend.app.infrastructure.prepared_statements import PreparedStatements
+from backend.app.repositories import CsvFileRepo, SqliteDbRepo, UserRepo
+
+
+@pytest.fixture(autouse=True)
+def reset_connection_pools():
+    # Pooled connections, replica pins and prepared statements must not carry
+    # over from one test's mocks to the next
+    yield
+    DbConnectionManager.close_all()
+    PreparedStatements.clear()
+
+
+@pytest.fixture(autouse=True)
+def skip_email_index_check(monkeypatch):
+    # The users table's index upkeep is covered by its own tests; elsewhere it
+    # would add queries to every mocked connection
+    monkeypatch.setattr(UserRepo, "_email_index_checked", True)
 
 
 @pytest.fixture
@@ -1,3 +1,4 @@
+import io
 import os
 import unittest
 from unittest.mock import MagicMock, patch
@@ -7,13 +8,24 @@ import pytest
 from backend.app.controllers.app import (  # Adjust this import according to your actual file structure
     app,
     initialize,
+    selection_writes,
 )
+from backend.app.controllers import app as app_module
 from backend.app.entities.user import User
 from backend.app.repositories import SqliteDbRepo
 
 UPLOAD_FOLDER = "uploads/"  # Directory to save uploaded models
 
 
+@pytest.fixture(autouse=True)
+def drain_selection_writes(monkeypatch):
+    # Selections queued by a request are written in the background; left
+    # queued, they would be retried against a later test's mocks
+    monkeypatch.setattr(selection_writes, "_write", MagicMock(return_value=True))
+    yield
+    selection_writes.flush()
+
+
 class FlaskAppTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -168,6 +180,108 @@ class FlaskAppTestCase(unittest.TestCase):
         self.assertIn("error", response.json)
         self.assertEqual(response.json["error"], "Missing required data.")
 
+    @patch("backend.app.controllers.app.initialize")
+    @patch("backend.app.controllers.app.UploadData")
+    def test_upload_data_uses_request_repo(self, mock_upload_data, mock_initialize):
+        mock_initialize.return_value = None
+        mock_upload_data.return_value.execute.return_value = True
+
+        data = {
+            "curr_user": "test_user",
+            "incremental": "true",
+            "csv_to_read": (io.BytesIO(b"timestamp,action_status\n"), "data.csv"),
+        }
+        with patch("backend.app.controllers.app.user.table_name", "test_user"):
+            response = self.client.post(
+                "/api/upload-data", data=data, content_type="multipart/form-data"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        # The option is set on the request's repository, not the shared one
+        request_repo = mock_upload_data.call_args[0][0]
+        self.assertIsNot(request_repo, app_module.file_repo)
+        self.assertEqual(request_repo.table_name, "test_user")
+        self.assertTrue(request_repo.incremental)
+        self.assertFalse(app_module.file_repo.incremental)
+
+    @patch("backend.app.controllers.app.initialize")
+    @patch("backend.app.controllers.app.ingestion_jobs")
+    def test_upload_data_async_returns_job(self, mock_jobs, mock_initialize):
+        mock_initialize.return_value = None
+        mock_job = MagicMock()
+        mock_job.to_dict.return_value = {"job_id": "abc", "status": "queued"}
+        mock_jobs.submit.return_value = mock_job
+
+        data = {
+            "curr_user": "test_user",
+            "async_job": "true",
+            "csv_to_read": (io.BytesIO(b"timestamp,action_status\n"), "data.csv"),
+        }
+        with patch("backend.app.controllers.app.user.table_name", "test_user"):
+            response = self.client.post(
+                "/api/upload-data", data=data, content_type="multipart/form-data"
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json["job_id"], "abc")
+        mock_jobs.submit.assert_called_once()
+        self.assertEqual(mock_jobs.submit.call_args[0][0], "test_user")
+
+    @patch("backend.app.controllers.app.ingestion_jobs")
+    def test_upload_status(self, mock_jobs):
+        mock_job = MagicMock()
+        mock_job.to_dict.return_value = {"job_id": "abc", "status": "running"}
+        mock_jobs.get.return_value = mock_job
+
+        response = self.client.get("/api/upload-status/abc")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["status"], "running")
+        mock_jobs.get.assert_called_once_with("abc")
+
+    @patch("backend.app.controllers.app.ingestion_jobs")
+    def test_upload_status_unknown_job(self, mock_jobs):
+        mock_jobs.get.return_value = None
+
+        response = self.client.get("/api/upload-status/missing")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json["error"], "Upload job not found.")
+
+    @patch("backend.app.controllers.app.GetGroupCounts")
+    def test_group_counts(self, mock_group_counts):
+        mock_group_counts.return_value.execute.return_value = [
+            {"group": {"gender": "Male"}, "rows": 2, "positive": 1}
+        ]
+
+        response = self.client.post(
+            "/api/group-counts",
+            json={
+                "curr_user": "test_user",
+                "demographics": ["gender", ""],
+                "choices": {"gender": ["Male"]},
+                "time": "week",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]["rows"], 2)
+        mock_group_counts.return_value.execute.assert_called_once_with(
+            ["gender"], {"gender": ["Male"]}, "week"
+        )
+        # Read through the request's repository, with the configured rollups
+        file_repo = mock_group_counts.call_args[0][0]
+        self.assertEqual(file_repo.table_name, "test_user")
+        self.assertEqual(file_repo.rollups, app_module.upload_rollups)
+
+    def test_group_counts_missing_data(self):
+        response = self.client.post(
+            "/api/group-counts", json={"curr_user": "test_user", "demographics": []}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["error"], "Missing required data.")
+
     @patch("backend.app.controllers.app.initialize")
     def test_upload_model_missing_data(self, mock_initialize):
         data = {"curr_user": "test_user", "dashboard": "test_dashboard"}
@@ -0,0 +1,81 @@
+# tests/entities/test_ingestion_job.py
+
+from unittest.mock import patch
+
+from backend.app.entities import IngestionJob
+
+
+def test_ingestion_job_initialization():
+    job = IngestionJob("test@example.com")
+    assert job.table_name == "test@example.com"
+    assert job.status == "queued"
+    assert job.rows_processed == 0
+    assert job.throughput() == 0.0
+    assert len(job.job_id) == 32
+
+
+def test_ingestion_job_ids_are_unique():
+    assert IngestionJob("a").job_id != IngestionJob("a").job_id
+
+
+@patch("backend.app.entities.ingestion_job.time.time")
+def test_ingestion_job_progress_and_throughput(mock_time):
+    mock_time.return_value = 100.0
+    job = IngestionJob("test@example.com")
+    job.start()
+
+    job.add_rows(500)
+    job.add_rows(1500)
+    mock_time.return_value = 104.0
+
+    assert job.status == "running"
+    assert job.rows_processed == 2000
+    assert job.throughput() == 500.0
+
+    job.finish(True)
+    mock_time.return_value = 200.0
+
+    # Throughput is frozen once the job has finished
+    assert job.throughput() == 500.0
+    assert job.to_dict() == {
+        "job_id": job.job_id,
+        "status": "succeeded",
+        "rows_processed": 2000,
+        "rows_per_sec": 500.0,
+        "error": None,
+    }
+
+
+def test_ingestion_job_failure():
+    job = IngestionJob("test@example.com")
+    job.start()
+    job.finish(False, "Critical columns missing")
+
+    assert job.is_finished()
+    assert job.status == "failed"
+    assert job.error == "Critical columns missing"
+
+
+def test_ingestion_job_from_row():
+    job = IngestionJob.from_row(
+        ("abc", "test@example.com", "succeeded", 20, None, 100.0, 100.0, 104.0)
+    )
+
+    assert job.job_id == "abc"
+    assert job.table_name == "test@example.com"
+    assert job.is_finished()
+    assert job.to_dict()["rows_per_sec"] == 5.0
+
+
+def test_ingestion_job_reports_changes():
+    job = IngestionJob("test@example.com")
+    seen = []
+    job.on_change = lambda changed: seen.append(
+        (changed.status, changed.rows_processed)
+    )
+
+    job.start()
+    job.add_rows(3)
+    job.finish(False, "Bad upload")
+
+    assert seen == [("running", 0), ("running", 3), ("failed", 3)]
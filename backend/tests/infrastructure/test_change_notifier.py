@@ -0,0 +1,43 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from backend.app.infrastructure.change_notifier import ChangeNotifier
+
+START = datetime(2024, 11, 1)
+END = datetime(2024, 11, 30)
+
+
+def test_publish_calls_every_listener():
+    notifier = ChangeNotifier()
+    first, second = MagicMock(), MagicMock()
+    notifier.subscribe(first)
+    notifier.subscribe(second)
+
+    notifier.publish("test@example.com", START, END)
+
+    first.assert_called_once_with("test@example.com", START, END)
+    second.assert_called_once_with("test@example.com", START, END)
+
+
+def test_failing_listener_does_not_stop_others():
+    notifier = ChangeNotifier()
+    failing = MagicMock(side_effect=RuntimeError("cache offline"))
+    listener = MagicMock()
+    notifier.subscribe(failing)
+    notifier.subscribe(listener)
+
+    notifier.publish("test@example.com", START, END)
+
+    listener.assert_called_once()
+
+
+def test_unsubscribe():
+    notifier = ChangeNotifier()
+    listener = MagicMock()
+    notifier.subscribe(listener)
+    notifier.unsubscribe(listener)
+    notifier.unsubscribe(listener)
+
+    notifier.publish("test@example.com", START, END)
+
+    listener.assert_not_called()
@@ -0,0 +1,119 @@
+import gc
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from mysql.connector import Error
+
+from backend.app.infrastructure.connection_pool import ConnectionPool
+
+
+def make_pool(**kwargs):
+    factory = MagicMock(side_effect=lambda: MagicMock(in_transaction=False))
+    return ConnectionPool(factory, **kwargs), factory
+
+
+def test_acquire_reuses_released_connection():
+    pool, factory = make_pool(size=2)
+
+    first = pool.acquire()
+    raw = first.raw
+    first.close()
+    first.close()  # Closing twice does not check it in twice
+    second = pool.acquire()
+
+    assert second.raw is raw
+    assert factory.call_count == 1
+    assert pool.stats()["checkouts"] == 2
+    assert pool.stats()["in_use"] == 1
+
+
+def test_closed_connection_cannot_be_used():
+    pool, _ = make_pool()
+    connection = pool.acquire()
+    connection.close()
+
+    with pytest.raises(Error):
+        connection.cursor()
+
+
+def test_release_rolls_back_open_transaction():
+    pool, _ = make_pool()
+    connection = pool.acquire()
+    connection.raw.in_transaction = True
+
+    connection.close()
+
+    connection.raw.rollback.assert_called_once()
+
+
+def test_acquire_waits_for_a_free_connection():
+    pool, _ = make_pool(size=1, wait_timeout=5)
+    held = pool.acquire()
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    threading.Timer(0.05, held.close).start()
+    waiter.join(timeout=5)
+
+    assert acquired[0].raw is held.raw
+    assert pool.stats()["waits"] == 1
+
+
+def test_acquire_times_out():
+    pool, _ = make_pool(size=1, wait_timeout=0.01)
+    held = pool.acquire()
+
+    assert pool.acquire() is None
+    assert pool.stats()["timeouts"] == 1
+    held.close()
+
+
+def test_idle_connections_are_evicted():
+    pool, factory = make_pool(idle_timeout=0)
+    connection = pool.acquire()
+    raw = connection.raw
+    connection.close()
+
+    assert pool.acquire().raw is not raw
+    raw.close.assert_called_once()
+    assert pool.stats()["evicted"] == 1
+    assert factory.call_count == 2
+
+
+def test_dead_connections_are_replaced():
+    pool, _ = make_pool()
+    connection = pool.acquire()
+    raw = connection.raw
+    raw.is_connected.return_value = False
+    connection.close()
+
+    assert pool.acquire().raw is not raw
+    assert pool.stats()["evicted"] == 1
+
+
+def test_unclosed_connection_counts_as_leaked():
+    pool, _ = make_pool(size=1)
+    connection = pool.acquire()
+    raw = connection.raw
+
+    del connection
+    gc.collect()
+
+    raw.close.assert_called_once()
+    stats = pool.stats()
+    assert stats["leaked"] == 1
+    assert stats["in_use"] == 0
+    # The leaked connection's place is free again
+    assert pool.acquire() is not None
+
+
+def test_failed_connect_frees_its_place():
+    factory = MagicMock(side_effect=Error("Connection failed"))
+    pool = ConnectionPool(factory, size=1)
+
+    with pytest.raises(Error):
+        pool.acquire()
+
+    assert pool.stats()["in_use"] == 0
@@ -79,3 +79,168 @@ def test_get_connection_not_connected(mock_connect):
         database="test_database",
         ssl_disabled=True,
     )
+
+
+@patch("mysql.connector.connect")
+def test_get_connection_passes_options(mock_connect):
+    # Arrange
+    mock_connection = MagicMock()
+    mock_connection.is_connected.return_value = True
+    mock_connect.return_value = mock_connection
+
+    # Act
+    connection = DbConnectionManager.get_connection(allow_local_infile=True)
+
+    # Assert
+    assert connection.raw is mock_connection
+    assert mock_connect.call_args.kwargs["allow_local_infile"] is True
+
+
+@patch("mysql.connector.connect")
+def test_get_connection_reuses_closed_connection(mock_connect):
+    mock_connection = MagicMock()
+    mock_connection.is_connected.return_value = True
+    mock_connect.return_value = mock_connection
+
+    first = DbConnectionManager.get_connection()
+    first.close()
+    second = DbConnectionManager.get_connection()
+
+    # The second checkout gets the pooled connection without a new handshake
+    assert second.raw is mock_connection
+    mock_connect.assert_called_once()
+    stats = DbConnectionManager.pool_stats()
+    assert stats["checkouts"] == 2
+    assert stats["created"] == 1
+
+
+@patch("mysql.connector.connect")
+def test_connection_context_manager_checks_in(mock_connect):
+    mock_connection = MagicMock()
+    mock_connection.is_connected.return_value = True
+    mock_connect.return_value = mock_connection
+
+    with DbConnectionManager.connection() as connection:
+        assert connection.raw is mock_connection
+        assert DbConnectionManager.pool_stats()["in_use"] == 1
+
+    assert DbConnectionManager.pool_stats()["in_use"] == 0
+    assert DbConnectionManager.pool_stats()["idle"] == 1
+
+
+@patch("mysql.connector.connect")
+def test_get_connection_without_pool(mock_connect, monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "0")
+    mock_connection = MagicMock()
+    mock_connection.is_connected.return_value = True
+    mock_connect.return_value = mock_connection
+
+    assert DbConnectionManager.get_connection() is mock_connection
+
+
+def test_get_connection_sqlite_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "app.sqlite3"))
+
+    with patch("mysql.connector.connect") as mock_connect:
+        with DbConnectionManager.connection(allow_local_infile=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+
+            assert cursor.fetchone() == (0,)
+
+    mock_connect.assert_not_called()
+    assert DbConnectionManager.dialect().name == "sqlite"
+    assert (tmp_path / "app.sqlite3").exists()
+
+
+@patch("mysql.connector.connect")
+def test_readonly_without_replica_uses_primary(mock_connect):
+    mock_connect.return_value.is_connected.return_value = True
+
+    assert DbConnectionManager.get_connection(readonly=True) is not None
+
+    assert mock_connect.call_args.kwargs["host"] == "localhost"
+
+
+@patch("mysql.connector.connect")
+def test_readonly_uses_replica(mock_connect, monkeypatch):
+    monkeypatch.setenv("DB_REPLICA_HOST", "replica")
+    monkeypatch.setenv("DB_REPLICA_USER", "reader")
+    mock_connect.return_value.is_connected.return_value = True
+
+    DbConnectionManager.get_connection(readonly=True, pin_key="a@example.com")
+
+    mock_connect.assert_called_once_with(
+        host="replica",
+        port="3306",
+        user="reader",
+        password="test_password",
+        database="test_database",
+        ssl_disabled=True,
+    )
+
+    # Writes always go to the primary
+    DbConnectionManager.get_connection()
+    assert mock_connect.call_args.kwargs["host"] == "localhost"
+
+
+@patch("mysql.connector.connect")
+def test_pinned_reads_use_primary(mock_connect, monkeypatch):
+    monkeypatch.setenv("DB_REPLICA_HOST", "replica")
+    # Every checkout opens a connection, so each shows where it went
+    monkeypatch.setenv("DB_POOL_SIZE", "0")
+    mock_connect.return_value.is_connected.return_value = True
+    now = [1000.0]
+    monkeypatch.setattr(
+        "backend.app.infrastructure.db_connection_manager.time.monotonic",
+        lambda: now[0],
+    )
+
+    def host(pin_key):
+        DbConnectionManager.get_connection(readonly=True, pin_key=pin_key)
+        return mock_connect.call_args.kwargs["host"]
+
+    DbConnectionManager.pin_to_primary("a@example.com", seconds=10)
+    assert host("a@example.com") == "localhost"
+    assert host("b@example.com") == "replica"
+
+    # A shorter pin does not cut an earlier one short
+    DbConnectionManager.pin_to_primary("a@example.com", seconds=1)
+    now[0] += 5
+    assert host("a@example.com") == "localhost"
+
+    now[0] += 6
+    assert host("a@example.com") == "replica"
+
+
+def test_pin_seconds_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_REPLICA_PIN_SECONDS", "0")
+    DbConnectionManager.pin_to_primary("a@example.com")
+    assert not DbConnectionManager._is_pinned("a@example.com")
+
+    monkeypatch.setenv("DB_REPLICA_PIN_SECONDS", "30")
+    DbConnectionManager.pin_to_primary("a@example.com")
+    assert DbConnectionManager._is_pinned("a@example.com")
+
+    DbConnectionManager.close_all()
+    assert not DbConnectionManager._is_pinned("a@example.com")
+
+
+def test_sqlite_replica(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "primary.sqlite3"))
+    monkeypatch.setenv("SQLITE_REPLICA_PATH", str(tmp_path / "replica.sqlite3"))
+
+    with DbConnectionManager.connection(readonly=True) as connection:
+        assert connection.path == str(tmp_path / "replica.sqlite3")
+
+        # The replica refuses writes
+        with pytest.raises(Error):
+            connection.cursor().execute(
+                "INSERT INTO users (email, password) VALUES (%s, %s)",
+                ("a@example.com", "secret"),
+            )
+
+    with DbConnectionManager.connection() as connection:
+        assert connection.path == str(tmp_path / "primary.sqlite3")
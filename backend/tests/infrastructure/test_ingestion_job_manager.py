@@ -0,0 +1,129 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend.app.infrastructure.ingestion_job_manager import IngestionJobManager
+
+
+@pytest.fixture
+def manager():
+    job_manager = IngestionJobManager(max_workers=2)
+    yield job_manager
+    job_manager.shutdown()
+
+
+def test_submit_runs_work_in_background(manager):
+    release = threading.Event()
+
+    def work(job):
+        job.add_rows(10)
+        release.wait(timeout=5)
+        job.add_rows(5)
+        return True
+
+    job = manager.submit("test@example.com", work)
+
+    # The caller gets the job back before the work finishes
+    assert manager.get(job.job_id) is job
+    assert job.status in ("queued", "running")
+
+    release.set()
+    manager.shutdown(wait=True)
+
+    assert job.status == "succeeded"
+    assert job.rows_processed == 15
+
+
+def test_work_returning_false_marks_job_failed(manager):
+    job = manager.submit("test@example.com", lambda job: False)
+    manager.shutdown(wait=True)
+
+    assert job.status == "failed"
+    assert job.error == "Error uploading data."
+
+
+def test_work_raising_marks_job_failed(manager):
+    def work(job):
+        raise ValueError("Bad upload")
+
+    job = manager.submit("test@example.com", work)
+    manager.shutdown(wait=True)
+
+    assert job.status == "failed"
+    assert job.error == "Bad upload"
+
+
+def test_get_unknown_job(manager):
+    assert manager.get("missing") is None
+
+
+def test_finished_jobs_are_pruned_after_ttl():
+    job_manager = IngestionJobManager(max_workers=1, job_ttl=-1)
+    first = job_manager.submit("test@example.com", lambda job: True)
+    job_manager.shutdown(wait=True)
+
+    job_manager = IngestionJobManager(max_workers=1, job_ttl=-1)
+    job_manager._jobs[first.job_id] = first
+    second = job_manager.submit("test@example.com", lambda job: True)
+    job_manager.shutdown(wait=True)
+
+    assert job_manager.get(first.job_id) is None
+    assert job_manager.get(second.job_id) is second
+
+
+class FakeJobStore:
+    """Stands in for the ingestion_jobs table shared by server processes."""
+
+    def __init__(self):
+        self.rows = {}
+        self.statuses = []
+
+    def save(self, job):
+        self.statuses.append(job.status)
+        self.rows[job.job_id] = (job.status, job.rows_processed)
+
+    def get(self, job_id):
+        return self.rows.get(job_id)
+
+    def delete_finished_before(self, cutoff):
+        pass
+
+
+def test_job_changes_are_saved_to_the_store():
+    store = FakeJobStore()
+    job_manager = IngestionJobManager(max_workers=1, store=store)
+
+    def work(job):
+        job.add_rows(7)
+        return True
+
+    job = job_manager.submit("test@example.com", work)
+    job_manager.shutdown(wait=True)
+
+    assert store.statuses == ["queued", "running", "running", "succeeded"]
+    assert store.rows[job.job_id] == ("succeeded", 7)
+
+
+def test_get_falls_back_to_the_store():
+    store = FakeJobStore()
+    job_manager = IngestionJobManager(max_workers=1, store=store)
+    job = job_manager.submit("test@example.com", lambda job: True)
+    job_manager.shutdown(wait=True)
+
+    # A second server process only sees the job through the store
+    other = IngestionJobManager(max_workers=1, store=store)
+    assert other.get(job.job_id) == ("succeeded", 0)
+    assert other.get("missing") is None
+    other.shutdown()
+
+
+def test_store_errors_do_not_fail_the_job():
+    store = MagicMock()
+    store.save.side_effect = RuntimeError("Lost connection")
+    job_manager = IngestionJobManager(max_workers=1, store=store)
+
+    job = job_manager.submit("test@example.com", lambda job: True)
+    job_manager.shutdown(wait=True)
+
+    assert job.status == "succeeded"
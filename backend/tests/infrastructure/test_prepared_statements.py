@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock
+
+import pytest
+from mysql.connector import Error
+
+from backend.app.infrastructure.connection_pool import ConnectionPool
+from backend.app.infrastructure.prepared_statements import PreparedStatements
+from backend.app.infrastructure.sqlite_connection import SqliteConnection
+
+QUERY = "SELECT * FROM users WHERE email = %s"
+
+
+def test_fetch_one_reuses_prepared_cursor():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value
+    cursor.fetchone.side_effect = [{"email": "a@example.com"}, None]
+
+    first = PreparedStatements.fetch_one(
+        connection, QUERY, ("a@example.com",), dictionary=True
+    )
+    second = PreparedStatements.fetch_one(
+        connection, QUERY, ("b@example.com",), dictionary=True
+    )
+
+    assert first == {"email": "a@example.com"}
+    assert second is None
+    connection.cursor.assert_called_once_with(prepared=True, dictionary=True)
+    # The same string each time, so mysql.connector skips the PREPARE
+    assert [c[0][0] for c in cursor.execute.call_args_list] == [QUERY, QUERY]
+    # Each result is read to the end before the statement runs again
+    assert cursor.fetchall.call_count == 2
+
+
+def test_cursors_follow_pooled_connections():
+    pool = ConnectionPool(lambda: MagicMock(in_transaction=False), size=1)
+
+    with pool.acquire() as connection:
+        PreparedStatements.fetch_one(connection, QUERY, ("a@example.com",))
+        raw = connection.raw
+    with pool.acquire() as connection:
+        PreparedStatements.fetch_one(connection, QUERY, ("a@example.com",))
+
+    raw.cursor.assert_called_once()
+
+
+def test_error_drops_cursor():
+    connection = MagicMock()
+    broken, fresh = MagicMock(), MagicMock()
+    connection.cursor.side_effect = [broken, fresh]
+    broken.execute.side_effect = Error("Lost connection")
+
+    with pytest.raises(Error):
+        PreparedStatements.execute(connection, QUERY, ("a@example.com",))
+    PreparedStatements.execute(connection, QUERY, ("a@example.com",))
+
+    broken.close.assert_called_once()
+    fresh.execute.assert_called_once_with(QUERY, ("a@example.com",))
+
+
+def test_sqlite_statements(tmp_path):
+    connection = SqliteConnection(str(tmp_path / "test.sqlite3"))
+    try:
+        insert = "INSERT INTO users (email, password) VALUES (%s, %s)"
+        assert PreparedStatements.execute(
+            connection, insert, ("a@example.com", "secret")
+        ) == 1
+        PreparedStatements.execute(connection, insert, ("b@example.com", "secret"))
+
+        assert PreparedStatements.fetch_one(
+            connection, "SELECT email FROM users WHERE email = %s", ("b@example.com",)
+        ) == ("b@example.com",)
+
+        # Emails are unique
+        with pytest.raises(Error):
+            PreparedStatements.execute(
+                connection, insert, ("a@example.com", "secret")
+            )
+    finally:
+        connection.close()
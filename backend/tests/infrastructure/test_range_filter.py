@@ -0,0 +1,57 @@
+import numpy as np
+
+from backend.app.infrastructure.range_filter import (
+    in_ranges,
+    is_range_choice,
+    merge_ranges,
+    parse_range,
+    parse_ranges,
+)
+
+
+def test_parse_range():
+    assert parse_range("18-26") == (18, 26)
+    assert parse_range(" 1.5 - 2.5 ") == (1.5, 2.5)
+    assert parse_range("-10--5") == (-10, -5)
+    assert parse_range("35-27") is None
+    assert parse_range("CA") is None
+
+
+def test_is_range_choice():
+    assert is_range_choice(["18-26", "27-35"])
+    assert not is_range_choice(["18-26", "CA"])
+    assert not is_range_choice([])
+
+
+def test_parse_ranges_merges_and_skips_invalid(capsys):
+    assert parse_ranges(["40-50", "bad", "20-30", "25-35", "35-38"]) == [
+        (20, 38),
+        (40, 50),
+    ]
+    assert "Invalid range format: bad" in capsys.readouterr().out
+
+
+def test_merge_keeps_gaps():
+    assert merge_ranges([(27, 35), (18, 26)]) == [(18, 26), (27, 35)]
+    assert merge_ranges([(18, 26), (20, 22)]) == [(18, 26)]
+    assert merge_ranges([]) == []
+
+
+def test_in_ranges_matches_a_loop_over_the_ranges():
+    rng = np.random.default_rng(7)
+    values = rng.uniform(0, 100, 1000)
+    values[::50] = np.nan
+    ranges = [(60, 70), (10, 20), (15, 30), (30, 30), (90, 95)]
+
+    expected = np.array(
+        [any(low <= value <= high for low, high in ranges) for value in values]
+    )
+    assert (in_ranges(values, ranges) == expected).all()
+    # Ends are inclusive
+    assert in_ranges(np.array([10, 30, 95, 95.5]), ranges).tolist() == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert not in_ranges(values, []).any()
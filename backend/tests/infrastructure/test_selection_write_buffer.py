@@ -0,0 +1,128 @@
+import threading
+from unittest.mock import MagicMock
+
+from backend.app.infrastructure.selection_write_buffer import SelectionWriteBuffer
+
+SELECTION = {"demographic_1": "gender", "choice_1_demographic_1": "male", "time": "year"}
+
+
+def make_buffer(write=None, **options):
+    # A long delay keeps the background writer out of the way; tests flush
+    options.setdefault("delay", 60)
+    return SelectionWriteBuffer(write or MagicMock(return_value=True), **options)
+
+
+def test_selections_are_merged_per_user():
+    write = MagicMock(return_value=True)
+    buffer = make_buffer(write)
+
+    assert buffer.submit("a@example.com", SELECTION)
+    assert buffer.submit("a@example.com", {"time": "month"})
+    assert buffer.submit("b@example.com", SELECTION)
+    assert buffer.flush() == 2
+
+    assert write.call_count == 2
+    write.assert_any_call("a@example.com", {**SELECTION, "time": "month"})
+    write.assert_any_call("b@example.com", SELECTION)
+    buffer.shutdown()
+
+
+def test_selection_already_queued_is_not_queued_again():
+    write = MagicMock(return_value=True)
+    buffer = make_buffer(write)
+
+    assert buffer.submit("a@example.com", SELECTION)
+    assert not buffer.submit("a@example.com", dict(SELECTION))
+    assert not buffer.submit("a@example.com", {"time": "year"})
+
+    assert buffer.flush() == 1
+    write.assert_called_once_with("a@example.com", SELECTION)
+    buffer.shutdown()
+
+
+def test_written_selection_is_written_again():
+    write = MagicMock(return_value=True)
+    buffer = make_buffer(write)
+
+    buffer.submit("a@example.com", SELECTION)
+    buffer.flush()
+
+    # Another process may have saved a different selection in between
+    assert buffer.submit("a@example.com", dict(SELECTION))
+    assert buffer.flush() == 1
+    assert write.call_count == 2
+    buffer.shutdown()
+
+
+def test_flush_one_user():
+    write = MagicMock(return_value=True)
+    buffer = make_buffer(write)
+
+    buffer.submit("a@example.com", SELECTION)
+    buffer.submit("b@example.com", SELECTION)
+
+    assert buffer.flush("a@example.com") == 1
+    write.assert_called_once_with("a@example.com", SELECTION)
+    assert buffer.flush("c@example.com") == 0
+    buffer.shutdown()
+
+
+def test_written_in_background():
+    written = threading.Event()
+
+    def write(table_name, selection):
+        written.set()
+        return True
+
+    buffer = SelectionWriteBuffer(write, delay=0.01)
+    buffer.submit("a@example.com", SELECTION)
+
+    assert written.wait(5)
+    buffer.shutdown()
+
+
+def test_failed_write_is_retried_then_dropped(capsys):
+    write = MagicMock(side_effect=[False, Exception("Lost connection"), False])
+    buffer = make_buffer(write, max_attempts=3)
+
+    buffer.submit("a@example.com", SELECTION)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 1
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+
+    out = capsys.readouterr().out
+    assert "Error: Lost connection" in out
+    assert "Dropped the selection update for a@example.com." in out
+    # Nothing is known to be saved, so the same selection is written again
+    assert buffer.submit("a@example.com", SELECTION)
+    buffer.shutdown()
+
+
+def test_newer_selection_wins_over_failed_one():
+    buffer = make_buffer(MagicMock(return_value=False))
+
+    buffer.submit("a@example.com", SELECTION)
+    buffer._take(["a@example.com"])
+    buffer.submit("a@example.com", {"time": "month"})
+    buffer._write_batch({"a@example.com": SELECTION})
+
+    buffer._write = MagicMock(return_value=True)
+    buffer.flush()
+    buffer._write.assert_called_once_with(
+        "a@example.com", {**SELECTION, "time": "month"}
+    )
+    buffer.shutdown()
+
+
+def test_shutdown_writes_queued_selections():
+    write = MagicMock(return_value=True)
+    buffer = make_buffer(write)
+
+    buffer.submit("a@example.com", SELECTION)
+    buffer.shutdown()
+    write.assert_called_once_with("a@example.com", SELECTION)
+
+    # With the writer gone, later selections are written straight away
+    buffer.submit("b@example.com", SELECTION)
+    write.assert_called_with("b@example.com", SELECTION)
@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+
+import pyarrow as pa
+import pytest
+
+from backend.app.infrastructure.snapshot_cache import INITIAL_VERSION, SnapshotCache
+
+TABLE = pa.table({"gender": ["Male", "Female"], "action_status": [1, 0]})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SnapshotCache(str(tmp_path / "snapshots"), max_bytes=1024**2)
+
+
+def snapshot_files(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(".feather"))
+
+
+def test_put_and_get(cache):
+    version = cache.version("a@example.com")
+    assert version == INITIAL_VERSION
+    assert cache.get("a@example.com", version) is None
+
+    stored = cache.put("a@example.com", version, TABLE)
+    assert stored.equals(TABLE)
+    assert cache.get("a@example.com", version).equals(TABLE)
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "written": 1, "evicted": 0}
+    # Emails do not end up in file names
+    assert not any("example" in name for name in os.listdir(cache.directory))
+
+
+def test_bump_retires_snapshot(cache):
+    old = cache.version("a@example.com")
+    cache.put("a@example.com", old, TABLE)
+    cache.put("b@example.com", cache.version("b@example.com"), TABLE)
+
+    cache.on_change("a@example.com", datetime(2024, 1, 1), datetime(2024, 1, 2))
+    new = cache.version("a@example.com")
+
+    assert new != old
+    assert cache.get("a@example.com", old) is None
+    assert cache.get("a@example.com", new) is None
+    # Other users keep theirs
+    assert cache.get("b@example.com", cache.version("b@example.com")) is not None
+    assert len(snapshot_files(cache)) == 1
+
+    # Versions live in the directory, so another cache over it agrees
+    assert SnapshotCache(cache.directory, cache.max_bytes).version("a@example.com") == new
+
+
+def test_snapshot_of_outdated_version_not_kept(cache):
+    version = cache.version("a@example.com")
+    cache.bump("a@example.com")
+
+    assert cache.put("a@example.com", version, TABLE).equals(TABLE)
+    assert snapshot_files(cache) == []
+
+
+def test_least_recently_read_evicted(tmp_path):
+    size = SnapshotCache(str(tmp_path / "probe"), 1024**2)
+    size.put("probe", INITIAL_VERSION, TABLE)
+    one_file = os.path.getsize(os.path.join(size.directory, snapshot_files(size)[0]))
+
+    cache = SnapshotCache(str(tmp_path / "snapshots"), max_bytes=2 * one_file)
+    cache.put("a@example.com", INITIAL_VERSION, TABLE)
+    cache.put("b@example.com", INITIAL_VERSION, TABLE)
+    a_path, b_path = (
+        cache._snapshot_path(name, INITIAL_VERSION)
+        for name in ("a@example.com", "b@example.com")
+    )
+    os.utime(a_path, (1000, 1000))
+    os.utime(b_path, (2000, 2000))
+
+    # Reading a makes b the least recently read
+    assert cache.get("a@example.com", INITIAL_VERSION) is not None
+    cache.put("c@example.com", INITIAL_VERSION, TABLE)
+
+    assert os.path.exists(a_path)
+    assert not os.path.exists(b_path)
+    assert cache.stats()["evicted"] == 1
+
+
+def test_dataset_over_budget_not_cached(tmp_path):
+    cache = SnapshotCache(str(tmp_path / "snapshots"), max_bytes=1)
+
+    assert cache.put("a@example.com", INITIAL_VERSION, TABLE) is TABLE
+    assert snapshot_files(cache) == []
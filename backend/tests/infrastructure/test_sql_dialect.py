@@ -0,0 +1,96 @@
+from backend.app.infrastructure.sql_dialect import (
+    SqlDialect,
+    SqliteDialect,
+    get_dialect,
+)
+
+
+def test_mysql_dialect_leaves_queries_alone():
+    query = "INSERT IGNORE INTO `t` (a) VALUES (%s)"
+
+    assert SqlDialect().translate(query) == query
+
+
+def test_get_dialect():
+    assert get_dialect("sqlite").name == "sqlite"
+    assert get_dialect("SQLite").name == "sqlite"
+    assert get_dialect("mysql").name == "mysql"
+    assert get_dialect(None).name == "mysql"
+
+
+def test_dialect_features():
+    assert get_dialect("mysql").supports_partitions
+    assert not get_dialect("sqlite").supports_partitions
+
+
+def test_sqlite_placeholders_outside_literals():
+    query = "SELECT * FROM t WHERE a = %s AND b = '100%s' AND c = %s"
+
+    assert (
+        SqliteDialect().translate(query)
+        == "SELECT * FROM t WHERE a = ? AND b = '100%s' AND c = ?"
+    )
+
+
+def test_sqlite_create_table():
+    query = SqliteDialect().translate(
+        "CREATE TABLE `t` (id INT AUTO_INCREMENT PRIMARY KEY, "
+        "gender ENUM('Male', 'O''Neil', 'a,b'), age TINYINT UNSIGNED)"
+    )
+
+    assert query == (
+        "CREATE TABLE `t` (id INTEGER PRIMARY KEY, "
+        "gender TEXT, age TINYINT UNSIGNED)"
+    )
+
+
+def test_sqlite_insert_ignore():
+    assert (
+        SqliteDialect().translate("INSERT IGNORE INTO t (a) VALUES (%s)")
+        == "INSERT OR IGNORE INTO t (a) VALUES (?)"
+    )
+
+
+def test_sqlite_upsert():
+    query = SqliteDialect().translate(
+        "INSERT INTO t (k, n) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE n = GREATEST(n, VALUES(n))"
+    )
+
+    assert query == (
+        "INSERT INTO t (k, n) VALUES (?, ?) "
+        "ON CONFLICT DO UPDATE SET n = MAX(n, excluded.n)"
+    )
+
+
+def test_sqlite_show_tables():
+    assert "sqlite_master" in SqliteDialect().translate("SHOW TABLES")
+
+
+def test_sqlite_column_types():
+    query = SqliteDialect().translate(
+        """
+        SELECT COLUMN_NAME, COLUMN_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """
+    )
+
+    assert query.strip() == "SELECT name, type FROM pragma_table_info(?) ORDER BY cid"
+
+
+def test_sqlite_statements_move_inline_indexes():
+    statements = SqliteDialect().statements(
+        "CREATE TABLE IF NOT EXISTS `t` (a INT, b INT, "
+        "INDEX `ix_a` (`a`), INDEX `ix_ab` (`a`, `b`))"
+    )
+
+    assert statements == [
+        "CREATE TABLE IF NOT EXISTS `t` (a INT, b INT)",
+        "CREATE INDEX IF NOT EXISTS `ix_a` ON `t` (`a`)",
+        "CREATE INDEX IF NOT EXISTS `ix_ab` ON `t` (`a`, `b`)",
+    ]
+
+
+def test_statements_single_statement():
+    assert SqliteDialect().statements("SELECT %s") == ["SELECT ?"]
+    assert SqlDialect().statements("SELECT %s") == ["SELECT %s"]
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from mysql.connector import Error
+
+from backend.app.infrastructure.sqlite_connection import SqliteConnection
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = SqliteConnection(str(tmp_path / "test.sqlite3"))
+    yield connection
+    connection.close()
+
+
+def test_connection_uses_wal(connection):
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA journal_mode")
+
+    assert cursor.fetchone() == ("wal",)
+
+
+def test_connection_creates_users_table(connection):
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(
+        "INSERT INTO users (firstname, lastname, email, password) "
+        "VALUES (%s, %s, %s, %s)",
+        ("Ada", "Lovelace", "ada@example.com", "secret"),
+    )
+    connection.commit()
+
+    cursor.execute(
+        "SELECT email, time FROM users WHERE email = %s", ("ada@example.com",)
+    )
+
+    assert cursor.fetchone() == {"email": "ada@example.com", "time": None}
+
+
+def test_connection_round_trips_dates(connection):
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE t (ts DATETIME(6), day DATE, n TINYINT)")
+    cursor.executemany(
+        "INSERT INTO t (ts, day, n) VALUES (%s, %s, %s)",
+        [(datetime(2024, 1, 2, 3, 4, 5, 600000), date(2024, 1, 2), np.int8(1))],
+    )
+
+    cursor.execute("SELECT ts, day, n FROM t")
+
+    assert cursor.fetchall() == [
+        (datetime(2024, 1, 2, 3, 4, 5, 600000), date(2024, 1, 2), 1)
+    ]
+
+
+def test_connection_rolls_back(connection):
+    cursor = connection.cursor()
+    cursor.execute("CREATE TABLE t (n INT)")
+    cursor.execute("INSERT INTO t (n) VALUES (%s)", (1,))
+
+    assert connection.in_transaction
+    connection.rollback()
+
+    cursor.execute("SELECT COUNT(*) FROM t")
+    assert cursor.fetchone() == (0,)
+
+
+def test_connection_raises_mysql_errors(connection):
+    cursor = connection.cursor()
+
+    with pytest.raises(Error):
+        cursor.execute("SELECT * FROM missing_table")
+
+
+def test_closed_connection(connection):
+    connection.close()
+
+    assert not connection.is_connected()
+    with pytest.raises(Error):
+        connection.cursor()
@@ -1,8 +1,15 @@
+import os
+import tarfile
+import tempfile
 import unittest
+import zipfile
+from datetime import date, datetime
 from io import BytesIO
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from mysql.connector import Error
 from werkzeug.datastructures import FileStorage
 
@@ -19,6 +26,20 @@ class TestCsvFileRepo(unittest.TestCase):
         self.file_path = "test_file.csv"
         self.repo = CsvFileRepo(self.user, self.file_path)
 
+        # Schema and catalog upkeep go through SqliteDbRepo and are covered by
+        # its own tests
+        for method in (
+            "migrate_table",
+            "ensure_categories",
+            "create_distinct_values_table",
+            "add_distinct_values",
+        ):
+            patcher = patch(
+                f"backend.app.repositories.sqlite_db_repo.SqliteDbRepo.{method}"
+            )
+            setattr(self, f"mock_{method}", patcher.start())
+            self.addCleanup(patcher.stop)
+
     @patch(
         "backend.app.infrastructure.db_connection_manager.DbConnectionManager.get_connection"
     )
@@ -27,10 +48,13 @@ class TestCsvFileRepo(unittest.TestCase):
         mock_connection = MagicMock()
         mock_get_connection.return_value = mock_connection
 
-        self.repo.connect()
+        with self.repo.connect() as connection:
+            self.assertIs(connection, mock_connection)
+            mock_connection.close.assert_not_called()
 
-        self.assertIsNotNone(self.repo.connection)
         mock_get_connection.assert_called_once()
+        # Checked back into the pool when the block ends
+        mock_connection.close.assert_called_once()
 
     @patch("pandas.read_csv")
     @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
@@ -207,6 +231,103 @@ class TestCsvFileRepo(unittest.TestCase):
         # Ensure the data was filtered correctly
         self.assertEqual(len(mock_df), 2)
 
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.iter_filtered_data")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_update_comparison_csv_pushdown(
+        self, mock_get_connection, mock_iter_filtered_data
+    ):
+        """Test that the selection is filtered in the database and streamed out."""
+        mock_get_connection.return_value = MagicMock()
+        mock_iter_filtered_data.return_value = (
+            ["gender", "age", "timestamp", "action_status"],
+            iter([[("male", 28, "2024-11-24", 0)], [("male", 30, "2024-11-24", 1)]]),
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = CsvFileRepo(self.user, os.path.join(temp_dir, "output.csv"))
+            repo.update_comparison_csv(
+                ["gender", "age"],
+                {"gender": ["male"], "age": ["27-35", "bad"]},
+                "week",
+            )
+            result = pd.read_csv(repo.file_path)
+
+        mock_iter_filtered_data.assert_called_once_with(
+            ["gender", "age", "id", "timestamp", "action_status"],
+            values={"gender": ["male"]},
+            ranges={"age": [(27, 35)]},
+            days=7,
+        )
+        self.assertEqual(result["age"].tolist(), [28, 30])
+        self.assertEqual(
+            list(result.columns), ["gender", "age", "timestamp", "action_status"]
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.iter_filtered_data")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_get_comparison_data(self, mock_get_connection, mock_iter_filtered_data):
+        """Test that the selection is handed over as a DataFrame, without a file."""
+        mock_iter_filtered_data.return_value = (
+            ["gender", "age", "action_status"],
+            iter([[("male", None, 0)], [("female", 30, 1), ("male", 41, 1)]]),
+        )
+
+        with patch("builtins.open") as mock_open:
+            result = self.repo.get_comparison_data(
+                ["gender", "age"], {"gender": ["male", "female"], "age": ["25-45"]}, ""
+            )
+
+        mock_open.assert_not_called()
+        mock_iter_filtered_data.assert_called_once_with(
+            ["gender", "age", "id", "timestamp", "action_status"],
+            values={"gender": ["male", "female"]},
+            ranges={"age": [(25, 45)]},
+            days=None,
+        )
+        self.assertEqual(list(result.columns), ["gender", "age", "action_status"])
+        self.assertEqual(result["gender"].tolist(), ["male", "female", "male"])
+        # NULLs come through as NaN, the way they would from a CSV file
+        self.assertTrue(pd.isna(result["age"][0]))
+        self.assertEqual(result["age"].tolist()[1:], [30.0, 41.0])
+        self.assertEqual(result["action_status"].tolist(), [0, 1, 1])
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.iter_filtered_data")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_numeric_ranges_merged(self, mock_get_connection, mock_iter_filtered_data):
+        """Test that any numeric demographic is filtered by merged ranges."""
+        mock_iter_filtered_data.return_value = (["income", "action_status"], iter([]))
+
+        self.repo.get_comparison_data(
+            ["age", "income", "state"],
+            {
+                "age": ["36-44", "18-26", "20-30"],
+                "income": ["1000-2000", "1500-3000"],
+                "state": ["CA"],
+            },
+            "",
+        )
+
+        mock_iter_filtered_data.assert_called_once_with(
+            ["age", "income", "state", "id", "timestamp", "action_status"],
+            values={"state": ["CA"]},
+            ranges={"age": [(18, 30), (36, 44)], "income": [(1000, 3000)]},
+            days=None,
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.iter_data")
+    def test_get_data(self, mock_iter_data):
+        """Test reading the whole table into a DataFrame."""
+        mock_iter_data.return_value = (["gender", "action_status"], iter([]))
+        empty = self.repo.get_data()
+        self.assertTrue(empty.empty)
+        self.assertEqual(list(empty.columns), ["gender", "action_status"])
+
+        mock_iter_data.return_value = (
+            ["gender", "action_status"],
+            iter([[("male", 1), ("female", 0)]]),
+        )
+        self.assertEqual(self.repo.get_data()["gender"].tolist(), ["male", "female"])
+
     @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
     def test_import_csv_to_db_no_connection(self, mock_get_connection):
         """Test import_csv_to_db when no database connection is available."""
@@ -228,7 +349,7 @@ class TestCsvFileRepo(unittest.TestCase):
         mock_connection = MagicMock()
         mock_connection.is_connected.return_value = True
         mock_cursor = MagicMock()
-        mock_cursor.execute.side_effect = Exception("Database error")
+        mock_cursor.executemany.side_effect = Exception("Database error")
         mock_connection.cursor.return_value = mock_cursor
         mock_get_connection.return_value = mock_connection
 
@@ -244,6 +365,712 @@ class TestCsvFileRepo(unittest.TestCase):
         self.assertFalse(result)
         self.assertEqual(mock_get_connection.call_count, 2)
 
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_batches_inserts(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that rows are sent with executemany in batches of batch_size."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        self.repo.batch_size = 2
+        mock_df = pd.DataFrame(
+            {
+                "Gender": ["male", "female", None, "male", "female"],
+                "timestamp": ["2024-11-24"] * 5,
+                "action_status": [1, 0, 1, 0, 1],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = self.repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        self.assertEqual(mock_cursor.executemany.call_count, 3)
+        query, first_batch = mock_cursor.executemany.call_args_list[0][0]
+        self.assertEqual(
+            query,
+            "INSERT INTO `test_table` (gender, timestamp, action_status) "
+            "VALUES (%s, %s, %s)",
+        )
+        self.assertEqual(
+            first_batch, [("male", "2024-11-24", 1), ("female", "2024-11-24", 0)]
+        )
+        # Missing values are sent as NULL
+        self.assertIsNone(mock_cursor.executemany.call_args_list[1][0][1][0][0])
+        mock_cursor.execute.assert_not_called()
+        mock_connection.commit.assert_called_once()
+        self.assertEqual(self.repo.last_import_stats["rows"], 5)
+        self.assertIn("rows_per_sec", self.repo.last_import_stats)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_catalogs_distinct_values(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that each chunk adds only the values not seen in earlier chunks."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        self.repo.chunk_size = 2
+        chunks = [
+            pd.DataFrame(
+                {
+                    "gender": ["male", "female"],
+                    "age": [30.0, None],
+                    "timestamp": ["2024-11-24"] * 2,
+                    "action_status": [1, 0],
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "gender": ["male", "other"],
+                    "age": [30.0, 41.0],
+                    "timestamp": ["2024-11-25"] * 2,
+                    "action_status": [0, 1],
+                }
+            ),
+        ]
+
+        reader = MagicMock()
+        reader.__enter__.return_value = iter(chunks)
+        with patch("pandas.read_csv", return_value=reader):
+            result = self.repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        self.mock_create_distinct_values_table.assert_called_once()
+        self.assertEqual(
+            [c[0][1] for c in self.mock_add_distinct_values.call_args_list],
+            [
+                {"gender": ["male", "female"], "age": ["30"]},
+                {"gender": ["other"], "age": ["41"]},
+            ],
+        )
+        # Written on the import's cursor, so they commit with the rows
+        self.assertIs(self.mock_add_distinct_values.call_args[0][0], mock_cursor)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_streams_chunks(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that streaming mode writes each parsed chunk as it is read."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        csv_bytes = (
+            b"Gender,Zip,Timestamp,Action_Status\n"
+            b"male,111,2024-11-20,1\n"
+            b"female,222,2024-11-21,0\n"
+            b"male,333,2024-11-22,1\n"
+        )
+        upload = FileStorage(stream=BytesIO(csv_bytes), filename="data.csv")
+        progress = MagicMock()
+        repo = CsvFileRepo(
+            self.user, self.file_path, chunk_size=2, on_progress=progress
+        )
+
+        result = repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        self.assertEqual(mock_cursor.executemany.call_count, 2)
+        batches = [c[0][1] for c in mock_cursor.executemany.call_args_list]
+        self.assertEqual(
+            batches,
+            [
+                [("male", "2024-11-20", 1), ("female", "2024-11-21", 0)],
+                [("male", "2024-11-22", 1)],
+            ],
+        )
+        mock_connection.commit.assert_called_once()
+        self.assertEqual(repo.last_import_stats["rows"], 3)
+        self.assertEqual([c[0][0] for c in progress.call_args_list], [2, 1])
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_parquet_reads_only_required_columns(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that Parquet uploads are read natively with column projection."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        table = pa.table(
+            {
+                "Race": ["Black", "Asian", "White"],
+                "customer_id": [10, 11, 12],
+                "timestamp": pd.to_datetime(
+                    ["2024-11-20 10:00", "2024-11-21 11:00", "2024-11-22 12:00"]
+                ),
+                "action_status": [1, 0, 1],
+            }
+        )
+        buffer = BytesIO()
+        pq.write_table(table, buffer)
+        buffer.seek(0)
+        upload = FileStorage(stream=buffer, filename="customers_data.pq")
+        repo = CsvFileRepo(self.user, self.file_path, chunk_size=2)
+
+        with patch("pandas.read_csv") as mock_read_csv:
+            result = repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        mock_read_csv.assert_not_called()
+        query, first_batch = mock_cursor.executemany.call_args_list[0][0]
+        self.assertIn("(race, timestamp, action_status)", query)
+        self.assertEqual(
+            first_batch[0], ("Black", "2024-11-20 10:00:00.000000", 1)
+        )
+        self.assertEqual(repo.last_import_stats["rows"], 3)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_arrow_ipc_file(self, mock_get_connection, mock_create_table):
+        """Test that Arrow IPC (Feather) uploads are imported batch by batch."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        table = pa.table(
+            {
+                "gender": ["male", "female"],
+                "timestamp": ["2024-11-20", "2024-11-21"],
+                "action_status": [1, 0],
+            }
+        )
+        buffer = BytesIO()
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+        buffer.seek(0)
+        upload = FileStorage(stream=buffer, filename="shard.arrow")
+
+        result = self.repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        mock_cursor.executemany.assert_called_once()
+        self.assertEqual(
+            mock_cursor.executemany.call_args[0][1],
+            [("male", "2024-11-20", 1), ("female", "2024-11-21", 0)],
+        )
+
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_streaming_validates_first_chunk(
+        self, mock_get_connection
+    ):
+        """Test that missing critical columns abort before any chunk is written."""
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        upload = FileStorage(
+            stream=BytesIO(b"gender,age\nmale,20\nfemale,30\n"), filename="data.csv"
+        )
+        repo = CsvFileRepo(self.user, self.file_path, chunk_size=1)
+
+        self.assertFalse(repo.import_csv_to_db(upload))
+        mock_connection.cursor.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_load_data_fast_path(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test the LOAD DATA LOCAL INFILE path loads the file in one statement."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        repo = CsvFileRepo(self.user, self.file_path, use_load_data=True)
+        mock_df = pd.DataFrame(
+            {"timestamp": ["2024-11-24", "2024-11-23"], "action_status": [1, 0]}
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        mock_get_connection.assert_called_once_with(allow_local_infile=True)
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn("LOAD DATA LOCAL INFILE", query)
+        self.assertIn("(timestamp, action_status)", query)
+        mock_cursor.executemany.assert_not_called()
+        self.assertEqual(repo.last_import_stats["rows"], 2)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_load_data_falls_back(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that a refused LOAD DATA falls back to batched inserts."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_cursor.execute.side_effect = Error("Loading local data is disabled")
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        repo = CsvFileRepo(self.user, self.file_path, use_load_data=True)
+        mock_df = pd.DataFrame({"timestamp": ["2024-11-24"], "action_status": [1]})
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        mock_cursor.executemany.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_declares_categories(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that demographic values are declared before the rows using them."""
+        mock_connection = MagicMock()
+        mock_connection.cursor.return_value = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        csv_bytes = (
+            b"Gender,Timestamp,Action_Status\n"
+            b"male,2024-11-24,1\n"
+            b"female,2024-11-24,0\n"
+            b"male,2024-11-25,0\n"
+            b"non-binary,2024-11-25,1\n"
+        )
+        upload = FileStorage(stream=BytesIO(csv_bytes), filename="data.csv")
+        repo = CsvFileRepo(self.user, self.file_path, chunk_size=2)
+
+        result = repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        mock_create_table.assert_called_once_with({"gender": ["male", "female"]})
+        self.mock_migrate_table.assert_called_once()
+        self.assertEqual(
+            self.mock_ensure_categories.call_args_list,
+            [
+                call({"gender": ["male", "female"]}),
+                call({"gender": ["non-binary"]}),
+            ],
+        )
+        # Rows written before the ALTER are committed so it is not blocked
+        self.assertEqual(mock_connection.commit.call_count, 2)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.publish_staging_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_staging_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_zip_archive_loads_shards_into_staging(
+        self, mock_get_connection, mock_create_staging, mock_publish
+    ):
+        """Test that each shard of a zip is loaded into staging, then published once."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+        mock_create_staging.return_value = "staging_abc"
+        mock_publish.return_value = 3
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr(
+                "day1.csv", "Gender,Timestamp,Action_Status\nmale,2024-11-20,1\n"
+            )
+            zip_file.writestr(
+                "shards/day2.csv",
+                "gender,timestamp,action_status\n"
+                "female,2024-11-21,0\nmale,2024-11-22,1\n",
+            )
+            zip_file.writestr("notes.txt", "not data")
+        archive.seek(0)
+
+        progress = MagicMock()
+        repo = CsvFileRepo(self.user, self.file_path, on_progress=progress)
+        result = repo.import_csv_to_db(
+            FileStorage(stream=archive, filename="shards.zip")
+        )
+
+        self.assertTrue(result)
+        self.assertEqual(mock_cursor.executemany.call_count, 2)
+        for query, _ in (c[0] for c in mock_cursor.executemany.call_args_list):
+            self.assertTrue(query.startswith("INSERT INTO `staging_abc`"))
+        # One connection per shard, each committed and closed by its worker
+        self.assertEqual(mock_connection.commit.call_count, 2)
+        self.assertEqual(mock_connection.close.call_count, 2)
+        mock_publish.assert_called_once_with(
+            "staging_abc", include_ids=False, rollups=None
+        )
+        self.assertEqual(sorted(c[0][0] for c in progress.call_args_list), [1, 2])
+        self.assertEqual(repo.last_import_stats["rows"], 3)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.drop_staging_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.publish_staging_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_staging_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_tar_archive_aborts_on_bad_shard(
+        self, mock_get_connection, mock_create_staging, mock_publish, mock_drop
+    ):
+        """Test that a shard missing critical columns discards the whole archive."""
+        mock_connection = MagicMock()
+        mock_connection.cursor.return_value = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        mock_create_staging.return_value = "staging_abc"
+
+        archive = BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar_file:
+            for name, content in [
+                ("good.csv", b"timestamp,action_status\n2024-11-20,1\n"),
+                ("bad.csv", b"gender\nmale\n"),
+            ]:
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar_file.addfile(info, BytesIO(content))
+        archive.seek(0)
+
+        result = self.repo.import_csv_to_db(
+            FileStorage(stream=archive, filename="shards.tar.gz")
+        )
+
+        self.assertFalse(result)
+        mock_publish.assert_not_called()
+        mock_drop.assert_called_once_with("staging_abc")
+
+    def test_extract_shards_keeps_members_inside_directory(self):
+        """Test that archive member paths cannot escape the extraction directory."""
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("../../escape.csv", "timestamp,action_status\n")
+            zip_file.writestr("__MACOSX/._escape.csv", "junk")
+        archive.seek(0)
+
+        with tempfile.TemporaryDirectory() as shard_dir:
+            shards = CsvFileRepo._extract_shards(
+                FileStorage(stream=archive, filename="shards.zip"), shard_dir
+            )
+
+            self.assertEqual(len(shards), 1)
+            self.assertEqual(os.path.dirname(shards[0]), shard_dir)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.update_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.get_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_incremental_timestamp(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_get_watermark,
+        mock_update_watermark,
+    ):
+        """Test that incremental mode only writes rows newer than the watermark."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+        mock_get_watermark.return_value = (datetime(2024, 11, 21), None)
+
+        notifier = MagicMock()
+        repo = CsvFileRepo(
+            self.user, self.file_path, incremental=True, notifier=notifier
+        )
+        mock_df = pd.DataFrame(
+            {
+                "timestamp": ["2024-11-20", "2024-11-21", "2024-11-22", "2024-11-23"],
+                "action_status": [1, 0, 1, 0],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        query, rows = mock_cursor.executemany.call_args[0]
+        self.assertIn("(timestamp, action_status)", query)
+        self.assertEqual(
+            rows,
+            [("2024-11-22 00:00:00.000000", 1), ("2024-11-23 00:00:00.000000", 0)],
+        )
+        mock_update_watermark.assert_called_once_with(datetime(2024, 11, 23), None)
+        notifier.publish.assert_called_once_with(
+            "test_table", datetime(2024, 11, 22), datetime(2024, 11, 23)
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_integer_coded_demographics(
+        self, mock_get_connection, mock_create_table
+    ):
+        """Test that numeric demographic codes are written as the ENUM's text."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        mock_df = pd.DataFrame(
+            {
+                "gender": [2, 1, None],
+                "timestamp": ["2024-11-20", "2024-11-21", "2024-11-22"],
+                "action_status": [1, 0, 1],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = self.repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        mock_create_table.assert_called_once_with({"gender": ["2", "1"]})
+        # MySQL would read the integer 2 as the second ENUM member, "1"
+        _, rows = mock_cursor.executemany.call_args[0]
+        self.assertEqual([row[0] for row in rows], ["2", "1", None])
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.partition_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_partitioned(
+        self, mock_get_connection, mock_create_table, mock_partition_table
+    ):
+        """Test that new months are partitioned once the rows are committed."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        repo = CsvFileRepo(self.user, self.file_path, partitioned=True)
+        mock_df = pd.DataFrame(
+            {
+                "timestamp": ["2024-11-20", "not a date", "2024-12-01"],
+                "action_status": [1, 1, 0],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        mock_partition_table.assert_called_once()
+        # Rows without a timestamp cannot go in the partitioned table
+        _, rows = mock_cursor.executemany.call_args[0]
+        self.assertEqual(
+            rows,
+            [("2024-11-20 00:00:00.000000", 1), ("2024-12-01 00:00:00.000000", 0)],
+        )
+
+        # Nor is the table partitioned when repeated ids are ignored, since the
+        # (id, timestamp) key would keep them
+        repo = CsvFileRepo(self.user, self.file_path, partitioned=True, dedupe_ids=True)
+        self.assertFalse(repo.partitioned)
+
+        # Without the option the table is left as it is
+        mock_partition_table.reset_mock()
+        with patch("pandas.read_csv", return_value=mock_df):
+            self.repo.import_csv_to_db(MagicMock(spec=FileStorage))
+        mock_partition_table.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.update_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.get_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_incremental_mixed_timestamp_formats(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_get_watermark,
+        mock_update_watermark,
+    ):
+        """Test that timestamps with and without fractional seconds are both parsed."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+        mock_get_watermark.return_value = (datetime(2024, 11, 21), None)
+
+        repo = CsvFileRepo(self.user, self.file_path, incremental=True)
+        mock_df = pd.DataFrame(
+            {
+                "timestamp": ["2024-11-20 10:00:00", "2024-11-22 10:00:00.5"],
+                "action_status": [1, 0],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        _, rows = mock_cursor.executemany.call_args[0]
+        self.assertEqual(rows, [("2024-11-22 10:00:00.500000", 0)])
+        mock_update_watermark.assert_called_once_with(
+            datetime(2024, 11, 22, 10, 0, 0, 500000), None
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.update_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.get_watermark")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_incremental_id(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_get_watermark,
+        mock_update_watermark,
+    ):
+        """Test that ids take precedence over timestamps when both are known."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+        mock_get_watermark.return_value = (datetime(2024, 11, 30), 2)
+
+        repo = CsvFileRepo(self.user, self.file_path, incremental=True)
+        mock_df = pd.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "timestamp": ["2024-11-20", "2024-11-21", "2024-11-22"],
+                "action_status": [1, 0, 1],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        query, rows = mock_cursor.executemany.call_args[0]
+        # The id is only used for the comparison, not written
+        self.assertIn("(timestamp, action_status)", query)
+        self.assertEqual(len(rows), 1)
+        mock_update_watermark.assert_called_once_with(datetime(2024, 11, 22), 3)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.write_rollups")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_rollup_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_writes_rollups(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_create_rollup_table,
+        mock_write_rollups,
+    ):
+        """Test that each chunk's rollup counts are written on the import cursor."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        repo = CsvFileRepo(self.user, self.file_path, rollups=True)
+        mock_df = pd.DataFrame(
+            {
+                "gender": ["male", "male", "female"],
+                "age": [25.0, 25.0, None],
+                "timestamp": [
+                    "2024-11-24 08:00:00",
+                    "2024-11-24 17:30:00",
+                    "2024-11-25 09:00:00",
+                ],
+                "action_status": [1, 1, 0],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        mock_create_rollup_table.assert_called_once()
+        cursor, counts = mock_write_rollups.call_args[0]
+        self.assertIs(cursor, mock_cursor)
+
+        rows = set(counts.itertuples(index=False, name=None))
+        self.assertEqual(
+            rows,
+            {
+                ("gender", "male", "", "", date(2024, 11, 24), 1, 2),
+                ("gender", "female", "", "", date(2024, 11, 25), 0, 1),
+                ("age", "25", "", "", date(2024, 11, 24), 1, 2),
+                ("gender", "male", "age", "25", date(2024, 11, 24), 1, 2),
+            },
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.record_ingest")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.has_ingested")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_skips_duplicate_upload(
+        self, mock_get_connection, mock_has_ingested, mock_record_ingest
+    ):
+        """Test that an upload already in the ledger is not parsed or written again."""
+        mock_has_ingested.return_value = True
+        repo = CsvFileRepo(self.user, self.file_path, skip_duplicates=True)
+        upload = FileStorage(
+            stream=BytesIO(b"timestamp,action_status\n2024-11-24,1\n"),
+            filename="data.csv",
+        )
+
+        with patch("pandas.read_csv") as mock_read_csv:
+            result = repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        mock_read_csv.assert_not_called()
+        mock_record_ingest.assert_not_called()
+        self.assertTrue(repo.last_import_stats["duplicate"])
+        self.assertEqual(upload.stream.tell(), 0)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.record_ingest")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.has_ingested")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_records_new_upload(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_has_ingested,
+        mock_record_ingest,
+    ):
+        """Test that a new upload is written and its hash added to the ledger."""
+        mock_connection = MagicMock()
+        mock_connection.cursor.return_value = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        mock_has_ingested.return_value = False
+
+        repo = CsvFileRepo(self.user, self.file_path, skip_duplicates=True)
+        content = b"timestamp,action_status\n2024-11-24,1\n2024-11-25,0\n"
+        upload = FileStorage(stream=BytesIO(content), filename="data.csv")
+
+        result = repo.import_csv_to_db(upload)
+
+        self.assertTrue(result)
+        expected_hash = CsvFileRepo._content_hash(BytesIO(content))
+        mock_has_ingested.assert_called_once_with(expected_hash)
+        mock_record_ingest.assert_called_once_with(expected_hash, 2)
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
+    def test_import_csv_to_db_dedupes_ids(self, mock_get_connection, mock_create_table):
+        """Test that repeated ids are dropped and existing ids are ignored."""
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_get_connection.return_value = mock_connection
+
+        repo = CsvFileRepo(self.user, self.file_path, dedupe_ids=True)
+        mock_df = pd.DataFrame(
+            {
+                "ID": [1, 2, 2],
+                "timestamp": ["2024-11-24"] * 3,
+                "action_status": [1, 0, 0],
+            }
+        )
+
+        with patch("pandas.read_csv", return_value=mock_df):
+            result = repo.import_csv_to_db(MagicMock(spec=FileStorage))
+
+        self.assertTrue(result)
+        query, rows = mock_cursor.executemany.call_args[0]
+        self.assertTrue(query.startswith("INSERT IGNORE INTO `test_table` (id, "))
+        self.assertEqual([row[0] for row in rows], [1, 2])
+
     @patch("builtins.open", new_callable=MagicMock)
     @patch("backend.app.repositories.csv_file_repo.DbConnectionManager.get_connection")
     def test_save_data_to_csv_no_connection(self, mock_get_connection, mock_open):
@@ -323,8 +1150,7 @@ class TestCsvFileRepo(unittest.TestCase):
         """Test get_headers when a MySQL Error occurs."""
 
         # Simulate a database connection and cursor setup
-        mock_connection = MagicMock()
-        self.repo.connection = mock_connection
+        mock_connection = mock_connect.return_value.__enter__.return_value
 
         # Simulate a MySQL Error during cursor execution
         mock_cursor = MagicMock()
@@ -1,4 +1,7 @@
+from unittest.mock import patch
+
 import pandas as pd
+import pyarrow.feather as feather
 import pytest
 from backend.ml_model.repository.file_reader import FileReader
 
@@ -54,3 +57,75 @@ def test_valid_file(tmp_path):
         "age_groups" in df_dropped.columns
     ), "Age groups should be created in the dataframe."
     assert "age" not in df_dropped.columns, "Original 'age' column should be dropped."
+
+
+def test_data_in_memory():
+    """Test that a DataFrame handed over is read instead of a file."""
+    data = pd.DataFrame(
+        {
+            "id": [1, 2],
+            "timestamp": ["2023-11-23", "2023-11-24"],
+            "age": [25, 32],
+            "gender": ["M", "F"],
+            "action_status": [1, 0],
+        }
+    )
+
+    with patch("pandas.read_csv") as mock_read_csv:
+        df_dropped, inputs, target = FileReader(data=data).read_file()
+
+    mock_read_csv.assert_not_called()
+    assert list(df_dropped.columns) == ["gender", "action_status", "age_groups"]
+    assert target.tolist() == [1, 0]
+    # The caller's frame is left as it was
+    assert list(data.columns) == ["id", "timestamp", "age", "gender", "action_status"]
+
+
+def test_arrow_file_is_memory_mapped(tmp_path):
+    """Test that an Arrow IPC file is read with only the columns the model uses."""
+    data = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "timestamp": ["2023-11-23", "2023-11-24", "2023-11-25"],
+            "gender": ["M", "F", "F"],
+            "age": [25, 32, 47],
+            "zip_code": ["10001", "94105", "60601"],
+            "action_status": [1, 0, 1],
+        }
+    )
+    arrow_file = tmp_path / "dataset.feather"
+    data.to_feather(arrow_file)
+
+    with patch("pandas.read_csv") as mock_read_csv:
+        df_dropped, inputs, target = FileReader(str(arrow_file)).read_file()
+
+    mock_read_csv.assert_not_called()
+    assert list(df_dropped.columns) == ["gender", "action_status", "age_groups"]
+    assert list(inputs.columns) == ["gender", "age_groups"]
+    assert target.tolist() == [1, 0, 1]
+
+    # Reading the CSV form of the same data gives the same result
+    csv_file = tmp_path / "dataset.csv"
+    data.drop(columns="zip_code").to_csv(csv_file, index=False)
+    from_csv, _, _ = FileReader(str(csv_file)).read_file()
+    pd.testing.assert_frame_equal(df_dropped, from_csv[df_dropped.columns])
+
+
+def test_feather_v1_file(tmp_path):
+    """Test that a Feather V1 file, which is not Arrow IPC, is read too."""
+    data = pd.DataFrame(
+        {
+            "gender": ["M", "F", "F"],
+            "race": ["White", "Black", "Asian"],
+            "state": ["CA", "NY", "TX"],
+            "age": [25, 32, 47],
+            "action_status": [1, 0, 1],
+        }
+    )
+    feather_file = tmp_path / "dataset.feather"
+    feather.write_feather(data, feather_file, version=1)
+
+    df_dropped, inputs, target = FileReader(str(feather_file)).read_file()
+
+    assert list(inputs.columns) == ["gender", "race", "state", "age_groups"]
+    assert target.tolist() == [1, 0, 1]
@@ -114,3 +114,26 @@ def test_output_structure(mock_csv_data):
         assert isinstance(df_dropped, pd.DataFrame)  # The cleaned DataFrame
         assert isinstance(inputs, pd.DataFrame)  # The input features DataFrame
         assert isinstance(target, pd.Series)  # The target column (action_status)
+
+
+def test_read_data_in_memory(mock_csv_data):
+    data = pd.read_csv(mock_csv_data)
+
+    with patch("pandas.read_csv") as mock_read_csv:
+        df_dropped, inputs, target = FileReaderMultiple(data=data).read_file()
+
+    mock_read_csv.assert_not_called()
+    assert "customer_id" not in df_dropped.columns
+    assert target.tolist() == [1, 0, 1, 0]
+
+
+def test_read_arrow_file(mock_csv_data, tmp_path):
+    arrow_file = tmp_path / "dataset.arrow"
+    pd.read_csv(mock_csv_data).to_feather(arrow_file)
+
+    with patch("pandas.read_csv") as mock_read_csv:
+        df_dropped, inputs, target = FileReaderMultiple(str(arrow_file)).read_file()
+
+    mock_read_csv.assert_not_called()
+    assert "customer_id" not in df_dropped.columns
+    assert target.tolist() == [1, 0, 1, 0]
@@ -0,0 +1,641 @@
+import gc
+import io
+import threading
+import time
+import zipfile
+from datetime import date, datetime
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from backend.app.entities.user import User
+from backend.app.infrastructure.change_notifier import ChangeNotifier
+from backend.app.infrastructure.db_connection_manager import DbConnectionManager
+from backend.app.infrastructure.ingestion_job_manager import IngestionJobManager
+from backend.app.infrastructure.selection_write_buffer import SelectionWriteBuffer
+from backend.app.infrastructure.snapshot_cache import SnapshotCache
+from backend.app.repositories.csv_file_repo import CsvFileRepo
+from backend.app.repositories.ingestion_job_repo import IngestionJobRepo
+from backend.app.repositories.sqlite_db_repo import SqliteDbRepo
+from backend.app.repositories.user_repo import UserRepo
+from backend.app.use_cases import GetValuesUnderHeader
+
+UPLOAD = (
+    b"id,gender,age,race,state,timestamp,action_status\n"
+    b"1,Male,30,White,CA,2024-01-01 10:00:00,1\n"
+    b"2,Female,40,Black,NY,2024-01-02 11:00:00.5,0\n"
+    b"3,Male,50,Black,CA,2024-01-02 12:00:00,1\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(monkeypatch, tmp_path):
+    # Every repository talks to a fresh embedded database
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "app.sqlite3"))
+
+
+@pytest.fixture
+def user():
+    return User("sqlite@example.com")
+
+
+def upload(data: bytes, filename: str = "upload.csv") -> FileStorage:
+    return FileStorage(io.BytesIO(data), filename=filename)
+
+
+def test_import_and_fetch(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), rollups=True)
+
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+
+    headers, rows = SqliteDbRepo(user).fetch_data()
+    assert headers == [
+        "id",
+        "gender",
+        "age",
+        "race",
+        "state",
+        "timestamp",
+        "action_status",
+    ]
+    assert rows == [
+        (1, "Male", 30, "White", "CA", datetime(2024, 1, 1, 10), 1),
+        (2, "Female", 40, "Black", "NY", datetime(2024, 1, 2, 11, 0, 0, 500000), 0),
+        (3, "Male", 50, "Black", "CA", datetime(2024, 1, 2, 12), 1),
+    ]
+    assert file_repo.get_headers() == ["gender", "age", "race", "state"]
+
+    file_repo.save_data_to_csv()
+    with open(tmp_path / "output.csv") as file:
+        assert len(file.readlines()) == 4
+
+
+def test_streaming(user, tmp_path):
+    CsvFileRepo(user, str(tmp_path / "output.csv")).import_csv_to_db(upload(UPLOAD))
+    db_repo = SqliteDbRepo(user)
+
+    headers, chunks = db_repo.iter_data(chunk_size=2)
+    assert headers[0] == "id"
+    assert [len(rows) for rows in chunks] == [2, 1]
+
+    batches = list(db_repo.iter_record_batches(chunk_size=2))
+    assert sum(batch.num_rows for batch in batches) == 3
+    assert str(batches[0].schema.field("timestamp").type) == "timestamp[us]"
+
+
+def test_update_comparison_csv(user, tmp_path):
+    output = tmp_path / "output.csv"
+    file_repo = CsvFileRepo(user, str(output))
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    file_repo.update_comparison_csv(
+        ["gender", "age"], {"gender": ["Male"], "age": ["25-45"]}, "year"
+    )
+
+    with open(output) as file:
+        assert file.read().splitlines() == [
+            "gender,age,id,timestamp,action_status",
+            "Male,30,1,2024-01-01 10:00:00,1",
+        ]
+
+    # The day before the newest row only leaves the second of January
+    file_repo.update_comparison_csv(["race"], {}, "day")
+    with open(output) as file:
+        assert len(file.read().splitlines()) == 3
+
+
+def test_get_comparison_data(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    data = file_repo.get_comparison_data(
+        ["gender", "age"], {"gender": ["Male"], "age": ["25-55"]}, "year"
+    )
+
+    assert data[["gender", "age", "id", "action_status"]].values.tolist() == [
+        ["Male", 30, 1, 1],
+        ["Male", 50, 3, 1],
+    ]
+    assert str(data["timestamp"].dtype).startswith("datetime64")
+    assert not (tmp_path / "output.csv").exists()
+    assert len(file_repo.get_data()) == 3
+
+
+def test_time_window_on_text_timestamps(user, tmp_path):
+    # Tables from before the typed schema keep their timestamps as text
+    with DbConnectionManager.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"CREATE TABLE `{user.table_name}` (id INT AUTO_INCREMENT PRIMARY KEY, "
+            "gender VARCHAR(255), timestamp VARCHAR(255), action_status VARCHAR(255))"
+        )
+        cursor.executemany(
+            f"INSERT INTO `{user.table_name}` (gender, timestamp, action_status) "
+            "VALUES (%s, %s, %s)",
+            [
+                ("Male", "2024-01-01 10:00:00", "1"),
+                ("Female", "2024-01-05 11:00:00", "0"),
+                ("Male", "2024-01-05 12:00:00", "1"),
+            ],
+        )
+        connection.commit()
+
+    data = CsvFileRepo(user, str(tmp_path / "output.csv")).get_comparison_data(
+        ["gender"], {"gender": ["Male", "Female"]}, "day"
+    )
+
+    assert data["id"].tolist() == [2, 3]
+
+
+def query_plan(cursor, query: str, parameters: tuple = ()) -> str:
+    cursor.execute(f"EXPLAIN QUERY PLAN {query}", parameters)
+    return " ".join(row[-1] for row in cursor.fetchall())
+
+
+def test_queries_use_indexes(user, tmp_path):
+    CsvFileRepo(user, str(tmp_path / "output.csv")).import_csv_to_db(upload(UPLOAD))
+    db_repo = SqliteDbRepo(user)
+
+    with DbConnectionManager.connection() as connection:
+        cursor = connection.cursor()
+
+        # The comparison export behind /api/generate
+        query, parameters = db_repo._filtered_query(
+            cursor,
+            ["gender", "age", "id", "timestamp", "action_status"],
+            {"gender": ["Male"]},
+            {"age": [(25, 45)]},
+            7,
+        )
+        plan = query_plan(cursor, query, parameters)
+        assert "USING INDEX" in plan, plan
+
+        # Its time window cutoff
+        plan = query_plan(
+            cursor,
+            f"SELECT `timestamp` FROM `{user.table_name}` "
+            "WHERE `timestamp` IS NOT NULL ORDER BY `timestamp` DESC LIMIT 1",
+        )
+        assert f"COVERING INDEX {db_repo._index_name('timestamp')}" in plan, plan
+
+        # The distinct values listed under a header
+        for column in ("gender", "age", "race", "state"):
+            plan = query_plan(
+                cursor, f"SELECT DISTINCT `{column}` FROM `{user.table_name}`"
+            )
+            assert f"COVERING INDEX {db_repo._index_name(column + '_status')}" in plan
+
+
+def test_rollups(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), rollups=True)
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    counts = SqliteDbRepo(user).get_rollup_counts("race", "gender")
+
+    assert sorted(counts) == [
+        ("Black", "Female", date(2024, 1, 2), 0, 1),
+        ("Black", "Male", date(2024, 1, 2), 1, 1),
+        ("White", "Male", date(2024, 1, 1), 1, 1),
+    ]
+
+    # Deleting the table removes its counts
+    SqliteDbRepo(user).delete_table()
+    assert SqliteDbRepo(user).get_rollup_counts("race") == []
+
+
+def test_group_counts_from_rollups(user, tmp_path, monkeypatch):
+    CsvFileRepo(user, str(tmp_path / "output.csv"), rollups=True).import_csv_to_db(
+        upload(UPLOAD)
+    )
+    selections = [
+        (["race", "gender"], {"race": ["Black"], "gender": ["Male", "Female"]}),
+        (["age"], {"age": ["27-45"]}),
+        (["gender"], {"gender": ["Male"]}),
+    ]
+
+    from_table = [
+        CsvFileRepo(user, str(tmp_path / "output.csv")).get_group_counts(
+            demographics, choices, "day"
+        )
+        for demographics, choices in selections
+    ]
+
+    # With rollups kept, the table itself is not read
+    monkeypatch.setattr(
+        CsvFileRepo,
+        "get_comparison_data",
+        MagicMock(side_effect=AssertionError("read the table")),
+    )
+    rollup_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), rollups=True)
+    from_rollups = [
+        rollup_repo.get_group_counts(demographics, choices, "day")
+        for demographics, choices in selections
+    ]
+
+    assert from_rollups[0].values.tolist() == [
+        ["Black", "Female", 0, 1],
+        ["Black", "Male", 1, 1],
+    ]
+    assert from_rollups[1].values.tolist() == [["30", 1, 1], ["40", 0, 1]]
+    # The one-day window reaches back to the start of the day before the newest
+    assert from_rollups[2].values.tolist() == [["Male", 1, 2]]
+    for table_counts, rollup_counts in zip(from_table, from_rollups):
+        pd.testing.assert_frame_equal(
+            table_counts.reset_index(drop=True), rollup_counts.reset_index(drop=True)
+        )
+
+
+def test_no_rollups_with_dedupe_ids(user, tmp_path):
+    # Rows ignored as duplicate ids would otherwise be counted again
+    file_repo = CsvFileRepo(
+        user, str(tmp_path / "output.csv"), dedupe_ids=True, rollups=True
+    )
+    assert not file_repo.rollups
+
+    file_repo.import_csv_to_db(upload(UPLOAD))
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    _, rows = SqliteDbRepo(user).fetch_data()
+    assert len(rows) == 3
+    assert SqliteDbRepo(user).get_rollup_counts("race") == []
+
+
+def test_duplicate_and_incremental_uploads(user, tmp_path):
+    file_repo = CsvFileRepo(
+        user, str(tmp_path / "output.csv"), skip_duplicates=True, incremental=True
+    )
+
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+    assert file_repo.last_import_stats["duplicate"]
+
+    db_repo = SqliteDbRepo(user)
+    assert db_repo.get_watermark() == (datetime(2024, 1, 2, 12), 3)
+
+    # Rows at or below the watermark are skipped
+    newer = UPLOAD + b"4,Female,20,Asian,TX,2024-01-03 09:00:00,1\n"
+    assert file_repo.import_csv_to_db(upload(newer))
+
+    _, rows = db_repo.fetch_data()
+    assert len(rows) == 4
+    assert db_repo.get_watermark() == (datetime(2024, 1, 3, 9), 4)
+
+
+def test_incremental_upload_after_full_upload(user, tmp_path):
+    CsvFileRepo(user, str(tmp_path / "output.csv")).import_csv_to_db(upload(UPLOAD))
+
+    # The table's newest row stands in for the mark a full upload never set
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), incremental=True)
+    newer = UPLOAD + b"4,Female,20,Asian,TX,2024-01-03 09:00:00,1\n"
+    assert file_repo.import_csv_to_db(upload(newer))
+
+    _, rows = SqliteDbRepo(user).fetch_data()
+    assert len(rows) == 4
+
+
+def test_reupload_after_delete(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), skip_duplicates=True)
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+
+    # Deleted data can be uploaded again
+    db_repo = SqliteDbRepo(user)
+    db_repo.delete_table()
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+    assert not file_repo.last_import_stats.get("duplicate")
+    assert file_repo.last_import_stats["rows"] == 3
+
+    _, rows = db_repo.fetch_data()
+    assert len(rows) == 3
+
+    # and so can data that was emptied out of the table
+    with db_repo.connect() as connection:
+        connection.cursor().execute(f"DELETE FROM `{user.table_name}`")
+        connection.commit()
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+    assert not file_repo.last_import_stats.get("duplicate")
+
+
+def test_archive_upload(user, tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("a.csv", UPLOAD)
+        zip_file.writestr("b.csv", UPLOAD)
+
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), archive_workers=2)
+
+    assert file_repo.import_csv_to_db(upload(archive.getvalue(), "shards.zip"))
+
+    _, rows = SqliteDbRepo(user).fetch_data()
+    assert len(rows) == 6
+
+
+def test_archive_shards_load_one_at_a_time(user, tmp_path, monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        for name in ("a.csv", "b.csv", "c.csv"):
+            zip_file.writestr(name, UPLOAD)
+
+    # SQLite has a single writer, so shards must not be loaded side by side
+    load_shard = CsvFileRepo._load_shard
+    lock = threading.Lock()
+    active = [0]
+    most_active = [0]
+
+    def tracked_load_shard(self, *args):
+        with lock:
+            active[0] += 1
+            most_active[0] = max(most_active[0], active[0])
+        try:
+            time.sleep(0.05)
+            return load_shard(self, *args)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(CsvFileRepo, "_load_shard", tracked_load_shard)
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"), archive_workers=3)
+
+    assert file_repo.import_csv_to_db(upload(archive.getvalue(), "shards.zip"))
+    assert most_active[0] == 1
+    assert len(SqliteDbRepo(user).fetch_data()[1]) == 9
+
+
+def test_distinct_values(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    db_repo = SqliteDbRepo(user)
+    assert db_repo.get_distinct_values("race") == ["Black", "White"]
+    assert db_repo.get_distinct_values("age") == ["30", "40", "50"]
+
+    newer = b"id,gender,age,race,state,timestamp,action_status\n"
+    newer += b"4,Female,20.0,Asian,TX,2024-01-03 09:00:00,1\n"
+    file_repo.import_csv_to_db(upload(newer))
+    assert db_repo.get_distinct_values("race") == ["Asian", "Black", "White"]
+    assert db_repo.get_distinct_values("age") == ["20", "30", "40", "50"]
+
+    use_case = GetValuesUnderHeader(file_repo)
+    assert sorted(use_case.execute("age")) == ["18-26", "27-35", "36-44", "45-53"]
+    assert not (tmp_path / "output.csv").exists()
+
+    # Deleting the table empties its catalog
+    db_repo.delete_table()
+    assert db_repo.get_distinct_values("race") == []
+
+
+def test_distinct_values_for_earlier_tables(user, tmp_path):
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    file_repo.import_csv_to_db(upload(UPLOAD))
+
+    # A table loaded before the catalog was kept is read with SELECT DISTINCT
+    db_repo = SqliteDbRepo(user)
+    with db_repo.connect() as connection:
+        connection.cursor().execute("DELETE FROM distinct_values")
+        connection.commit()
+    assert db_repo.get_distinct_values("state") == ["CA", "NY"]
+
+    # and catalogued in full with the next upload
+    newer = b"id,gender,age,race,state,timestamp,action_status\n"
+    newer += b"4,Female,20,Asian,TX,2024-01-03 09:00:00,1\n"
+    file_repo.import_csv_to_db(upload(newer))
+    assert db_repo.get_distinct_values("state") == ["CA", "NY", "TX"]
+
+
+def test_archive_distinct_values(user, tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("a.csv", UPLOAD)
+
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    file_repo.import_csv_to_db(upload(archive.getvalue(), "shards.zip"))
+
+    assert SqliteDbRepo(user).get_distinct_values("gender") == ["Female", "Male"]
+
+
+def test_drop_data_before(user, tmp_path):
+    file_repo = CsvFileRepo(
+        user, str(tmp_path / "output.csv"), rollups=True, partitioned=True
+    )
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+
+    db_repo = SqliteDbRepo(user)
+    # SQLite has no partitions; retention deletes through the timestamp index
+    assert not db_repo.partition_table()
+    with DbConnectionManager.connection() as connection:
+        assert "USING INDEX" in query_plan(
+            connection.cursor(),
+            "DELETE FROM `sqlite@example.com` WHERE timestamp < %s",
+            (datetime(2024, 1, 2),),
+        )
+
+    assert db_repo.drop_data_before(date(2024, 1, 2))
+
+    _, rows = db_repo.fetch_data()
+    assert [row[0] for row in rows] == [2, 3]
+    assert {row[2] for row in db_repo.get_rollup_counts("race")} == {
+        date(2024, 1, 2)
+    }
+    assert db_repo.get_distinct_values("race") == ["Black"]
+
+
+def test_user_selections():
+    user_repo = UserRepo("users")
+    user_repo.create_user("Ada", "Lovelace", "ada@example.com", "secret")
+
+    assert user_repo.get_user_by_email_and_password("ada@example.com", "secret")
+
+    db_repo = SqliteDbRepo(User("ada@example.com"))
+    db_repo.update_db_for_user(["gender"], {"gender": ["Male", "Female"]}, "week")
+
+    assert db_repo.get_last_login_data() == (
+        ["gender"],
+        {"gender": ["Male", "Female", None, None]},
+        "week",
+    )
+
+
+def test_buffered_user_selections():
+    UserRepo("users").create_user("Ada", "Lovelace", "ada@example.com", "secret")
+
+    def write(table_name, selection):
+        return SqliteDbRepo(User(table_name)).write_selection(table_name, selection)
+
+    buffer = SelectionWriteBuffer(write, delay=60)
+    db_repo = SqliteDbRepo(User("ada@example.com"), selection_buffer=buffer)
+    db_repo.update_db_for_user(["gender"], {"gender": ["Male"]}, "week")
+    db_repo.update_db_for_user(["race"], {"race": ["Black", "White"]}, "day")
+
+    # The queued selection is written before it is read back
+    assert db_repo.get_last_login_data() == (
+        ["race"],
+        {"race": ["Black", "White", None, None]},
+        "day",
+    )
+    assert buffer.flush() == 0
+
+    # Saving it again is written, as another process may have changed the row
+    db_repo.update_db_for_user(["race"], {"race": ["Black", "White"]}, "day")
+    assert buffer.flush() == 1
+    buffer.shutdown()
+
+
+def test_replica_reads(user, tmp_path, monkeypatch):
+    # An empty replica that has not caught up with the primary yet
+    monkeypatch.setenv("SQLITE_REPLICA_PATH", str(tmp_path / "replica.sqlite3"))
+    user_repo = UserRepo("users")
+    user_repo.create_user("Ada", "Lovelace", "ada@example.com", "secret")
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+
+    # Right after the writes, reads stay on the primary
+    assert user_repo.get_user_by_email("ada@example.com")["firstname"] == "Ada"
+    assert len(SqliteDbRepo(user).fetch_data()[1]) == 3
+    assert file_repo.get_headers() == ["gender", "age", "race", "state"]
+
+    # Once the pins are gone they go to the replica
+    DbConnectionManager._pins.clear()
+    assert user_repo.get_user_by_email("ada@example.com") is None
+    assert SqliteDbRepo(user).fetch_data() == ([], [])
+    _, chunks = SqliteDbRepo(user).iter_data()
+    assert list(chunks) == []
+
+
+def test_snapshot_reads(user, tmp_path, monkeypatch):
+    snapshots = SnapshotCache(str(tmp_path / "snapshots"), max_bytes=1024**2)
+    notifier = ChangeNotifier()
+    notifier.subscribe(snapshots.on_change)
+    uploader = CsvFileRepo(user, str(tmp_path / "output.csv"), notifier=notifier)
+    uploader.import_csv_to_db(upload(UPLOAD))
+
+    cached = CsvFileRepo(user, str(tmp_path / "output.csv"), snapshots=snapshots)
+    direct = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    selections = [
+        (["gender", "age"], {"gender": ["Male"], "age": ["25-45"]}, "year"),
+        (["race", "state"], {"race": ["Black"], "state": ["CA", "NY"]}, ""),
+        (["race"], {}, "day"),
+        (["gender"], {"gender": []}, "week"),
+        (["age"], {"age": ["20-35", "45-55"]}, "month"),
+        (["age", "gender"], {"age": ["40-55", "20-30", "25-45"]}, ""),
+    ]
+    for selection in selections:
+        expected = direct.get_comparison_data(*selection)
+        # With no rows the database cannot say the column types; the snapshot can
+        pd.testing.assert_frame_equal(
+            cached.get_comparison_data(*selection),
+            expected,
+            check_dtype=not expected.empty,
+            check_index_type=not expected.empty,
+        )
+    pd.testing.assert_frame_equal(cached.get_data(), direct.get_data())
+
+    # Between uploads the database is not read again
+    iter_data = MagicMock(side_effect=AssertionError("read the database"))
+    with monkeypatch.context() as patch:
+        patch.setattr(cached.db_repo, "iter_data", iter_data)
+        patch.setattr(cached.db_repo, "iter_filtered_data", iter_data)
+        assert len(cached.get_comparison_data(*selections[0])) == 1
+    assert snapshots.stats()["misses"] == 1
+
+    # An upload bumps the version, so the next read sees the new rows
+    version = snapshots.version(cached.table_name)
+    uploader.import_csv_to_db(
+        upload(UPLOAD.replace(b"1,Male,30", b"4,Male,31"), "more.csv")
+    )
+    assert snapshots.version(cached.table_name) != version
+    pd.testing.assert_frame_equal(cached.get_data(), direct.get_data())
+    assert snapshots.stats()["misses"] == 2
+
+    # Deletes bump it too
+    version = snapshots.version(cached.table_name)
+    uploader.db_repo.drop_data_before(date(2024, 1, 2))
+    assert snapshots.version(cached.table_name) != version
+    assert len(cached.get_data()) == 4
+
+    uploader.db_repo.delete_table()
+    assert cached.get_data().empty
+
+
+def test_snapshots_built_from_primary(user, tmp_path, monkeypatch):
+    # An empty replica that has not caught up with the primary yet
+    monkeypatch.setenv("SQLITE_REPLICA_PATH", str(tmp_path / "replica.sqlite3"))
+    snapshots = SnapshotCache(str(tmp_path / "snapshots"), max_bytes=1024**2)
+    CsvFileRepo(user, str(tmp_path / "output.csv")).import_csv_to_db(upload(UPLOAD))
+    DbConnectionManager._pins.clear()
+
+    cached = CsvFileRepo(user, str(tmp_path / "output.csv"), snapshots=snapshots)
+    assert len(cached.get_data()) == 3
+
+
+def test_snapshot_time_window_on_text_timestamps(user, tmp_path):
+    # Tables from before the typed schema keep their timestamps as text
+    with DbConnectionManager.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"CREATE TABLE `{user.table_name}` (id INT AUTO_INCREMENT PRIMARY KEY, "
+            "gender VARCHAR(255), timestamp VARCHAR(255), action_status VARCHAR(255))"
+        )
+        cursor.executemany(
+            f"INSERT INTO `{user.table_name}` (gender, timestamp, action_status) "
+            "VALUES (%s, %s, %s)",
+            [
+                ("Male", "2024-01-01 10:00:00", "1"),
+                ("Female", "2024-01-05 11:00:00", "0"),
+                ("Male", "2024-01-05 12:00:00", "1"),
+                ("Male", "not a time", "1"),
+            ],
+        )
+        connection.commit()
+
+    snapshots = SnapshotCache(str(tmp_path / "snapshots"), max_bytes=1024**2)
+    data = CsvFileRepo(
+        user, str(tmp_path / "output.csv"), snapshots=snapshots
+    ).get_comparison_data(["gender"], {"gender": ["Male", "Female"]}, "day")
+
+    assert data["id"].tolist() == [2, 3]
+
+
+def test_connections_checked_in(user, tmp_path):
+    leaked = DbConnectionManager.pool_stats().get("leaked", 0)
+
+    # Short-lived repositories, as each request builds them
+    file_repo = CsvFileRepo(user, str(tmp_path / "output.csv"))
+    assert file_repo.import_csv_to_db(upload(UPLOAD))
+    assert file_repo.get_headers() == ["gender", "age", "race", "state"]
+    assert len(file_repo.get_data()) == 3
+    assert GetValuesUnderHeader(file_repo).execute("state") == ["CA", "NY"]
+    UserRepo("users").create_user("Ada", "Lovelace", user.table_name, "secret")
+    assert UserRepo("users").get_user_by_email(user.table_name)
+    SqliteDbRepo(user).update_db_for_user(["gender"], {"gender": ["Male"]}, "")
+    assert SqliteDbRepo(user).get_last_login_data()[0] == ["gender"]
+
+    del file_repo
+    gc.collect()
+
+    stats = DbConnectionManager.pool_stats()
+    assert stats["leaked"] == leaked
+    assert stats["in_use"] == 0
+
+
+def test_upload_job_visible_to_other_processes(user):
+    job_manager = IngestionJobManager(max_workers=1, store=IngestionJobRepo())
+
+    def work(job):
+        job.add_rows(3)
+        return True
+
+    job = job_manager.submit(user.table_name, work)
+    job_manager.shutdown(wait=True)
+
+    # A manager in another process has only the table to go on
+    other = IngestionJobManager(max_workers=1, store=IngestionJobRepo())
+    stored = other.get(job.job_id)
+    other.shutdown()
+
+    assert stored is not job
+    assert stored.to_dict()["status"] == "succeeded"
+    assert stored.rows_processed == 3
+    assert stored.table_name == user.table_name
+    assert other.get("missing") is None
@@ -1,10 +1,12 @@
 import unittest
+from datetime import date, datetime
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
 from mysql.connector import Error
 
 from backend.app.entities.user import User
-from backend.app.repositories.sqlite_db_repo import SqliteDbRepo
+from backend.app.repositories.sqlite_db_repo import ROLLUP_COLUMNS, SqliteDbRepo
 
 
 class TestSqliteDbRepo(unittest.TestCase):
@@ -19,9 +21,24 @@ class TestSqliteDbRepo(unittest.TestCase):
         mock_connection = MagicMock()
         mock_get_connection.return_value = mock_connection
 
-        self.repo.connect()
+        with self.repo.connect() as connection:
+            self.assertEqual(connection, mock_connection)
+            mock_connection.close.assert_not_called()
+
         mock_get_connection.assert_called_once()
-        self.assertEqual(self.repo.connection, mock_connection)
+        self.assertFalse(hasattr(self.repo, "connection"))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_methods_check_in_their_connection(self, mock_get_connection):
+        # Test that each call returns its connection to the pool before returning
+        first, second = MagicMock(), MagicMock()
+        mock_get_connection.side_effect = [first, second]
+
+        self.repo.see_all_tables()
+        first.close.assert_called_once()
+
+        self.repo.get_distinct_values("gender")
+        second.close.assert_called_once()
 
     @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
     def test_see_all_tables(self, mock_get_connection):
@@ -51,6 +68,23 @@ class TestSqliteDbRepo(unittest.TestCase):
         mock_cursor.execute.assert_called_once()
         mock_cursor.close.assert_called_once()
 
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_create_table_duplicate_categories(self, mock_get_connection):
+        # Test that values MySQL would see as the same ENUM value are listed once
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+
+        self.repo.create_table(
+            {"gender": ["Male", "male", "Female"], "state": ["CA", "CA ", "NY"]}
+        )
+
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn("gender ENUM('Male', 'Female')", query)
+        self.assertIn("state ENUM('CA', 'NY')", query)
+
     @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
     def test_delete_table(self, mock_get_connection):
         # Test table deletion
@@ -61,9 +95,24 @@ class TestSqliteDbRepo(unittest.TestCase):
         mock_connection.cursor.return_value = mock_cursor
 
         self.repo.delete_table()
-        mock_cursor.execute.assert_called_once_with(
-            f"DROP TABLE IF EXISTS `ff@gmail.com`"
+        queries = [c[0] for c in mock_cursor.execute.call_args_list]
+        self.assertEqual(queries[0], ("DROP TABLE IF EXISTS `ff@gmail.com`",))
+        # The table's values are removed from the catalog too
+        self.assertIn(
+            ("DELETE FROM distinct_values WHERE email = %s", ("ff@gmail.com",)),
+            queries,
+        )
+        # its rollup counts
+        self.assertIn(
+            ("DELETE FROM demographic_rollups WHERE email = %s", ("ff@gmail.com",)),
+            queries,
         )
+        # and its uploads from the ingest ledger
+        self.assertEqual(
+            queries[-1],
+            ("DELETE FROM ingested_files WHERE email = %s", ("ff@gmail.com",)),
+        )
+        mock_connection.commit.assert_called_once()
         mock_cursor.close.assert_called_once()
 
     @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
@@ -81,6 +130,205 @@ class TestSqliteDbRepo(unittest.TestCase):
         self.assertEqual(headers, ["column1", "column2"])
         self.assertEqual(results, [("data1", "data2"), ("data3", "data4")])
 
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_data(self, mock_get_connection):
+        # Test that rows are streamed in chunks from an unbuffered cursor
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.description = [("column1",), ("column2",)]
+        mock_cursor.fetchmany.side_effect = [
+            [("a", 1), ("b", 2)],
+            [("c", 3)],
+        ]
+
+        headers, chunks = self.repo.iter_data(chunk_size=2)
+
+        self.assertEqual(headers, ["column1", "column2"])
+        mock_connection.cursor.assert_called_once_with(buffered=False)
+        mock_connection.close.assert_not_called()
+
+        self.assertEqual(list(chunks), [[("a", 1), ("b", 2)], [("c", 3)]])
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.close.assert_called_once()
+        mock_connection.close.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_data_closed_early(self, mock_get_connection):
+        # Test that abandoning the stream still returns its connection
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.description = [("column1",)]
+        mock_cursor.fetchmany.return_value = [("a",), ("b",)]
+        mock_cursor.close.side_effect = Error("Unread result found")
+
+        _, chunks = self.repo.iter_data(chunk_size=2)
+        next(chunks)
+        chunks.close()
+
+        mock_connection.close.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_data_sql_error(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        mock_connection.cursor.return_value.execute.side_effect = Error("SQL error")
+
+        with patch("builtins.print") as mock_print:
+            headers, chunks = self.repo.iter_data()
+            mock_print.assert_called_with("Error: SQL error")
+
+        self.assertEqual(headers, [])
+        self.assertEqual(list(chunks), [])
+        mock_connection.close.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_record_batches(self, mock_get_connection):
+        # Test that a column that is all NULL in a later chunk keeps its type
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.description = [("gender",), ("age",)]
+        mock_cursor.fetchmany.side_effect = [
+            [("Male", 30), ("Female", 40)],
+            [(None, 50)],
+        ]
+
+        batches = list(self.repo.iter_record_batches(chunk_size=2))
+
+        self.assertEqual([batch.num_rows for batch in batches], [2, 1])
+        self.assertEqual(batches[1].schema, batches[0].schema)
+        self.assertEqual(batches[1].column(0).to_pylist(), [None])
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_filtered_data(self, mock_get_connection):
+        # Test that the projection, filters and time window become one query
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            ("gender", "enum('Male','Female')"),
+            ("age", "tinyint unsigned"),
+            ("timestamp", "datetime(6)"),
+            ("action_status", "tinyint"),
+        ]
+        mock_cursor.fetchone.return_value = (datetime(2024, 11, 30, 12),)
+        mock_cursor.description = [("gender",), ("age",), ("timestamp",)]
+        mock_cursor.fetchmany.return_value = []
+
+        headers, chunks = self.repo.iter_filtered_data(
+            ["gender", "age", "id", "timestamp", "action_status"],
+            values={"gender": ["Male", "Female"], "race": ["White"]},
+            ranges={"age": [(20, 30), (40, 50)]},
+            days=7,
+        )
+        list(chunks)
+
+        query, parameters = mock_cursor.execute.call_args[0]
+        self.assertEqual(
+            " ".join(query.split()),
+            "SELECT `gender`, `age`, `timestamp`, `action_status` FROM `ff@gmail.com` "
+            "WHERE `gender` IN (%s, %s) "
+            "AND (`age` BETWEEN %s AND %s OR `age` BETWEEN %s AND %s) "
+            "AND `timestamp` >= %s",
+        )
+        self.assertEqual(
+            parameters,
+            ("Male", "Female", 20, 30, 40, 50, datetime(2024, 11, 23, 12)),
+        )
+        self.assertEqual(headers, ["gender", "age", "timestamp"])
+        mock_connection.close.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_filtered_data_text_timestamps(self, mock_get_connection):
+        # Test that a table still on the VARCHAR schema gets a time window too
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            ("gender", "varchar(255)"),
+            ("timestamp", "varchar(255)"),
+        ]
+        mock_cursor.fetchone.return_value = ("2024-11-30 12:00:00.5",)
+        mock_cursor.description = [("gender",)]
+        mock_cursor.fetchmany.return_value = []
+
+        _, chunks = self.repo.iter_filtered_data(["gender"], days=7)
+        list(chunks)
+
+        query, parameters = mock_cursor.execute.call_args[0]
+        self.assertTrue(query.endswith("WHERE `timestamp` >= %s"))
+        self.assertEqual(parameters, (datetime(2024, 11, 23, 12, 0, 0, 500000),))
+
+        # A value that is no timestamp leaves the window out
+        mock_cursor.fetchone.return_value = ("yesterday",)
+        _, chunks = self.repo.iter_filtered_data(["gender"], days=7)
+        list(chunks)
+
+        query, parameters = mock_cursor.execute.call_args[0]
+        self.assertEqual(query, "SELECT `gender` FROM `ff@gmail.com`")
+        self.assertEqual(parameters, ())
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_filtered_data_empty_choice(self, mock_get_connection):
+        # Test that a demographic with no valid choices matches no rows
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("age", "tinyint unsigned")]
+        mock_cursor.description = [("age",)]
+
+        self.repo.iter_filtered_data(["age"], ranges={"age": []})
+
+        query, parameters = mock_cursor.execute.call_args[0]
+        self.assertEqual(query, "SELECT `age` FROM `ff@gmail.com` WHERE 1 = 0")
+        self.assertEqual(parameters, ())
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_iter_filtered_data_missing_table(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        mock_connection.cursor.return_value.fetchall.return_value = []
+
+        headers, chunks = self.repo.iter_filtered_data(["gender"])
+
+        self.assertEqual(headers, [])
+        self.assertEqual(list(chunks), [])
+        mock_connection.close.assert_called_once()
+
+    def test_get_columns_from_catalog(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("id", "int"), ("gender", "varchar(255)")]
+
+        self.assertEqual(self.repo.get_columns(mock_cursor), ["id", "gender"])
+
+        # Only the catalog is read, not the table
+        mock_cursor.execute.assert_called_once()
+        self.assertIn("INFORMATION_SCHEMA.COLUMNS", mock_cursor.execute.call_args[0][0])
+
+    def test_get_columns_sees_changes_from_other_processes(self):
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("id", "int")]
+        self.assertEqual(self.repo.get_columns(mock_cursor), ["id"])
+
+        # Another process re-created the table with more columns
+        mock_cursor.fetchall.return_value = [("id", "int"), ("gender", "varchar(255)")]
+        self.assertEqual(self.repo.get_columns(mock_cursor), ["id", "gender"])
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+
     @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
     def test_update_db_for_user(self, mock_get_connection):
         # Test updating user data in the database
@@ -103,10 +351,10 @@ class TestSqliteDbRepo(unittest.TestCase):
         # Check if the correct query is executed
         mock_cursor.execute.assert_called_once_with(
             """
-            UPDATE users
-            SET demographic_1 = %s, choice_1_demographic_1 = %s, choice_2_demographic_1 = %s, choice_3_demographic_1 = %s, choice_4_demographic_1 = %s, demographic_2 = %s, choice_1_demographic_2 = %s, choice_2_demographic_2 = %s, choice_3_demographic_2 = %s, choice_4_demographic_2 = %s, time = %s
-            WHERE email = %s
-            """,
+                UPDATE users
+                SET demographic_1 = %s, choice_1_demographic_1 = %s, choice_2_demographic_1 = %s, choice_3_demographic_1 = %s, choice_4_demographic_1 = %s, demographic_2 = %s, choice_1_demographic_2 = %s, choice_2_demographic_2 = %s, choice_3_demographic_2 = %s, choice_4_demographic_2 = %s, time = %s
+                WHERE email = %s
+                """,
             (
                 "gender",  # demographic_1
                 "male",  # choice_1_demographic_1
@@ -145,10 +393,10 @@ class TestSqliteDbRepo(unittest.TestCase):
         # Check if the correct query is executed
         mock_cursor.execute.assert_called_once_with(
             """
-            UPDATE users
-            SET demographic_1 = %s, choice_1_demographic_1 = %s, choice_2_demographic_1 = %s, choice_3_demographic_1 = %s, choice_4_demographic_1 = %s, demographic_2 = %s, choice_1_demographic_2 = %s, choice_2_demographic_2 = %s, choice_3_demographic_2 = %s, choice_4_demographic_2 = %s, time = %s
-            WHERE email = %s
-            """,
+                UPDATE users
+                SET demographic_1 = %s, choice_1_demographic_1 = %s, choice_2_demographic_1 = %s, choice_3_demographic_1 = %s, choice_4_demographic_1 = %s, demographic_2 = %s, choice_1_demographic_2 = %s, choice_2_demographic_2 = %s, choice_3_demographic_2 = %s, choice_4_demographic_2 = %s, time = %s
+                WHERE email = %s
+                """,
             (
                 "gender",  # demographic_1
                 "male",  # choice_1_demographic_1
@@ -203,6 +451,67 @@ class TestSqliteDbRepo(unittest.TestCase):
         )
         self.assertEqual(time, "year")
 
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_update_db_for_user_buffered(self, mock_get_connection):
+        # With a selection buffer the update is queued, not written
+        buffer = MagicMock()
+        repo = SqliteDbRepo(self.user, selection_buffer=buffer)
+
+        repo.update_db_for_user(["age"], {"age": ["18-26", "27-35"]}, "")
+
+        buffer.submit.assert_called_once_with(
+            "ff@gmail.com",
+            {
+                "demographic_1": "age",
+                "choice_1_demographic_1": "18-26",
+                "choice_2_demographic_1": "27-35",
+                "choice_3_demographic_1": None,
+                "choice_4_demographic_1": None,
+                "time": "year",
+            },
+        )
+        mock_get_connection.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_write_selection(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        mock_cursor = mock_connection.cursor.return_value
+
+        written = self.repo.write_selection(
+            "other@gmail.com", {"demographic_1": "age", "time": "month"}
+        )
+
+        self.assertTrue(written)
+        mock_cursor.execute.assert_called_once_with(
+            """
+                UPDATE users
+                SET demographic_1 = %s, time = %s
+                WHERE email = %s
+                """,
+            ("age", "month", "other@gmail.com"),
+        )
+        mock_connection.commit.assert_called_once()
+
+        mock_cursor.execute.side_effect = Error("SQL error")
+        self.assertFalse(self.repo.write_selection("other@gmail.com", {"time": "year"}))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_last_login_data_buffered(self, mock_get_connection):
+        # A queued selection is written before reading
+        buffer = MagicMock()
+        repo = SqliteDbRepo(self.user, selection_buffer=buffer)
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+        row = ("gender", "male", None, None, None, None, None, None, None, None, "day")
+        mock_connection.cursor.return_value.fetchone.return_value = row
+
+        demographics, choices, time = repo.get_last_login_data()
+
+        self.assertEqual(demographics, ["gender"])
+        self.assertEqual(time, "day")
+        buffer.flush.assert_called_once_with("ff@gmail.com")
+
     @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
     def test_get_last_login_data_no_data(self, mock_get_connection):
         # Test when no data is found for last login
@@ -329,11 +638,584 @@ class TestSqliteDbRepo(unittest.TestCase):
             self.assertIsNone(choices)
             self.assertIsNone(time)
 
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_create_table_typed_schema(self, mock_get_connection):
+        # Test that known demographic values become ENUM columns
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+
+        self.repo.create_table({"gender": ["Male", "Female"], "race": ["O'Neil"]})
+        query = mock_cursor.execute.call_args[0][0]
+        self.assertIn("gender ENUM('Male', 'Female')", query)
+        self.assertIn("race ENUM('O''Neil')", query)
+        self.assertIn("state VARCHAR(255)", query)
+        self.assertIn("timestamp DATETIME(6)", query)
+        self.assertIn("action_status TINYINT", query)
+        self.assertIn(
+            f"INDEX `{self.repo._index_name('gender_status')}` "
+            "(`gender`, `action_status`)",
+            query,
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_migrate_table(self, mock_get_connection):
+        # Test that a VARCHAR table is converted with a single ALTER
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("id", "int"),
+                ("gender", "varchar(255)"),
+                ("age", "int"),
+                ("race", "enum('White')"),
+                ("state", "varchar(255)"),
+                ("timestamp", "varchar(255)"),
+                ("action_status", "tinyint(4)"),
+            ],
+            [("Male",), ("Female",)],
+            [],
+            [
+                ("PRIMARY",),
+                (self.repo._index_name("timestamp"),),
+                (self.repo._index_name("gender_status"),),
+                (self.repo._index_name("age_status"),),
+            ],
+        ]
+
+        self.assertTrue(self.repo.migrate_table())
+        alter = mock_cursor.execute.call_args[0][0]
+        race_index = self.repo._index_name("race_status")
+        state_index = self.repo._index_name("state_status")
+        self.assertEqual(
+            alter,
+            "ALTER TABLE `ff@gmail.com` MODIFY `gender` ENUM('Male', 'Female'), "
+            "MODIFY `age` TINYINT UNSIGNED, MODIFY `timestamp` DATETIME(6), "
+            f"ADD INDEX `{race_index}` (`race`, `action_status`), "
+            f"ADD INDEX `{state_index}` (`state`, `action_status`)",
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_migrate_table_already_typed(self, mock_get_connection):
+        # Test that a typed table is left alone
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("gender", "enum('Male')"),
+                ("age", "tinyint unsigned"),
+                ("timestamp", "datetime(6)"),
+                ("action_status", "tinyint"),
+            ],
+            # Indexes on columns the table does not have are not added
+            [
+                (self.repo._index_name("timestamp"),),
+                (self.repo._index_name("gender_status"),),
+                (self.repo._index_name("age_status"),),
+            ],
+        ]
+
+        self.assertTrue(self.repo.migrate_table())
+        self.assertEqual(mock_cursor.execute.call_count, 2)
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_ensure_categories(self, mock_get_connection):
+        # Test that only unseen values are appended to the ENUM
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            ("gender", "enum('Male','Female')"),
+            ("state", "varchar(255)"),
+        ]
+
+        self.repo.ensure_categories(
+            {"gender": ["male", "Non-binary"], "state": ["CA"]}
+        )
+        alter = mock_cursor.execute.call_args[0][0]
+        self.assertEqual(
+            alter,
+            "ALTER TABLE `ff@gmail.com` "
+            "MODIFY `gender` ENUM('Male', 'Female', 'Non-binary')",
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_create_staging_table(self, mock_get_connection):
+        # Test that a uniquely named staging table is created
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+
+        staging_table = self.repo.create_staging_table()
+        self.assertTrue(staging_table.startswith("staging_"))
+        self.assertIn(f"CREATE TABLE `{staging_table}`", mock_cursor.execute.call_args[0][0])
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.ensure_categories")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.migrate_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_table")
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_publish_staging_table(
+        self,
+        mock_get_connection,
+        mock_create_table,
+        mock_migrate_table,
+        mock_ensure_categories,
+    ):
+        # Test that staging rows are copied in one statement and the staging table dropped
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [[("Male",), ("Female",)], [], []]
+        mock_cursor.rowcount = 3
+
+        rows = self.repo.publish_staging_table("staging_abc")
+
+        self.assertEqual(rows, 3)
+        mock_create_table.assert_called_once_with({"gender": ["Male", "Female"]})
+        mock_ensure_categories.assert_called_once_with({"gender": ["Male", "Female"]})
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertTrue(
+            queries[-2].startswith("INSERT INTO `ff@gmail.com` (`gender`, ")
+        )
+        self.assertIn("SELECT `gender`, ", queries[-2])
+        self.assertEqual(queries[-1], "DROP TABLE IF EXISTS `staging_abc`")
+        mock_connection.commit.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_has_ingested(self, mock_get_connection):
+        # Test looking up a content hash in the ingest ledger
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = (1,)
+
+        self.assertTrue(self.repo.has_ingested("abc"))
+        self.assertEqual(
+            mock_cursor.execute.call_args_list[1][0][1], ("ff@gmail.com", "abc")
+        )
+
+        mock_cursor.fetchone.return_value = None
+        self.assertFalse(self.repo.has_ingested("abc"))
+
+        # The ledger is ignored once the table is gone or empty
+        mock_cursor.fetchone.side_effect = [(1,), (0,)]
+        self.assertFalse(self.repo.has_ingested("abc"))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_record_ingest(self, mock_get_connection):
+        # Test adding a content hash to the ingest ledger
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+
+        self.repo.record_ingest("abc", 10)
+        self.assertEqual(
+            mock_cursor.execute.call_args[0][1], ("ff@gmail.com", "abc", 10)
+        )
+        mock_connection.commit.assert_called_once()
+        mock_cursor.close.assert_called_once()
+
+    def test_write_rollups(self):
+        # Test that rollup counts are upserted on the given cursor
+        mock_cursor = MagicMock()
+        counts = pd.DataFrame(
+            [("gender", "male", "", "", date(2024, 11, 24), 1, 2)],
+            columns=ROLLUP_COLUMNS,
+        )
+
+        self.repo.write_rollups(mock_cursor, counts)
+
+        query, rows = mock_cursor.executemany.call_args[0]
+        self.assertIn("row_count = row_count + VALUES(row_count)", query)
+        self.assertEqual(
+            rows, [("ff@gmail.com", "gender", "male", "", "", date(2024, 11, 24), 1, 2)]
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_rollup_counts_pair_in_any_order(self, mock_get_connection):
+        # Test that a pair asked for in the other order is looked up and swapped back
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            ("male", "White", date(2024, 11, 24), 1, 3)
+        ]
+
+        results = self.repo.get_rollup_counts(
+            "race", "gender", start=date(2024, 11, 1)
+        )
+
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("day >= %s", query)
+        self.assertEqual(params, ("ff@gmail.com", "gender", "race", date(2024, 11, 1)))
+        self.assertEqual(results, [("White", "male", date(2024, 11, 24), 1, 3)])
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table(self, mock_get_connection):
+        # Test that an unpartitioned table gets a partition per month it covers
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [],
+            [("id", "int"), ("timestamp", "datetime(6)")],
+        ]
+        mock_cursor.fetchone.side_effect = [
+            (0,),
+            (datetime(2023, 12, 5),),
+            (datetime(2024, 2, 1, 10),),
+        ]
+
+        self.assertTrue(self.repo.partition_table())
+
+        alter = mock_cursor.execute.call_args[0][0]
+        self.assertIn("ADD PRIMARY KEY (`id`, `timestamp`)", alter)
+        self.assertIn("PARTITION BY RANGE COLUMNS(`timestamp`)", alter)
+        self.assertIn(
+            "PARTITION p202312 VALUES LESS THAN ('2024-01-01'), "
+            "PARTITION p202401 VALUES LESS THAN ('2024-02-01'), "
+            "PARTITION p202402 VALUES LESS THAN ('2024-03-01'), "
+            "PARTITION pfuture VALUES LESS THAN (MAXVALUE)",
+            alter,
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_new_months(self, mock_get_connection):
+        # Test that months newer than the last partition are split off the future one
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("p202401",), ("pfuture",)]
+        mock_cursor.fetchone.side_effect = [
+            (datetime(2024, 1, 5),),
+            (datetime(2024, 3, 1),),
+        ]
+
+        self.assertTrue(self.repo.partition_table())
+
+        self.assertEqual(
+            mock_cursor.execute.call_args[0][0],
+            "ALTER TABLE `ff@gmail.com` REORGANIZE PARTITION pfuture INTO ("
+            "PARTITION p202402 VALUES LESS THAN ('2024-03-01'), "
+            "PARTITION p202403 VALUES LESS THAN ('2024-04-01'), "
+            "PARTITION pfuture VALUES LESS THAN (MAXVALUE))",
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_up_to_date(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("p202401",), ("pfuture",)]
+        mock_cursor.fetchone.side_effect = [
+            (datetime(2024, 1, 5),),
+            (datetime(2024, 1, 31),),
+        ]
+
+        self.assertTrue(self.repo.partition_table())
+
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertFalse(any(query.startswith("ALTER") for query in queries))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_text_timestamps(self, mock_get_connection):
+        # Test that a table still on the VARCHAR schema is left unpartitioned
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [],
+            [("id", "int"), ("timestamp", "varchar(255)")],
+        ]
+
+        self.assertFalse(self.repo.partition_table())
+
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertFalse(any(query.startswith("ALTER") for query in queries))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_null_timestamps(self, mock_get_connection):
+        # Test that rows without a timestamp keep the table unpartitioned
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [],
+            [("id", "int"), ("timestamp", "datetime(6)")],
+        ]
+        mock_cursor.fetchone.return_value = (1,)
+
+        self.assertFalse(self.repo.partition_table())
+
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertFalse(any(query.startswith("ALTER") for query in queries))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_text_edges(self, mock_get_connection):
+        # Test that timestamps read back as text still give the months
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("p202401",), ("pfuture",)]
+        mock_cursor.fetchone.side_effect = [
+            ("2024-01-05 00:00:00",),
+            ("2024-02-01 10:00:00.000000",),
+        ]
+
+        self.assertTrue(self.repo.partition_table())
+
+        self.assertIn("PARTITION p202402", mock_cursor.execute.call_args[0][0])
+
+    @patch.dict("os.environ", {"DB_BACKEND": "sqlite"})
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_partition_table_unsupported(self, mock_get_connection):
+        self.assertFalse(self.repo.partition_table())
+        mock_get_connection.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_distinct_values_table")
+    @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.create_rollup_table")
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_drop_data_before(self, mock_get_connection, *_):
+        # Test that whole months before the cutoff are dropped and the rest deleted
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [
+            ("p202312",),
+            ("p202401",),
+            ("p202402",),
+            ("pfuture",),
+        ]
+
+        self.assertTrue(self.repo.drop_data_before(date(2024, 2, 15)))
+
+        calls = [c[0] for c in mock_cursor.execute.call_args_list]
+        self.assertIn(
+            ("ALTER TABLE `ff@gmail.com` DROP PARTITION p202312, p202401",), calls
+        )
+        self.assertIn(
+            (
+                "DELETE FROM `ff@gmail.com` WHERE `timestamp` < %s",
+                (datetime(2024, 2, 15),),
+            ),
+            calls,
+        )
+        self.assertIn(
+            (
+                "DELETE FROM demographic_rollups WHERE email = %s AND day < %s",
+                ("ff@gmail.com", date(2024, 2, 15)),
+            ),
+            calls,
+        )
+        mock_connection.commit.assert_called_once()
+
+    def test_add_distinct_values(self):
+        # Test that catalog rows go out in one statement on the caller's cursor
+        mock_cursor = MagicMock()
+
+        self.repo.add_distinct_values(
+            mock_cursor, {"gender": ["Male", "Female"], "age": ["30"]}
+        )
+
+        query, rows = mock_cursor.executemany.call_args[0]
+        self.assertIn("INSERT IGNORE INTO distinct_values", query)
+        self.assertEqual(
+            rows,
+            [
+                ("ff@gmail.com", "gender", "Male"),
+                ("ff@gmail.com", "gender", "Female"),
+                ("ff@gmail.com", "age", "30"),
+            ],
+        )
+
+        mock_cursor.reset_mock()
+        self.repo.add_distinct_values(mock_cursor, {})
+        mock_cursor.executemany.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_create_distinct_values_table_fills_existing_table(
+        self, mock_get_connection
+    ):
+        # Test that a table loaded before the catalog existed is catalogued once
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = None
+
+        self.repo.create_distinct_values_table()
+
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        copies = [query for query in queries if "SELECT DISTINCT" in query]
+        self.assertEqual(len(copies), 4)
+        self.assertIn("FROM `ff@gmail.com`", copies[0])
+        mock_connection.commit.assert_called_once()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_create_distinct_values_table_already_filled(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = (1,)
+
+        self.repo.create_distinct_values_table()
+
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertFalse(any("SELECT DISTINCT" in query for query in queries))
+        mock_connection.commit.assert_not_called()
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_distinct_values(self, mock_get_connection):
+        # Test that catalogued values are returned without reading the table
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("Female",), ("Male",)]
+
+        values = self.repo.get_distinct_values("gender")
+
+        self.assertEqual(values, ["Female", "Male"])
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("FROM distinct_values", query)
+        self.assertEqual(params, ("ff@gmail.com", "gender"))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_distinct_values_falls_back_to_table(self, mock_get_connection):
+        # Test that a column missing from the catalog is read with SELECT DISTINCT
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [
+            [],
+            [("id", "int"), ("age", "tinyint unsigned")],
+            [(30,), (45,)],
+        ]
+
+        values = self.repo.get_distinct_values("age")
+
+        self.assertEqual(values, ["30", "45"])
+        self.assertEqual(
+            mock_cursor.execute.call_args[0][0],
+            "SELECT DISTINCT `age` FROM `ff@gmail.com` "
+            "WHERE `age` IS NOT NULL ORDER BY `age`",
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_distinct_values_unknown_column(self, mock_get_connection):
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.side_effect = [[], [("id", "int")]]
+
+        self.assertEqual(self.repo.get_distinct_values("height"), [])
+        queries = [c[0][0] for c in mock_cursor.execute.call_args_list]
+        self.assertFalse(any("SELECT DISTINCT" in query for query in queries))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_watermark(self, mock_get_connection):
+        # Test reading the stored high-water mark
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.side_effect = [(datetime(2024, 11, 30), 42), (1,)]
+
+        self.assertEqual(self.repo.get_watermark(), (datetime(2024, 11, 30), 42))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_watermark_empty_table(self, mock_get_connection):
+        # Test that a mark left by an emptied table is ignored
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.side_effect = [(datetime(2024, 11, 30), 42), (0,)]
+
+        self.assertEqual(self.repo.get_watermark(), (None, None))
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_get_watermark_unmarked_table(self, mock_get_connection):
+        # Test that a table loaded without incremental mode gives its newest row
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [("id", "int"), ("timestamp", "datetime")]
+        mock_cursor.fetchone.side_effect = [None, ("2024-11-30 10:00:00",)]
+
+        # Its ids may not be the upload's, so only the timestamp is used
+        self.assertEqual(self.repo.get_watermark(), (datetime(2024, 11, 30, 10), None))
+        self.assertEqual(
+            mock_cursor.execute.call_args[0][0],
+            "SELECT MAX(`timestamp`) FROM `ff@gmail.com`",
+        )
+
+    @patch("backend.app.repositories.sqlite_db_repo.DbConnectionManager.get_connection")
+    def test_update_watermark(self, mock_get_connection):
+        # Test moving the high-water mark forward
+        mock_connection = MagicMock()
+        mock_get_connection.return_value = mock_connection
+
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+
+        self.repo.update_watermark(datetime(2024, 11, 30), 42)
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("ON DUPLICATE KEY UPDATE", query)
+        self.assertEqual(params, ("ff@gmail.com", datetime(2024, 11, 30), 42))
+        mock_connection.commit.assert_called_once()
+
     @patch("backend.app.repositories.sqlite_db_repo.SqliteDbRepo.connect")
     def test_see_all_tables_no_connection(self, mock_connect):
         """Test when there is no database connection."""
-        # Simulate no connection by setting self.connection to None
-        self.repo.connection = None
+        # Simulate no connection being available
+        mock_connect.return_value.__enter__.return_value = None
 
         with patch("builtins.print") as mock_print:
             self.repo.see_all_tables()
@@ -347,8 +1229,8 @@ class TestSqliteDbRepo(unittest.TestCase):
         # Simulate a connection error (like a MySQL Error)
         mock_cursor = MagicMock()
         mock_cursor.execute.side_effect = Error("Database connection failed")
-        self.repo.connection = MagicMock()
-        self.repo.connection.cursor.return_value = mock_cursor
+        mock_connection = mock_connect.return_value.__enter__.return_value
+        mock_connection.cursor.return_value = mock_cursor
 
         with patch("builtins.print") as mock_print:
             self.repo.see_all_tables()
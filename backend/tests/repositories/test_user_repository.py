@@ -196,3 +196,93 @@ def test_create_user_connection_failure(user_repository):
             )
 
             mock_print.assert_called_once_with("Not connected to the database.")
+
+
+def test_ensure_email_index_adds_missing_index(
+    user_repository, mock_db_connection, monkeypatch
+):
+    monkeypatch.delenv("DB_BACKEND", raising=False)
+    monkeypatch.setattr(UserRepo, "_email_index_checked", False)
+    mock_cursor = MagicMock()
+    mock_db_connection.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None
+
+    with user_repository.connect():
+        pass
+    with user_repository.connect():
+        pass
+
+    statements = [c[0][0] for c in mock_cursor.execute.call_args_list]
+    assert len(statements) == 2
+    assert "INFORMATION_SCHEMA.STATISTICS" in statements[0]
+    assert statements[1] == (
+        "ALTER TABLE `users` ADD UNIQUE INDEX `ux_users_email` (email)"
+    )
+    assert UserRepo._email_index_checked
+
+
+def test_ensure_email_index_keeps_existing_index(
+    user_repository, mock_db_connection, monkeypatch
+):
+    monkeypatch.delenv("DB_BACKEND", raising=False)
+    monkeypatch.setattr(UserRepo, "_email_index_checked", False)
+    mock_cursor = MagicMock()
+    mock_db_connection.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = (1,)
+
+    with user_repository.connect():
+        pass
+
+    mock_cursor.execute.assert_called_once()
+
+
+def test_ensure_email_index_skipped_on_sqlite(
+    user_repository, mock_db_connection, monkeypatch
+):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setattr(UserRepo, "_email_index_checked", False)
+
+    with user_repository.connect():
+        pass
+
+    mock_db_connection.cursor.assert_not_called()
+    assert UserRepo._email_index_checked
+
+
+def test_ensure_email_index_failure(
+    user_repository, mock_db_connection, monkeypatch, capsys
+):
+    monkeypatch.delenv("DB_BACKEND", raising=False)
+    monkeypatch.setattr(UserRepo, "_email_index_checked", False)
+    mock_cursor = MagicMock()
+    mock_db_connection.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = None
+    mock_cursor.execute.side_effect = [None, Error("Duplicate entry")]
+
+    with user_repository.connect():
+        pass
+
+    assert "Error: Duplicate entry" in capsys.readouterr().out
+
+
+def test_get_user_by_email_reads_replica(user_repository, mock_db_connection):
+    with patch(
+        "backend.app.infrastructure.db_connection_manager.DbConnectionManager.get_connection",
+        return_value=mock_db_connection,
+    ) as mock_get_conn:
+        user_repository.get_user_by_email("test@example.com")
+
+    mock_get_conn.assert_called_once_with(readonly=True, pin_key="test@example.com")
+
+
+def test_writes_pin_reads_to_primary(user_repository, mock_db_connection):
+    with patch(
+        "backend.app.repositories.user_repo.DbConnectionManager.pin_to_primary"
+    ) as mock_pin:
+        user_repository.create_user("Ada", "Lovelace", "ada@example.com", "secret")
+        user_repository.update_password("ada@example.com", "new")
+
+    assert mock_pin.call_args_list == [
+        (("ada@example.com",),),
+        (("ada@example.com",),),
+    ]
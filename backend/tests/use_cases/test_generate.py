@@ -1,4 +1,6 @@
 # tests/use_cases/test_generate.py
+from unittest.mock import MagicMock, patch
+
 from backend.ml_model.entities.datapoint_entity import (
     DataPoint,
 )  # Ensure this import is correct based on your structure
@@ -71,3 +73,26 @@ def test_generate(mock_file_repo, mock_db_repo):
             item.get_false_negative_rate()
             == mock_data_points[i].get_false_negative_rate()
         ), f"Failed at index {i}: false negative mismatch"
+
+
+def test_generate_hands_data_over_in_memory():
+    file_repo = MagicMock()
+    db_repo = MagicMock()
+
+    with patch("backend.app.use_cases.generate.ModelTrainer") as mock_trainer:
+        mock_trainer.return_value.train_and_evaluate.return_value = []
+        result = Generate(file_repo, db_repo).execute(
+            ["gender"], {"gender": ["Male"]}, "week"
+        )
+
+    assert result == []
+    file_repo.get_comparison_data.assert_called_once_with(
+        ["gender"], {"gender": ["Male"]}, "week"
+    )
+    file_repo.update_comparison_csv.assert_not_called()
+    mock_trainer.assert_called_once_with(
+        data=file_repo.get_comparison_data.return_value
+    )
+    db_repo.update_db_for_user.assert_called_once_with(
+        ["gender"], {"gender": ["Male"]}, "week"
+    )
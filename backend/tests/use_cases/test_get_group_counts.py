@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from backend.app.use_cases import GetGroupCounts
+
+
+def test_get_group_counts_summarizes_each_group():
+    # Arrange
+    mock_file_repo = MagicMock()
+    mock_file_repo.get_group_counts.return_value = pd.DataFrame(
+        {
+            "gender": ["Female", "Male", "Male"],
+            "race": ["Black", "Black", "Black"],
+            "action_status": [0, 0, 1],
+            "row_count": [2, 1, 3],
+        }
+    )
+    use_case = GetGroupCounts(mock_file_repo)
+
+    # Act
+    result = use_case.execute(
+        ["gender", "race"], {"gender": ["Male", "Female"], "race": ["Black"]}, "week"
+    )
+
+    # Assert
+    assert result == [
+        {
+            "group": {"gender": "Female", "race": "Black"},
+            "rows": 2,
+            "positive": 0,
+            "positive_rate": 0.0,
+        },
+        {
+            "group": {"gender": "Male", "race": "Black"},
+            "rows": 4,
+            "positive": 3,
+            "positive_rate": 0.75,
+        },
+    ]
+    mock_file_repo.get_group_counts.assert_called_once_with(
+        ["gender", "race"], {"gender": ["Male", "Female"], "race": ["Black"]}, "week"
+    )
+
+
+def test_get_group_counts_single_demographic():
+    mock_file_repo = MagicMock()
+    mock_file_repo.get_group_counts.return_value = pd.DataFrame(
+        {"gender": ["Male"], "action_status": [1], "row_count": [5]}
+    )
+
+    result = GetGroupCounts(mock_file_repo).execute(["gender"], {}, "year")
+
+    assert result == [
+        {"group": {"gender": "Male"}, "rows": 5, "positive": 5, "positive_rate": 1.0}
+    ]
+
+
+def test_get_group_counts_error():
+    mock_file_repo = MagicMock()
+    mock_file_repo.get_group_counts.side_effect = Exception("Database error")
+
+    assert GetGroupCounts(mock_file_repo).execute(["gender"], {}, "year") == []
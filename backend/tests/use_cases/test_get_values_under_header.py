@@ -1,7 +1,5 @@
-import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
-import pandas as pd
 import pytest
 
 from backend.app.use_cases import GetValuesUnderHeader
@@ -12,16 +10,13 @@ def mock_file_repo():
     # Create a MagicMock instance of the FileRepository
     mock_repo = MagicMock()
     mock_repo.get_headers.return_value = ["gender", "age", "race", "state"]
-    curr_dir = os.path.dirname(__file__)
-    mock_repo.file_path = os.path.join(curr_dir, "../../../database/output.csv")
     return mock_repo
 
 
-@patch("pandas.read_csv")
-def test_get_values_under_header_race(mock_read_csv, mock_file_repo):
+def test_get_values_under_header_race(mock_file_repo):
     # Arrange
     header = "race"
-    mock_read_csv.return_value = pd.DataFrame({"race": ["Black", "Hispanic", "Other"]})
+    mock_file_repo.get_distinct_values.return_value = ["Black", "Hispanic", "Other"]
     use_case = GetValuesUnderHeader(mock_file_repo)
 
     # Act
@@ -29,15 +24,24 @@ def test_get_values_under_header_race(mock_read_csv, mock_file_repo):
 
     # Assert
     assert result == ["Black", "Hispanic", "Other"]
-    mock_file_repo.save_data_to_csv.assert_called_once()
-    mock_file_repo.delete_csv_data.assert_called_once()
+    mock_file_repo.get_distinct_values.assert_called_once_with("race")
+    # The values come from the catalog, not from a CSV export of the table
+    mock_file_repo.save_data_to_csv.assert_not_called()
+    mock_file_repo.delete_csv_data.assert_not_called()
 
 
-@patch("pandas.read_csv")
-def test_get_values_under_header_age_ranges(mock_read_csv, mock_file_repo):
+def test_get_values_under_header_age_ranges(mock_file_repo):
     # Arrange
     header = "age"
-    mock_read_csv.return_value = pd.DataFrame({"age": [18, 30, 40, 50, 60, 70, 80]})
+    mock_file_repo.get_distinct_values.return_value = [
+        "18",
+        "30",
+        "40",
+        "50",
+        "60",
+        "70",
+        "80",
+    ]
     use_case = GetValuesUnderHeader(mock_file_repo)
 
     # Act
@@ -53,12 +57,24 @@ def test_get_values_under_header_age_ranges(mock_read_csv, mock_file_repo):
         "63-71",
         "72-80",
     }
-    mock_file_repo.save_data_to_csv.assert_called_once()
-    mock_file_repo.delete_csv_data.assert_called_once()
+    mock_file_repo.get_distinct_values.assert_called_once_with("age")
+    mock_file_repo.save_data_to_csv.assert_not_called()
 
 
-@patch("pandas.read_csv")
-def test_get_values_under_header_no_such_header(mock_read_csv, mock_file_repo):
+def test_get_values_under_header_age_as_decimals(mock_file_repo):
+    # Arrange
+    header = "age"
+    mock_file_repo.get_distinct_values.return_value = ["25.0", "26.5", "27"]
+    use_case = GetValuesUnderHeader(mock_file_repo)
+
+    # Act
+    result = use_case.execute(header)
+
+    # Assert
+    assert set(result) == {"18-26", "27-35"}
+
+
+def test_get_values_under_header_no_such_header(mock_file_repo):
     # Arrange
     header = "non_existent_header"
     use_case = GetValuesUnderHeader(mock_file_repo)
@@ -68,33 +84,27 @@ def test_get_values_under_header_no_such_header(mock_read_csv, mock_file_repo):
 
     # Assert
     assert result == []
-    mock_file_repo.save_data_to_csv.assert_called_once()
-    mock_file_repo.delete_csv_data.assert_called_once()
+    mock_file_repo.get_distinct_values.assert_not_called()
+    mock_file_repo.save_data_to_csv.assert_not_called()
 
 
-@patch("pandas.read_csv")
-def test_get_values_under_header_with_nan_values(mock_read_csv, mock_file_repo):
+def test_get_values_under_header_no_values(mock_file_repo):
     # Arrange
     header = "race"
-    mock_read_csv.return_value = pd.DataFrame(
-        {"race": ["Black", None, "Other", "Hispanic"]}
-    )
+    mock_file_repo.get_distinct_values.return_value = []
     use_case = GetValuesUnderHeader(mock_file_repo)
 
     # Act
     result = use_case.execute(header)
 
     # Assert
-    assert result == ["Black", "Other", "Hispanic"]
-    mock_file_repo.save_data_to_csv.assert_called_once()
-    mock_file_repo.delete_csv_data.assert_called_once()
+    assert result == []
 
 
-@patch("pandas.read_csv")
-def test_get_values_under_header_exception_handling(mock_read_csv, mock_file_repo):
+def test_get_values_under_header_exception_handling(mock_file_repo):
     # Arrange
     header = "gender"
-    mock_read_csv.side_effect = Exception("Read CSV failed")
+    mock_file_repo.get_distinct_values.side_effect = Exception("Lookup failed")
     use_case = GetValuesUnderHeader(mock_file_repo)
 
     # Act
@@ -102,5 +112,4 @@ def test_get_values_under_header_exception_handling(mock_read_csv, mock_file_rep
 
     # Assert
     assert result == []
-    mock_file_repo.save_data_to_csv.assert_called_once()
-    mock_file_repo.delete_csv_data.assert_called_once()
+    mock_file_repo.save_data_to_csv.assert_not_called()
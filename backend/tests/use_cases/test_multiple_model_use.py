@@ -37,4 +37,23 @@ def test_execute_with_failure(
         use_case.execute()
 
     # Ensure that FileRepository methods were still called
-    mock_file_repo.save_data_to_csv.assert_called_once()
+    mock_file_repo.get_data.assert_called_once()
+
+
+@patch("backend.ml_model.use_cases.multiple_model_use.MultiModelEvaluator")
+def test_execute_hands_data_over_in_memory(
+    mock_evaluator, mock_file_repo, mock_model_files
+):
+    """Test that the dataset goes to the evaluator without a CSV file."""
+    mock_evaluator.return_value.evaluate_models.return_value = {"model1.pkl": {}}
+
+    use_case = EvaluateModelsUseCase(
+        file_repo=mock_file_repo, model_files=mock_model_files
+    )
+
+    assert use_case.execute() == {"model1.pkl": {}}
+    mock_evaluator.assert_called_once_with(
+        mock_model_files, data=mock_file_repo.get_data.return_value
+    )
+    mock_file_repo.save_data_to_csv.assert_not_called()
+    mock_file_repo.delete_csv_data.assert_not_called()